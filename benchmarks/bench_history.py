@@ -0,0 +1,153 @@
+"""Benchmark thời gian tải lịch sử đo (DashboardManager.get_history_by_model).
+
+Tạo database riêng (mặc định `halla_bench`), sinh dữ liệu giả với 10k/100k/1M
+measurement rồi đo thời gian tải bảng lịch sử bằng truy vấn gộp hiện tại và
+bằng cách cũ (mỗi sản phẩm × thông số một truy vấn).
+
+Chạy:
+    python benchmarks/bench_history.py
+    python benchmarks/bench_history.py --rows 10000 100000 --params 10 --repeat 5
+
+Kết nối dùng các biến DB_HOST/DB_USER/DB_PASSWORD/DB_PORT như ứng dụng,
+tên database lấy từ BENCH_DB_NAME. Database này sẽ bị xoá và tạo lại.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from config.database import DatabaseConfig
+from models.dashboard_manager import DashboardManager
+from synthetic_data import prepare_database, INSERT_BATCH
+
+
+def seed(total_rows, param_count):
+    """Sinh 1 model với param_count thông số và total_rows measurement"""
+    with DatabaseConfig.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM measurements")
+        cursor.execute("DELETE FROM products")
+        cursor.execute("DELETE FROM parameters")
+        cursor.execute("DELETE FROM models")
+        cursor.execute("INSERT INTO models (name) VALUES (%s)", (f"Bench {total_rows}",))
+        model_id = cursor.lastrowid
+        param_ids = []
+        for i in range(param_count):
+            cursor.execute(
+                "INSERT INTO parameters (model_id, name, unit) VALUES (%s, %s, %s)",
+                (model_id, f"P{i + 1}", "mm")
+            )
+            param_ids.append(cursor.lastrowid)
+        conn.commit()
+
+        products = total_rows // param_count
+        start = datetime.now() - timedelta(seconds=products * 2)
+        product_batch = []
+        batch = []
+        for product in range(products):
+            product_id = product + 1
+            measured_at = start + timedelta(seconds=product * 2)
+            product_batch.append((product_id, model_id, measured_at))
+            for param_id in param_ids:
+                batch.append((param_id, product_id, 10 + (product % 100) / 100, measured_at))
+            if len(batch) >= INSERT_BATCH:
+                flush(cursor, product_batch, batch)
+                conn.commit()
+                product_batch = []
+                batch = []
+        if batch:
+            flush(cursor, product_batch, batch)
+            conn.commit()
+        cursor.close()
+    return model_id
+
+
+def flush(cursor, product_batch, batch):
+    cursor.executemany(
+        "INSERT INTO products (id, model_id, started_at) VALUES (%s, %s, %s)",
+        product_batch
+    )
+    cursor.executemany(
+        "INSERT INTO measurements (parameter_id, product_id, value, measured_at) VALUES (%s, %s, %s, %s)",
+        batch
+    )
+
+
+def legacy_history(model_id, limit=50):
+    """Cách tải lịch sử cũ: 1 truy vấn nhóm + 1 truy vấn cho mỗi sản phẩm × thông số"""
+    with DatabaseConfig.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT id, name, unit FROM parameters WHERE model_id = %s ORDER BY id",
+            (model_id,)
+        )
+        parameters = cursor.fetchall()
+        cursor.execute("""
+            SELECT DISTINCT DATE_FORMAT(m.measured_at, '%Y-%m-%d %H:%i:%s') as time_group,
+                   MIN(m.measured_at) as measured_at
+            FROM measurements m
+            JOIN parameters p ON m.parameter_id = p.id
+            WHERE p.model_id = %s
+            GROUP BY DATE_FORMAT(m.measured_at, '%Y-%m-%d %H:%i:%s')
+            ORDER BY measured_at DESC
+            LIMIT %s
+        """, (model_id, limit))
+        history = []
+        for time_group in cursor.fetchall():
+            for param in parameters:
+                cursor.execute("""
+                    SELECT value FROM measurements
+                    WHERE parameter_id = %s
+                    AND DATE_FORMAT(measured_at, '%Y-%m-%d %H:%i:%s') = %s
+                    ORDER BY measured_at DESC
+                    LIMIT 1
+                """, (param['id'], time_group['time_group']))
+                cursor.fetchone()
+            history.append(time_group)
+        cursor.close()
+    return history
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--params', type=int, default=10)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--legacy-max-rows', type=int, default=100000,
+                        help='Bỏ qua cách cũ khi số dòng lớn hơn giá trị này (chạy rất lâu)')
+    args = parser.parse_args()
+
+    prepare_database()
+    manager = DashboardManager()
+
+    print(f"{'rows':>10} | {'single query (ms)':>18} | {'legacy (ms)':>12}")
+    print("-" * 47)
+    for rows in args.rows:
+        model_id = seed(rows, args.params)
+        new_time = best_of(lambda: manager.get_history_by_model(model_id, args.limit), args.repeat)
+        # Cách cũ dùng DATE_FORMAT của MySQL
+        if rows <= args.legacy_max_rows and DatabaseConfig.BACKEND == 'mysql':
+            legacy_time = f"{best_of(lambda: legacy_history(model_id, args.limit), 1) * 1000:12.1f}"
+        else:
+            legacy_time = f"{'skipped':>12}"
+        print(f"{rows:>10} | {new_time * 1000:18.1f} | {legacy_time}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Benchmark ghi báo cáo Excel: cách ghi theo luồng (openpyxl write-only) so với cách cũ.
+
+Cách cũ: nạp toàn bộ kết quả đo vào một DataFrame, điền vào bản sao template
+rồi ghi bằng pd.ExcelWriter(engine='openpyxl'). Cách mới: build_report_workbook
+nhận dữ liệu theo từng khối và ghi từng hàng vào workbook write-only.
+
+Dữ liệu là dữ liệu giả sinh theo từng khối (mỗi sản phẩm đo đủ các thông số),
+không cần MySQL; template có đủ số hàng để hai cách ghi cùng số ô. Mỗi cách
+chạy trong một tiến trình riêng để đo peak RSS độc lập; thời gian và mức tăng
+bộ nhớ tính từ sau khi đã đọc template.
+
+Chạy:
+    python benchmarks/bench_report_export.py
+    python benchmarks/bench_report_export.py --rows 100000 1000000 3000000 --params 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import numpy as np
+
+CHUNK_SIZE = 50000
+
+
+def peak_rss_mb():
+    """Peak RSS của tiến trình hiện tại (MB)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux trả về KB, macOS trả về byte
+        return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+    except ImportError:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                    'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                    'PagefileUsage', 'PeakPagefileUsage')
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        )
+        return counters.PeakWorkingSetSize / 1024 / 1024
+
+
+def synthetic_chunks(rows, param_count):
+    """Sinh rows kết quả đo theo thứ tự thời gian, mỗi khối tối đa CHUNK_SIZE dòng"""
+    import pandas as pd
+    parameter_ids = np.arange(1, param_count + 1)
+    start = np.datetime64('2024-01-01T00:00:00')
+    per_chunk = max(1, CHUNK_SIZE // param_count)
+    products = rows // param_count
+    for first in range(0, products, per_chunk):
+        count = min(per_chunk, products - first)
+        rng = np.random.default_rng(first)
+        product = np.repeat(np.arange(first, first + count), param_count)
+        yield pd.DataFrame({
+            'parameter_id': np.tile(parameter_ids, count),
+            'measured_at': start + product * np.timedelta64(30, 's'),
+            'value': 10 + rng.normal(0, 0.05, count * param_count),
+        })
+
+
+def make_inputs(rows, param_count, workdir):
+    import pandas as pd
+    parameters = [{'id': i + 1, 'name': f'P{i + 1}', 'unit': 'mm'} for i in range(param_count)]
+    template = pd.DataFrame({'STT': np.arange(1, rows // param_count + 1)})
+    for param in parameters:
+        template[f"{param['name']} (mm)"] = np.nan
+    template_path = os.path.join(workdir, 'template.xlsx')
+    template.to_excel(template_path, index=False)
+    return parameters, template_path
+
+
+def run_legacy(rows, param_count, workdir):
+    """Cách cũ: toàn bộ dữ liệu trong DataFrame, điền vào bản sao template, ghi bằng ExcelWriter"""
+    import pandas as pd
+    from models.dashboard_manager import DashboardManager
+    parameters, template_path = make_inputs(rows, param_count, workdir)
+    df_template = pd.read_excel(template_path)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+
+    frame = pd.concat(list(synthetic_chunks(rows, param_count)), ignore_index=True)
+    statistics = DashboardManager.compute_statistics(frame)
+    groups = dict(tuple(frame.groupby('parameter_id', sort=False)))
+    df_report = df_template.copy()
+    for param in parameters:
+        data = groups.get(param['id'])
+        col_idx = next(i for i, col in enumerate(df_template.columns) if param['name'].lower() in col.lower())
+        values = data['value'].to_numpy()[:len(df_report)]
+        df_report.iloc[:len(values), col_idx] = values
+    df_report.insert(0, 'Ngày tạo', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    df_report.insert(1, 'Từ ngày', '2024-01-01')
+    df_report.insert(2, 'Đến ngày', '2024-12-31')
+    with pd.ExcelWriter(os.path.join(workdir, 'legacy.xlsx'), engine='openpyxl') as writer:
+        df_report.to_excel(writer, sheet_name='Dữ liệu', index=False)
+        statistics.to_excel(writer, sheet_name='Thống kê')
+
+    return time.perf_counter() - start, baseline
+
+
+def run_streaming(rows, param_count, workdir):
+    """Cách mới: build_report_workbook với dữ liệu theo khối"""
+    import pandas as pd
+    from models.report_export import build_report_workbook
+    parameters, template_path = make_inputs(rows, param_count, workdir)
+
+    # Thống kê do MySQL tính (MODEL_STATISTICS_QUERY); ở đây tính trước, không tính thời gian
+    statistics = {}
+    for chunk in synthetic_chunks(rows, param_count):
+        for parameter_id, values in chunk.groupby('parameter_id')['value']:
+            stats = statistics.setdefault(parameter_id, {'min': np.inf, 'max': -np.inf, 'sum': 0.0, 'count': 0})
+            stats['min'] = min(stats['min'], values.min())
+            stats['max'] = max(stats['max'], values.max())
+            stats['sum'] += values.sum()
+            stats['count'] += len(values)
+    for stats in statistics.values():
+        stats['mean'] = stats.pop('sum') / stats['count']
+        stats['std'] = None
+
+    df_template = pd.read_excel(template_path)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    workbook, _ = build_report_workbook(
+        df_template, parameters, statistics, synthetic_chunks(rows, param_count),
+        [datetime.now().strftime('%Y-%m-%d %H:%M:%S'), '2024-01-01', '2024-12-31']
+    )
+    workbook.save(os.path.join(workdir, 'streaming.xlsx'))
+    return time.perf_counter() - start, baseline
+
+
+def run_child(path, rows, param_count):
+    with tempfile.TemporaryDirectory() as workdir:
+        runner = run_legacy if path == 'legacy' else run_streaming
+        seconds, baseline = runner(rows, param_count, workdir)
+    print(json.dumps({'seconds': seconds, 'baseline_mb': baseline, 'peak_mb': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000],
+                        help='Số kết quả đo (measurement) của báo cáo')
+    parser.add_argument('--params', type=int, default=10)
+    parser.add_argument('--skip-legacy-above', type=int, default=2000000,
+                        help='Không chạy cách cũ khi số kết quả đo lớn hơn giá trị này')
+    parser.add_argument('--run', choices=['legacy', 'streaming'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_child(args.run, args.rows[0], args.params)
+        return
+
+    print(f"{'measurements':>12} {'cách ghi':>10} {'giây':>8} {'rows/s':>10} {'peak RSS (MB)':>14} {'tăng (MB)':>10}")
+    for rows in args.rows:
+        for path in ('legacy', 'streaming'):
+            if path == 'legacy' and rows > args.skip_legacy_above:
+                print(f"{rows:>12} {path:>10} {'bỏ qua':>8}")
+                continue
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run', path,
+                 '--rows', str(rows), '--params', str(args.params)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{rows:>12} {path:>10} {result['seconds']:>8.2f} {rows / result['seconds']:>10.0f} "
+                  f"{result['peak_mb']:>14.1f} {result['peak_mb'] - result['baseline_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""Bộ benchmark các đường xử lý chính, kết quả dạng JSON để so sánh giữa các lần chạy.
+
+Với mỗi cỡ dữ liệu (--rows), database benchmark (BENCH_DB_NAME, mặc định
+`halla_bench`, bị xoá và tạo lại) được nạp dữ liệu giả (synthetic_data.py)
+rồi đo:
+- history: DashboardManager.get_history_by_model (trang đầu)
+- measurement_data: DashboardManager.get_measurement_data (một thông số, cả khoảng)
+- chart: truy vấn và vẽ biểu đồ như DashboardWidget.update_chart (Qt offscreen)
+- report: ReportManager.generate_report (Excel + biểu đồ)
+- backup / restore: BackupManager.create_backup / restore_backup
+- add_measurement: MeasurementManager.add_measurement tới khi đã ghi lên database
+- acquisition: thiết bị giả lập (hardware/simulator.py) -> luồng đọc serial -> database
+
+Chạy không cần màn hình; thư mục làm việc là thư mục tạm (nhật ký cục bộ,
+bản sao lưu, file báo cáo không ghi vào repo).
+
+Chạy:
+    python benchmarks/bench_suite.py --rows 10000 100000 --output results.json
+    python benchmarks/bench_suite.py --rows 1000000 --cases history chart report
+    python benchmarks/bench_suite.py --compare baseline.json --output results.json
+
+--compare in tỉ lệ thời gian so với lần chạy trước và thoát với mã 1 nếu có
+trường hợp chậm hơn quá --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from config.database import DatabaseConfig
+from synthetic_data import prepare_database, clear_data, seed_dataset
+
+CASES = ['history', 'measurement_data', 'chart', 'report', 'backup', 'add_measurement', 'acquisition']
+
+
+def log(message):
+    # stdout dành cho JSON khi không có --output
+    print(f"[INFO] {message}", file=sys.stderr, flush=True)
+
+
+def best_of(func, repeat):
+    """(thời gian nhỏ nhất, kết quả lần chạy cuối)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def bench_history(model, args):
+    from models.dashboard_manager import DashboardManager
+    manager = DashboardManager()
+    seconds, history = best_of(lambda: manager.get_history_by_model(model['id'], args.limit), args.repeat)
+    return {'seconds': seconds, 'result_rows': len(history or [])}
+
+
+def bench_measurement_data(model, args):
+    from models.dashboard_manager import DashboardManager
+    manager = DashboardManager()
+    param_id = model['parameter_ids'][0]
+    seconds, frame = best_of(
+        lambda: manager.get_measurement_data(param_id, model['start'], model['end']), args.repeat
+    )
+    return {'seconds': seconds, 'result_rows': len(frame), 'rows_per_s': len(frame) / seconds if seconds else None}
+
+
+def bench_chart(model, args):
+    """Truy vấn chuỗi giá trị và vẽ như DashboardWidget._show_chart"""
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.figure import Figure
+    from models.dashboard_manager import DashboardManager
+    from ui.live_chart import LiveChart
+
+    manager = DashboardManager()
+    param_id = model['parameter_ids'][0]
+    query_s, rows = best_of(lambda: manager.get_measurement_series(param_id), args.repeat)
+
+    figure = Figure(figsize=(8, 4), dpi=100)
+    canvas = FigureCanvas(figure)
+    canvas.resize(800, 400)
+    chart = LiveChart(figure, figure.add_subplot(111), canvas)
+    values = [row[1] for row in rows]
+
+    def render():
+        chart.set_series(values, title="Benchmark")
+        canvas.draw()
+    render_s, _ = best_of(render, args.repeat)
+    return {'seconds': query_s + render_s, 'query_s': query_s, 'render_s': render_s, 'points': len(values)}
+
+
+def bench_report(model, args, workdir):
+    import pandas as pd
+    from models.report_manager import ReportManager
+
+    # Template: một hàng cho mỗi sản phẩm, một cột cho mỗi thông số (tên chứa tên thông số)
+    template_path = os.path.join(workdir, 'template.xlsx')
+    template = pd.DataFrame({'STT': range(1, min(model['products'], args.template_rows) + 1)})
+    for j in range(len(model['parameter_ids'])):
+        template[f"P{j + 1} (mm)"] = None
+    template.to_excel(template_path, index=False)
+    with DatabaseConfig.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO templates (name, file_path) VALUES (%s, %s)", ("Bench", template_path))
+        template_id = cursor.lastrowid
+        conn.commit()
+        cursor.close()
+
+    manager = ReportManager()
+    output_path = os.path.join(workdir, 'report.xlsx')
+    start = time.perf_counter()
+    ok = manager.generate_report(template_id, model['id'], model['start'].date(), model['end'].date(), output_path)
+    seconds = time.perf_counter() - start
+    if not ok:
+        raise RuntimeError("generate_report trả về False")
+    return {'seconds': seconds, 'file_bytes': os.path.getsize(output_path)}
+
+
+def bench_backup(rows, args, workdir):
+    """Sao lưu đầy đủ rồi khôi phục lại chính bản đó; trả về hai kết quả"""
+    from models.backup_manager import BackupManager
+    manager = BackupManager()
+    backup_dir = os.path.join(workdir, 'backups')
+
+    start = time.perf_counter()
+    path = manager.create_backup(backup_dir)
+    backup_s = time.perf_counter() - start
+    if not path:
+        raise RuntimeError("create_backup trả về None")
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+    start = time.perf_counter()
+    ok = manager.restore_backup(path)
+    restore_s = time.perf_counter() - start
+    if not ok:
+        raise RuntimeError("restore_backup trả về False")
+    return (
+        {'seconds': backup_s, 'backup_bytes': size, 'rows_per_s': rows / backup_s},
+        {'seconds': restore_s, 'rows_per_s': rows / restore_s},
+    )
+
+
+def bench_add_measurement(model, args):
+    """Ghi args.write_rows kết quả đo qua add_measurement, tới khi đã đồng bộ lên database"""
+    from models.measurement_manager import MeasurementManager
+    manager = MeasurementManager()
+    count = args.write_rows
+    param_ids = model['parameter_ids']
+
+    start = time.perf_counter()
+    product_id = None
+    for i in range(count):
+        if i % len(param_ids) == 0:
+            product_id = manager.create_product(model['id'])
+        manager.add_measurement(model['id'], param_ids[i % len(param_ids)], 10.0 + (i % 100) / 1000,
+                                product_id=product_id)
+    submit_s = time.perf_counter() - start
+    if not manager.flush(timeout=600):
+        raise RuntimeError("Hết thời gian chờ đồng bộ kết quả đo")
+    seconds = time.perf_counter() - start
+    return {
+        'seconds': seconds, 'submit_s': submit_s, 'rows': count,
+        'rows_per_s': count / seconds, 'submit_rows_per_s': count / submit_s,
+    }
+
+
+def bench_acquisition(model, args):
+    """Thiết bị giả lập -> SerialReader -> add_measurement_async -> database"""
+    from hardware.device import HighGaugeDevice
+    from hardware.simulator import GaugeSimulator
+    from models.measurement_manager import MeasurementManager
+
+    manager = MeasurementManager()
+    simulator = GaugeSimulator(rate=args.acq_rate, noise=0.01, seed=0)
+    port = simulator.start_inprocess()
+    device = HighGaugeDevice()
+    if not device.connect(port):
+        simulator.stop()
+        raise RuntimeError(f"Không kết nối được {port}")
+
+    param_id = model['parameter_ids'][0]
+    product_id = manager.create_product(model['id'])
+    received = 0
+    start = time.perf_counter()
+    device.start_measurement()
+    device.start_acquisition(65536)
+    while time.perf_counter() - start < args.acq_seconds:
+        time.sleep(0.01)
+        for sample in device.read_samples():
+            manager.add_measurement_async(model['id'], param_id, sample.value, product_id=product_id,
+                                          measured_at=datetime.fromtimestamp(sample.timestamp))
+            received += 1
+    device.stop_measurement()
+    reader_stats = device.acquisition_stats() or {}
+    device.disconnect()
+    simulator.stop()
+    if not manager.flush(timeout=600):
+        raise RuntimeError("Hết thời gian chờ đồng bộ kết quả đo")
+    seconds = time.perf_counter() - start
+    sim_stats = simulator.stats()
+    return {
+        'seconds': seconds, 'target_rate': args.acq_rate, 'sent': sim_stats['sent'],
+        'dropped_by_device': sim_stats['dropped'], 'stored': received,
+        'samples_per_s': received / seconds, 'overflows': reader_stats.get('overflows'),
+    }
+
+
+def run_size(rows, args, workdir):
+    log(f"Sinh {rows} kết quả đo...")
+    clear_data()
+    start = time.perf_counter()
+    read_model, write_model = seed_dataset(rows, args.params, model_count=1, seed=rows) + \
+        seed_dataset(0, args.params, model_count=1, seed=rows + 1)
+    log(f"Đã sinh dữ liệu trong {time.perf_counter() - start:.1f}s")
+
+    results = []
+
+    def record(case, func):
+        if case not in args.cases:
+            return
+        log(f"{case} ({rows} dòng)...")
+        try:
+            outcome = func()
+        except Exception as e:
+            print(f"[WARNING] {case} ({rows} dòng) lỗi: {e}", file=sys.stderr)
+            results.append({'case': case, 'rows': rows, 'error': str(e)})
+            return
+        for name, values in (outcome if isinstance(outcome, list) else [(case, outcome)]):
+            results.append({'case': name, 'rows': rows, **values})
+
+    record('history', lambda: bench_history(read_model, args))
+    record('measurement_data', lambda: bench_measurement_data(read_model, args))
+    record('chart', lambda: bench_chart(read_model, args))
+    record('report', lambda: bench_report(read_model, args, workdir))
+    # Khôi phục đúng dữ liệu vừa sao lưu nên các bước sau không bị ảnh hưởng
+    record('backup', lambda: list(zip(('backup', 'restore'), bench_backup(rows, args, workdir))))
+    record('add_measurement', lambda: bench_add_measurement(write_model, args))
+    record('acquisition', lambda: bench_acquisition(write_model, args))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=current_dir, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """In tỉ lệ thời gian so với baseline; trả về danh sách trường hợp chậm hơn quá tolerance"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['case'], r['rows']): r for r in json.load(f)['results'] if 'seconds' in r}
+    regressions = []
+    print(f"{'case':>18} | {'rows':>10} | {'baseline (s)':>12} | {'now (s)':>10} | {'ratio':>6}", file=sys.stderr)
+    for result in results:
+        old = baseline.get((result['case'], result['rows']))
+        if old is None or 'seconds' not in result or not old['seconds']:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = " <-- chậm hơn" if ratio > 1 + tolerance else ""
+        print(f"{result['case']:>18} | {result['rows']:>10} | {old['seconds']:12.3f} | "
+              f"{result['seconds']:10.3f} | {ratio:6.2f}{flag}", file=sys.stderr)
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--params', type=int, default=10)
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=50, help='Số sản phẩm trang đầu của lịch sử')
+    parser.add_argument('--template-rows', type=int, default=100000, help='Số hàng tối đa của template báo cáo')
+    parser.add_argument('--write-rows', type=int, default=20000, help='Số kết quả đo ghi qua add_measurement')
+    parser.add_argument('--acq-rate', type=float, default=2000, help='Tốc độ (mẫu/s) của thiết bị giả lập')
+    parser.add_argument('--acq-seconds', type=float, default=5)
+    parser.add_argument('--output', help='File JSON kết quả (mặc định in ra stdout)')
+    parser.add_argument('--compare', help='File JSON của lần chạy trước để so sánh')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Tỉ lệ chậm hơn tối đa khi --compare')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    report = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+        },
+        'results': [],
+    }
+    prepare_database()
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='bench_suite_') as workdir:
+        os.chdir(workdir)
+        try:
+            from models.measurement_manager import MeasurementManager
+            MeasurementManager.OUTBOX_PATH = os.path.join(workdir, 'outbox.db')
+            for rows in args.rows:
+                report['results'].extend(run_size(rows, args, workdir))
+            MeasurementManager.close_writer()
+        finally:
+            os.chdir(previous_dir)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        log(f"Đã ghi kết quả vào {output}")
+    else:
+        print(text)
+
+    if baseline and compare(report['results'], baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
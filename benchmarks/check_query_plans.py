@@ -0,0 +1,160 @@
+"""Kiểm tra kế hoạch thực thi (EXPLAIN) của các truy vấn dashboard.
+
+Tạo database riêng (mặc định `halla_bench`) bằng init_database (chạy cả các
+migration), sinh dữ liệu giả trải trên nhiều ngày rồi chạy EXPLAIN cho từng
+truy vấn thường dùng. Thoát với mã 1 nếu có truy vấn quét toàn bảng.
+
+Chạy:
+    python benchmarks/check_query_plans.py
+    python benchmarks/check_query_plans.py --models 5 --products 20000 --min-rows 1000
+
+Kết nối dùng các biến DB_HOST/DB_USER/DB_PASSWORD/DB_PORT như ứng dụng,
+tên database lấy từ BENCH_DB_NAME. Database này sẽ bị xoá và tạo lại.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from config.database import DatabaseConfig
+from models.dashboard_manager import (
+    MEASUREMENT_DATA_QUERY, MEASUREMENT_SERIES_QUERY,
+    LATEST_MEASUREMENTS_QUERY, MEASUREMENT_SUMMARY_QUERY, TOTAL_PRODUCT_QUERY,
+    HISTORY_QUERY, MODEL_MEASUREMENTS_QUERY, MODEL_STATISTICS_QUERY,
+    MODEL_MEASUREMENTS_STREAM_QUERY
+)
+from models.model_catalog import CATALOG_VERSION_QUERY
+from synthetic_data import prepare_database, INSERT_BATCH
+
+SPREAD_DAYS = 90
+
+
+def seed(model_count, products_per_model, param_count):
+    """Sinh model_count model, mỗi model products_per_model sản phẩm trải đều SPREAD_DAYS ngày"""
+    with DatabaseConfig.connection() as conn:
+        cursor = conn.cursor()
+        models = []
+        for i in range(model_count):
+            cursor.execute("INSERT INTO models (name) VALUES (%s)", (f"Plan {i + 1}",))
+            model_id = cursor.lastrowid
+            param_ids = []
+            for j in range(param_count):
+                cursor.execute(
+                    "INSERT INTO parameters (model_id, name, unit) VALUES (%s, %s, %s)",
+                    (model_id, f"P{j + 1}", "mm")
+                )
+                param_ids.append(cursor.lastrowid)
+            models.append((model_id, param_ids))
+        conn.commit()
+
+        start = datetime.now() - timedelta(days=SPREAD_DAYS)
+        step = timedelta(days=SPREAD_DAYS) / products_per_model
+        product_id = 0
+        product_batch = []
+        batch = []
+        for n in range(products_per_model):
+            measured_at = start + step * n
+            for model_id, param_ids in models:
+                product_id += 1
+                product_batch.append((product_id, model_id, measured_at))
+                for param_id in param_ids:
+                    batch.append((model_id, param_id, product_id, 10 + (n % 100) / 100, measured_at))
+            if len(batch) >= INSERT_BATCH:
+                flush(cursor, product_batch, batch)
+                conn.commit()
+                product_batch = []
+                batch = []
+        if batch:
+            flush(cursor, product_batch, batch)
+            conn.commit()
+        # Cập nhật thống kê để EXPLAIN phản ánh đúng dữ liệu vừa sinh
+        for table in ('models', 'parameters', 'products', 'measurements'):
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        cursor.close()
+    return models
+
+
+def flush(cursor, product_batch, batch):
+    cursor.executemany(
+        "INSERT INTO products (id, model_id, started_at) VALUES (%s, %s, %s)",
+        product_batch
+    )
+    cursor.executemany(
+        "INSERT INTO measurements (model_id, parameter_id, product_id, value, measured_at) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        batch
+    )
+
+
+def hot_queries(model_id, parameter_id):
+    """Các truy vấn của DashboardManager với tham số điển hình"""
+    now = datetime.now()
+    return [
+        ("get_measurement_data", MEASUREMENT_DATA_QUERY + " ORDER BY m.measured_at", (parameter_id,)),
+        ("get_measurement_data (khoảng ngày)",
+         MEASUREMENT_DATA_QUERY + " AND m.measured_at >= %s AND m.measured_at <= %s ORDER BY m.measured_at",
+         (parameter_id, now - timedelta(days=7), now)),
+        ("get_measurement_series", MEASUREMENT_SERIES_QUERY, (parameter_id, 0)),
+        ("ModelCatalog (version)", CATALOG_VERSION_QUERY, ()),
+        ("get_latest_measurements", LATEST_MEASUREMENTS_QUERY, (10,)),
+        ("get_measurement_summary", MEASUREMENT_SUMMARY_QUERY, (now - timedelta(days=7),)),
+        ("get_total_product", TOTAL_PRODUCT_QUERY, (model_id,)),
+        ("get_history_by_model", HISTORY_QUERY, (model_id, 50)),
+        ("get_model_measurements (báo cáo tháng)", MODEL_MEASUREMENTS_QUERY,
+         (model_id, now - timedelta(days=30), now)),
+        ("get_model_statistics", MODEL_STATISTICS_QUERY, (model_id, now - timedelta(days=30), now)),
+        ("iter_model_measurements", MODEL_MEASUREMENTS_STREAM_QUERY,
+         (model_id, now - timedelta(days=30), now)),
+    ]
+
+
+def print_plans(conn, queries):
+    cursor = conn.cursor(dictionary=True)
+    for name, sql, params in queries:
+        cursor.execute("EXPLAIN " + sql, params)
+        print(f"\n{name}")
+        for step in cursor.fetchall():
+            print(f"  {str(step['table']):<14} type={str(step['type']):<7} "
+                  f"key={str(step['key']):<30} rows={step['rows']} {step['Extra'] or ''}")
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--models', type=int, default=5)
+    parser.add_argument('--products', type=int, default=20000, help='Số sản phẩm mỗi model')
+    parser.add_argument('--params', type=int, default=10)
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help='Chỉ coi là full scan khi bảng ước lượng từ số dòng này trở lên')
+    args = parser.parse_args()
+
+    if DatabaseConfig.BACKEND != 'mysql':
+        # EXPLAIN (type/key/rows) là định dạng riêng của MySQL
+        print("[WARNING] check_query_plans chỉ chạy với DB_BACKEND=mysql")
+        sys.exit(2)
+
+    prepare_database()
+    models = seed(args.models, args.products, args.params)
+    model_id, param_ids = models[len(models) // 2]
+    queries = hot_queries(model_id, param_ids[0])
+
+    with DatabaseConfig.connection() as conn:
+        print_plans(conn, queries)
+        full_scans = DatabaseConfig.find_full_scans(conn, queries, min_rows=args.min_rows)
+
+    if full_scans:
+        print("\n=== FULL TABLE SCAN ===")
+        for scan in full_scans:
+            print(f"- {scan['query']}: bảng {scan['table']} (~{scan['rows']} dòng) {scan['extra'] or ''}")
+        sys.exit(1)
+    print("\nKhông có truy vấn nào quét toàn bảng.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Sinh dữ liệu giả cho các benchmark: model, thông số, sản phẩm và kết quả đo.
+
+Mỗi thông số có giá trị danh định và dung sai riêng (min_value/max_value),
+giá trị đo phân bố chuẩn quanh danh định, trôi chậm theo thời gian và có một
+tỉ lệ nhỏ điểm ngoài dung sai. Sản phẩm trải đều trong spread_days ngày gần
+nhất, mỗi sản phẩm đo đủ mọi thông số của model. Dữ liệu được ghi theo lô
+INSERT_BATCH dòng nên dùng được cho 10^4 tới 10^7 kết quả đo.
+
+prepare_database() trỏ DatabaseConfig vào database riêng (BENCH_DB_NAME, mặc
+định `halla_bench`); database này sẽ bị xoá và tạo lại. Với DB_BACKEND=sqlite
+đó là file `<BENCH_DB_NAME>.db` trong thư mục hiện tại, không cần server MySQL.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_path = os.path.join(os.path.dirname(current_dir), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import numpy as np
+
+from config.database import DatabaseConfig
+
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME') or 'halla_bench'
+INSERT_BATCH = 10000
+# Tỉ lệ điểm ngoài dung sai
+OUTLIER_RATIO = 0.005
+
+
+def prepare_database():
+    """Tạo lại database benchmark và trỏ DatabaseConfig vào đó"""
+    DatabaseConfig.close_pool()
+    if DatabaseConfig.BACKEND == 'sqlite':
+        DatabaseConfig.SQLITE_PATH = os.path.abspath(f"{BENCH_DB_NAME}.db")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(DatabaseConfig.SQLITE_PATH + suffix):
+                os.remove(DatabaseConfig.SQLITE_PATH + suffix)
+        DatabaseConfig().init_database()
+        return
+
+    import mysql.connector
+    conn = mysql.connector.connect(
+        host=DatabaseConfig.HOST,
+        user=DatabaseConfig.USER,
+        password=DatabaseConfig.PASSWORD,
+        port=DatabaseConfig.PORT,
+        use_pure=True
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+    cursor.execute(f"CREATE DATABASE `{BENCH_DB_NAME}` CHARACTER SET utf8mb4")
+    cursor.close()
+    conn.close()
+
+    DatabaseConfig.DATABASE = BENCH_DB_NAME
+    DatabaseConfig().init_database()
+
+
+def clear_data():
+    """Xoá toàn bộ model/thông số/kết quả đo trong database benchmark"""
+    with DatabaseConfig.connection() as conn:
+        cursor = conn.cursor()
+        for table in ('measurements', 'products', 'parameters', 'models', 'templates'):
+            cursor.execute(f"DELETE FROM {table}")
+        conn.commit()
+        cursor.close()
+
+
+def seed_dataset(total_rows, param_count=10, model_count=1, spread_days=30, seed=0):
+    """Sinh model_count model, mỗi model param_count thông số, tổng cộng khoảng total_rows kết quả đo.
+
+    Trả về danh sách dict {'id', 'parameter_ids', 'products', 'start', 'end'} cho từng model.
+    """
+    rng = np.random.default_rng(seed)
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=spread_days)
+    products_per_model = max(1, total_rows // (param_count * model_count))
+    step = (end - start) / products_per_model
+
+    with DatabaseConfig.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM products")
+        next_product = cursor.fetchone()[0] + 1
+
+        models = []
+        for m in range(model_count):
+            cursor.execute("INSERT INTO models (name, description) VALUES (%s, %s)",
+                           (f"Bench {m + 1}", f"{products_per_model} sản phẩm x {param_count} thông số"))
+            model_id = cursor.lastrowid
+            nominal = rng.uniform(5, 50, param_count).round(2)
+            tolerance = (nominal * rng.uniform(0.005, 0.02, param_count)).round(3)
+            param_ids = []
+            for j in range(param_count):
+                cursor.execute(
+                    "INSERT INTO parameters (model_id, name, unit, min_value, max_value) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    (model_id, f"P{j + 1}", "mm",
+                     float(nominal[j] - tolerance[j]), float(nominal[j] + tolerance[j]))
+                )
+                param_ids.append(cursor.lastrowid)
+            models.append({
+                'id': model_id, 'parameter_ids': param_ids, 'nominal': nominal,
+                'tolerance': tolerance, 'products': products_per_model,
+                'first_product': next_product, 'start': start, 'end': end,
+            })
+            next_product += products_per_model
+        conn.commit()
+
+        per_batch = max(1, INSERT_BATCH // param_count)
+        for model in models:
+            for first in range(0, model['products'], per_batch):
+                count = min(per_batch, model['products'] - first)
+                _insert_products(cursor, model, first, count, step, param_count, rng)
+                conn.commit()
+        cursor.close()
+    return models
+
+
+def _insert_products(cursor, model, first, count, step, param_count, rng):
+    index = np.arange(first, first + count)
+    measured_at = [model['start'] + step * int(i) for i in index]
+    product_ids = (model['first_product'] + index).tolist()
+
+    # Giá trị đo: danh định + trôi chậm theo thời gian + nhiễu (sigma = dung sai / 3)
+    progress = (index / max(1, model['products'] - 1))[:, None]
+    sigma = model['tolerance'] / 3
+    values = (model['nominal'] + sigma * 0.5 * np.sin(progress * 6.283)
+              + rng.normal(0, 1, (count, param_count)) * sigma)
+    outliers = rng.random((count, param_count)) < OUTLIER_RATIO
+    tolerance = np.broadcast_to(model['tolerance'], values.shape)
+    values[outliers] += tolerance[outliers] * rng.choice([-2, 2], outliers.sum())
+    values = values.round(4).tolist()
+
+    cursor.executemany(
+        "INSERT INTO products (id, model_id, started_at) VALUES (%s, %s, %s)",
+        [(product_id, model['id'], at) for product_id, at in zip(product_ids, measured_at)]
+    )
+    cursor.executemany(
+        "INSERT INTO measurements (model_id, parameter_id, product_id, value, measured_at) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [
+            (model['id'], param_id, product_id, row[j], at)
+            for product_id, at, row in zip(product_ids, measured_at, values)
+            for j, param_id in enumerate(model['parameter_ids'])
+        ]
+    )
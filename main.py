@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 
 # Thêm thư mục src vào sys.path để có thể import
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -38,4 +39,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == '__main__':
+    # Bắt buộc cho process pool vẽ biểu đồ báo cáo khi chạy bản PyInstaller
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
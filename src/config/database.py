@@ -1,8 +1,12 @@
 import os
 import sys
+import sqlite3
 import mysql.connector
 import traceback
 import time
+import queue
+import threading
+from contextlib import contextmanager
 
 # Load dotenv only if available
 try:
@@ -26,6 +30,230 @@ try:
 except ImportError:
     print("[INFO] python-dotenv not available, using default config")
 
+try:
+    from config import sqlite_backend
+except ImportError:
+    try:
+        from src.config import sqlite_backend
+    except ImportError:
+        from . import sqlite_backend
+
+try:
+    from config.query_stats import InstrumentedCursor, QueryStats
+except ImportError:
+    try:
+        from src.config.query_stats import InstrumentedCursor, QueryStats
+    except ImportError:
+        from .query_stats import InstrumentedCursor, QueryStats
+
+# Lỗi database của cả hai backend (mysql/sqlite), dùng trong các khối except
+DatabaseError = (mysql.connector.Error, sqlite3.Error)
+# Lỗi tạm thời (mất kết nối, database đang bị khoá): nên thử lại sau
+TransientDatabaseError = (mysql.connector.errors.OperationalError,
+                          mysql.connector.errors.InterfaceError,
+                          sqlite3.OperationalError)
+# Mã lỗi MySQL tạm thời nhưng được báo bằng DatabaseError/InternalError:
+# 1205 (lock wait timeout), 1213 (deadlock)
+TRANSIENT_MYSQL_ERRNOS = (1205, 1213)
+# Lỗi do chính dữ liệu (vi phạm ràng buộc, sai kiểu, câu lệnh sai): thử lại cũng không ghi được
+RejectedRowError = (mysql.connector.errors.IntegrityError,
+                    mysql.connector.errors.DataError,
+                    mysql.connector.errors.ProgrammingError,
+                    sqlite3.IntegrityError,
+                    sqlite3.DataError,
+                    sqlite3.ProgrammingError)
+
+
+def is_transient_error(error):
+    """Lỗi có thể hết khi thử lại (mất kết nối, database bị khoá, lock wait timeout, deadlock)"""
+    if isinstance(error, TransientDatabaseError):
+        return True
+    return getattr(error, 'errno', None) in TRANSIENT_MYSQL_ERRNOS
+
+
+class PooledConnection:
+    """Kết nối mượn từ ConnectionPool.
+
+    Mọi thuộc tính được chuyển tiếp tới kết nối MySQL gốc, riêng close()
+    trả kết nối về pool để tái sử dụng. cursor() trả về InstrumentedCursor để
+    đo thời gian truy vấn (xem config/query_stats.py), trừ khi đã tắt bằng
+    DB_QUERY_STATS=0.
+    """
+
+    def __init__(self, pool, raw, connect_ms=0.0):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+        self._connect_ms = connect_ms
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if not QueryStats.ENABLED:
+            return cursor
+        cursor = InstrumentedCursor(cursor, self)
+        self._cursors.append(cursor)
+        return cursor
+
+    def take_connect_ms(self):
+        """Thời gian lấy kết nối từ pool, chỉ tính cho truy vấn đầu tiên"""
+        connect_ms, self._connect_ms = self._connect_ms, 0.0
+        return connect_ms
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            # Kết thúc bản ghi của các cursor chưa đóng
+            for cursor in self._cursors:
+                cursor._finish()
+            self._cursors = []
+            self._pool.release(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class ConnectionPool:
+    """Pool kết nối MySQL dùng chung, an toàn đa luồng"""
+
+    def __init__(self, factory, size=5, timeout=10, ping_interval=30):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._last_used = {}
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def acquire(self, timeout=None):
+        """Mượn một kết nối; trả về None nếu không thể kết nối hoặc hết thời gian chờ"""
+        timeout = self.timeout if timeout is None else timeout
+        acquire_start = time.perf_counter()
+        reused = True
+        try:
+            raw = self._idle.get_nowait()
+            self._count('hits')
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                self._count('misses')
+                reused = False
+                raw = self._open()
+                if raw is None:
+                    return None
+            else:
+                # Pool đã đầy: chờ một kết nối được trả về
+                start = time.perf_counter()
+                try:
+                    raw = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raw = None
+                waited = time.perf_counter() - start
+                with self._lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time_total'] += waited
+                    self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+                    if raw is None:
+                        self._stats['timeouts'] += 1
+                if raw is None:
+                    print(f"[WARNING] Hết thời gian chờ kết nối từ pool ({timeout}s)")
+                    return None
+                self._count('hits')
+
+        if reused and not self._is_healthy(raw):
+            self._count('health_check_failures')
+            self._discard(raw)
+            with self._lock:
+                self._created += 1
+            raw = self._open()
+            if raw is None:
+                return None
+        return PooledConnection(self, raw, (time.perf_counter() - acquire_start) * 1000)
+
+    def release(self, raw):
+        """Trả kết nối về pool, huỷ giao dịch còn dở nếu có"""
+        try:
+            if getattr(raw, 'unread_result', False):
+                raw.consume_results()
+            if getattr(raw, 'in_transaction', False):
+                raw.rollback()
+        except Exception as e:
+            print(f"[WARNING] Kết nối lỗi khi trả về pool, sẽ bị huỷ: {e}")
+            self._discard(raw)
+            return
+        self._last_used[id(raw)] = time.monotonic()
+        self._idle.put(raw)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._created
+        stats['idle'] = self._idle.qsize()
+        stats['in_use'] = stats['open'] - stats['idle']
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+    def close_all(self):
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(raw)
+
+    def _open(self):
+        raw = self.factory()
+        if raw is None:
+            with self._lock:
+                self._created -= 1
+        return raw
+
+    def _is_healthy(self, raw):
+        """Kiểm tra kết nối trước khi cho mượn; chỉ ping server khi kết nối đã rảnh lâu"""
+        last_used = self._last_used.get(id(raw))
+        if last_used is not None and time.monotonic() - last_used < self.ping_interval:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, raw):
+        self._last_used.pop(id(raw), None)
+        with self._lock:
+            self._created -= 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
 class DatabaseConfig:
     # Database configuration với giá trị mặc định
     # Ưu tiên environment variables, fallback về config cố định
@@ -35,25 +263,25 @@ class DatabaseConfig:
     DATABASE = os.getenv('DB_NAME') or 'halla'
     PORT = int(os.getenv('DB_PORT') or '3306')
 
+    # Backend: 'mysql' (server dùng chung) hoặc 'sqlite' (file cục bộ, không cần server)
+    BACKEND = (os.getenv('DB_BACKEND') or 'mysql').lower()
+    SQLITE_PATH = os.getenv('DB_SQLITE_PATH') or os.path.join('data', 'halla.db')
+
+    # Cấu hình connection pool
+    POOL_SIZE = int(os.getenv('DB_POOL_SIZE') or '5')
+    POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT') or '10')
+    # Kết nối rảnh lâu hơn ngưỡng này sẽ được ping lại trước khi dùng
+    POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL') or '30')
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
     @staticmethod
-    def get_connection():
+    def _create_connection():
+        """Mở một kết nối vật lý mới đến MySQL (hoặc file SQLite khi BACKEND = 'sqlite')"""
+        if DatabaseConfig.BACKEND == 'sqlite':
+            return DatabaseConfig._create_sqlite_connection()
         try:
-            print("\n=== BẮT ĐẦU KẾT NỐI DATABASE ===")
-            print(f"Running from: {sys.executable}")
-            print(f"Is PyInstaller: {hasattr(sys, '_MEIPASS')}")
-            if hasattr(sys, '_MEIPASS'):
-                print(f"PyInstaller temp dir: {sys._MEIPASS}")
-            print(f"Current working directory: {os.getcwd()}")
-            print(f"Thông tin kết nối:")
-            print(f"- Host: {DatabaseConfig.HOST}")
-            print(f"- User: {DatabaseConfig.USER}")
-            print(f"- Database: {DatabaseConfig.DATABASE}")
-            print(f"- Port: {DatabaseConfig.PORT}")
-            print(f"- Password: {'[CÓ]' if DatabaseConfig.PASSWORD else '[TRỐNG]'}")
-            
-            print("\nĐang thử kết nối...")
-            # Thử kết nối với các tùy chọn khác
-            print("Thử kết nối với caching_sha2_password...")
             try:
                 connection = mysql.connector.connect(
                     host=DatabaseConfig.HOST,
@@ -81,23 +309,25 @@ class DatabaseConfig:
                     charset='utf8mb4',
                     collation='utf8mb4_unicode_ci'
                 )
-            
-            print("\nĐang kiểm tra trạng thái kết nối...")
+
             if connection.is_connected():
-                print("Đã kết nối thành công đến MySQL Server")
-                cursor = connection.cursor()
-                cursor.execute("SELECT VERSION()")
-                version = cursor.fetchone()
-                print(f"MySQL Server version: {version[0]}")
-                cursor.close()
-                print("=== KẾT NỐI DATABASE THÀNH CÔNG ===\n")
+                print(f"[INFO] Đã mở kết nối MySQL mới: "
+                      f"{DatabaseConfig.USER}@{DatabaseConfig.HOST}:{DatabaseConfig.PORT}/{DatabaseConfig.DATABASE}")
                 return connection
-            else:
-                print("=== KẾT NỐI DATABASE THẤT BẠI: Không thể xác nhận kết nối ===\n")
-                return None
-                
+            print("=== KẾT NỐI DATABASE THẤT BẠI: Không thể xác nhận kết nối ===\n")
+            return None
+
         except mysql.connector.Error as err:
             print("\n=== LỖI KẾT NỐI MYSQL ===")
+            print(f"Running from: {sys.executable}")
+            print(f"Is PyInstaller: {hasattr(sys, '_MEIPASS')}")
+            print(f"Current working directory: {os.getcwd()}")
+            print(f"Thông tin kết nối:")
+            print(f"- Host: {DatabaseConfig.HOST}")
+            print(f"- User: {DatabaseConfig.USER}")
+            print(f"- Database: {DatabaseConfig.DATABASE}")
+            print(f"- Port: {DatabaseConfig.PORT}")
+            print(f"- Password: {'[CÓ]' if DatabaseConfig.PASSWORD else '[TRỐNG]'}")
             print(f"Error Code: {err.errno}")
             print(f"Error Message: {err.msg}")
             print(traceback.format_exc())
@@ -110,10 +340,74 @@ class DatabaseConfig:
             print("=== KẾT THÚC BÁO LỖI ===\n")
             return None
 
+    @staticmethod
+    def _create_sqlite_connection():
+        try:
+            connection = sqlite_backend.connect(DatabaseConfig.SQLITE_PATH)
+            print(f"[INFO] Đã mở kết nối SQLite mới: {DatabaseConfig.SQLITE_PATH}")
+            return connection
+        except (sqlite3.Error, OSError) as e:
+            print(f"\n=== LỖI KẾT NỐI SQLITE ===\nFile: {DatabaseConfig.SQLITE_PATH}\nError: {e}\n")
+            return None
+
+    @staticmethod
+    def get_pool():
+        """Lấy connection pool dùng chung cho toàn bộ tiến trình"""
+        if DatabaseConfig._pool is None:
+            with DatabaseConfig._pool_lock:
+                if DatabaseConfig._pool is None:
+                    DatabaseConfig._pool = ConnectionPool(
+                        DatabaseConfig._create_connection,
+                        size=DatabaseConfig.POOL_SIZE,
+                        timeout=DatabaseConfig.POOL_TIMEOUT,
+                        ping_interval=DatabaseConfig.POOL_PING_INTERVAL
+                    )
+        return DatabaseConfig._pool
+
+    @staticmethod
+    def get_connection():
+        """Lấy một kết nối từ pool.
+
+        Gọi close() trên kết nối trả về sẽ trả nó lại pool thay vì đóng socket.
+        Trả về None nếu không thể kết nối.
+        """
+        return DatabaseConfig.get_pool().acquire()
+
+    @staticmethod
+    @contextmanager
+    def connection():
+        """Context manager: lấy kết nối từ pool và tự trả lại khi ra khỏi khối with"""
+        conn = DatabaseConfig.get_connection()
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                conn.close()
+
+    @staticmethod
+    def get_pool_stats():
+        """Thống kê pool: hit/miss, thời gian chờ, số kết nối đang dùng"""
+        return DatabaseConfig.get_pool().stats()
+
+    @staticmethod
+    def close_pool():
+        """Đóng toàn bộ kết nối trong pool (gọi khi thoát ứng dụng)"""
+        with DatabaseConfig._pool_lock:
+            pool = DatabaseConfig._pool
+            DatabaseConfig._pool = None
+        if pool is not None:
+            pool.close_all()
+
     def init_database(self):
         """Khởi tạo các bảng trong database nếu chưa tồn tại"""
         connection = self.get_connection()
-        if connection:
+        if connection and DatabaseConfig.BACKEND == 'sqlite':
+            try:
+                self.migrate(connection)
+                print("Khởi tạo database thành công!")
+            finally:
+                connection.close()
+        elif connection:
             try:
                 cursor = connection.cursor()
                 
@@ -123,6 +417,8 @@ class DatabaseConfig:
                         id INT PRIMARY KEY AUTO_INCREMENT,
                         name VARCHAR(100) NOT NULL,
                         description TEXT,
+                        image_path VARCHAR(255),
+                        template_path VARCHAR(255),
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
@@ -134,8 +430,10 @@ class DatabaseConfig:
                         model_id INT,
                         name VARCHAR(100) NOT NULL,
                         unit VARCHAR(50),
+                        description TEXT,
                         min_value FLOAT,
                         max_value FLOAT,
+                        INDEX idx_parameters_model_name (model_id, name),
                         FOREIGN KEY (model_id) REFERENCES models(id)
                     )
                 """)
@@ -144,14 +442,34 @@ class DatabaseConfig:
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS measurements (
                         id INT PRIMARY KEY AUTO_INCREMENT,
+                        model_id INT,
                         parameter_id INT,
                         value FLOAT NOT NULL,
                         device_id VARCHAR(100),
+                        product_id INT,
+                        client_key CHAR(36),
                         measured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE KEY uq_measurements_client_key (client_key),
+                        INDEX idx_measurements_product (product_id),
+                        INDEX idx_measurements_param_time (parameter_id, measured_at),
+                        INDEX idx_measurements_measured_at (measured_at),
+                        INDEX idx_measurements_param_id (parameter_id, id),
                         FOREIGN KEY (parameter_id) REFERENCES parameters(id)
                     )
                 """)
 
+                # Tạo bảng products - mỗi lần đo một sản phẩm (gồm nhiều thông số)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS products (
+                        id INT PRIMARY KEY AUTO_INCREMENT,
+                        model_id INT,
+                        client_key CHAR(36),
+                        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE KEY uq_products_client_key (client_key),
+                        INDEX idx_products_model (model_id, id)
+                    )
+                """)
+
                 # Tạo bảng templates
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS templates (
@@ -163,10 +481,271 @@ class DatabaseConfig:
                 """)
 
                 connection.commit()
+
+                self.migrate(connection)
                 print("Khởi tạo database thành công!")
-            except Error as e:
+            except DatabaseError as e:
                 print(f"Lỗi khởi tạo database: {e}")
             finally:
                 if connection.is_connected():
                     cursor.close()
-                    connection.close() 
\ No newline at end of file
+                    connection.close()
+
+    @staticmethod
+    def _column_exists(cursor, table, column):
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+        return cursor.fetchone()[0] > 0
+
+    @staticmethod
+    def _index_exists(cursor, table, index):
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, index))
+        return cursor.fetchone()[0] > 0
+
+    def applied_migrations(self, connection):
+        """Các phiên bản schema đã áp dụng"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255),
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("SELECT version FROM schema_migrations")
+            return set(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def migrate(self, connection):
+        """Áp dụng lần lượt các migration chưa chạy (ghi lại vào bảng schema_migrations).
+
+        Mỗi migration tự kiểm tra cột/index đã có hay chưa nên database tạo
+        bằng init_database (đã đủ schema) cũng chỉ được đánh dấu phiên bản.
+        Dừng ở migration lỗi đầu tiên; trả về True nếu schema đã mới nhất.
+        Với SQLite, schema mới nhất (sqlite_backend.SCHEMA) được tạo một lần và
+        mọi migration được đánh dấu là đã áp dụng.
+        """
+        if DatabaseConfig.BACKEND == 'sqlite':
+            try:
+                sqlite_backend.init_schema(connection, MIGRATIONS)
+                return True
+            except sqlite3.Error as e:
+                print(f"Lỗi khởi tạo schema SQLite: {e}")
+                return False
+
+        try:
+            applied = self.applied_migrations(connection)
+        except DatabaseError as e:
+            print(f"Lỗi khi đọc bảng schema_migrations: {e}")
+            return False
+
+        for version, description, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"[INFO] Migration {version}: {description}...")
+            cursor = connection.cursor()
+            try:
+                migration(self, cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                connection.commit()
+            except DatabaseError as e:
+                connection.rollback()
+                print(f"Lỗi khi chạy migration {version} ({description}): {e}")
+                return False
+            finally:
+                cursor.close()
+        return True
+
+    def _migrate_products(self, cursor):
+        """Thêm bảng products, cột measurements.product_id và gán sản phẩm cho dữ liệu cũ.
+
+        Dữ liệu cũ không có product_id: các measurement cùng model và cùng thời
+        điểm (tới giây) được coi là một sản phẩm, giống cách nhóm trước đây.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                model_id INT,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_products_model (model_id, id)
+            )
+        """)
+        if not self._column_exists(cursor, 'measurements', 'product_id'):
+            print("[INFO] Thêm cột measurements.product_id...")
+            cursor.execute("""
+                ALTER TABLE measurements
+                ADD COLUMN product_id INT NULL,
+                ADD INDEX idx_measurements_product (product_id)
+            """)
+
+        created, assigned = DatabaseConfig.backfill_products(cursor)
+        if created > 0:
+            print(f"[INFO] Đã gán {assigned} measurement cũ vào {created} sản phẩm")
+
+    @staticmethod
+    def backfill_products(cursor):
+        """Tạo sản phẩm cho các measurement chưa có product_id (cùng model, cùng thời điểm).
+
+        Dùng cho migration và khi khôi phục bản sao lưu cũ không có bảng products;
+        không commit. Trả về (số sản phẩm tạo mới, số measurement được gán).
+        """
+        # Chỉ ghép với các sản phẩm tạo ra trong lần backfill này
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM products")
+        last_product_id = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO products (model_id, started_at)
+            SELECT p.model_id, m.measured_at
+            FROM measurements m
+            JOIN parameters p ON m.parameter_id = p.id
+            WHERE m.product_id IS NULL
+            GROUP BY p.model_id, m.measured_at
+            ORDER BY m.measured_at
+        """)
+        created = cursor.rowcount
+        if DatabaseConfig.BACKEND == 'sqlite':
+            # SQLite không có UPDATE ... JOIN
+            cursor.execute("""
+                UPDATE measurements SET product_id = (
+                    SELECT pr.id
+                    FROM parameters p
+                    JOIN products pr ON pr.model_id = p.model_id
+                    WHERE p.id = measurements.parameter_id
+                      AND pr.started_at = measurements.measured_at AND pr.id > %s
+                )
+                WHERE product_id IS NULL
+            """, (last_product_id,))
+        else:
+            cursor.execute("""
+                UPDATE measurements m
+                JOIN parameters p ON m.parameter_id = p.id
+                JOIN products pr ON pr.model_id = p.model_id AND pr.started_at = m.measured_at
+                SET m.product_id = pr.id
+                WHERE m.product_id IS NULL AND pr.id > %s
+            """, (last_product_id,))
+        return created, cursor.rowcount
+
+    def _migrate_client_keys(self, cursor):
+        """Thêm cột client_key (UNIQUE) cho products/measurements.
+
+        client_key do máy đo sinh ra khi ghi vào nhật ký cục bộ, giúp việc ghi
+        lại sau khi mất kết nối không tạo bản sao. Dữ liệu cũ để NULL.
+        """
+        for table in ('products', 'measurements'):
+            if not self._column_exists(cursor, table, 'client_key'):
+                print(f"[INFO] Thêm cột {table}.client_key...")
+                cursor.execute(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN client_key CHAR(36) NULL,
+                    ADD UNIQUE KEY uq_{table}_client_key (client_key)
+                """)
+
+    def _migrate_manager_columns(self, cursor):
+        """Thêm các cột mà ModelManager/MeasurementManager đang ghi nhưng bảng cũ chưa có"""
+        columns = [
+            ('models', 'image_path', 'VARCHAR(255) NULL'),
+            ('models', 'template_path', 'VARCHAR(255) NULL'),
+            ('parameters', 'description', 'TEXT NULL'),
+            ('measurements', 'model_id', 'INT NULL'),
+        ]
+        for table, column, definition in columns:
+            if not self._column_exists(cursor, table, column):
+                print(f"[INFO] Thêm cột {table}.{column}...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        # Dữ liệu cũ: lấy model_id theo thông số
+        cursor.execute("""
+            UPDATE measurements m
+            JOIN parameters p ON m.parameter_id = p.id
+            SET m.model_id = p.model_id
+            WHERE m.model_id IS NULL
+        """)
+
+    def _migrate_query_indexes(self, cursor):
+        """Index cho các truy vấn thường dùng của dashboard/báo cáo.
+
+        - measurements(parameter_id, measured_at): get_measurement_data (lọc theo
+          thông số + khoảng thời gian, sắp theo thời gian)
+        - measurements(measured_at): get_latest_measurements, get_measurement_summary
+        - parameters(model_id, name): get_parameters_by_model (ORDER BY name)
+        - products(model_id, id): get_total_product, lịch sử theo model
+        Index đơn do FOREIGN KEY tự tạo bị xoá khi đã có index ghép thay thế.
+        """
+        indexes = [
+            ('measurements', 'idx_measurements_param_time', '(parameter_id, measured_at)', 'parameter_id'),
+            ('measurements', 'idx_measurements_measured_at', '(measured_at)', None),
+            ('parameters', 'idx_parameters_model_name', '(model_id, name)', 'model_id'),
+            ('products', 'idx_products_model', '(model_id, id)', None),
+        ]
+        for table, index, columns, redundant in indexes:
+            if not self._index_exists(cursor, table, index):
+                print(f"[INFO] Tạo index {table}.{index}...")
+                cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} {columns}")
+            if redundant and self._index_exists(cursor, table, redundant):
+                cursor.execute(f"ALTER TABLE {table} DROP INDEX {redundant}")
+
+    def _migrate_series_index(self, cursor):
+        """Index measurements(parameter_id, id) cho biểu đồ cập nhật tăng dần (id > id cuối đã có)"""
+        if not self._index_exists(cursor, 'measurements', 'idx_measurements_param_id'):
+            print("[INFO] Tạo index measurements.idx_measurements_param_id...")
+            cursor.execute("ALTER TABLE measurements ADD INDEX idx_measurements_param_id (parameter_id, id)")
+
+    def _migrate_catalog_version(self, cursor):
+        """Bảng catalog_version (một dòng): tăng mỗi khi models/parameters thay đổi.
+
+        ModelCatalog đọc version để biết danh mục đã bị sửa từ máy khác hay chưa.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                id TINYINT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("INSERT IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
+
+    @staticmethod
+    def find_full_scans(connection, queries, min_rows=1000):
+        """Chạy EXPLAIN cho từng truy vấn, trả về các bước quét toàn bảng.
+
+        queries: danh sách (tên, sql, params). Bước có type = ALL và ước lượng
+        từ min_rows dòng trở lên được coi là full scan (bảng nhỏ như models bỏ qua).
+        Trả về danh sách dict: query, table, rows, extra.
+        """
+        full_scans = []
+        cursor = connection.cursor(dictionary=True)
+        try:
+            for name, sql, params in queries:
+                cursor.execute("EXPLAIN " + sql, params)
+                for step in cursor.fetchall():
+                    rows = step.get('rows') or 0
+                    if step.get('type') == 'ALL' and rows >= min_rows:
+                        full_scans.append({
+                            'query': name,
+                            'table': step.get('table'),
+                            'rows': rows,
+                            'extra': step.get('Extra'),
+                        })
+        finally:
+            cursor.close()
+        return full_scans
+
+
+# Danh sách migration theo thứ tự phiên bản: (version, mô tả, hàm(db_config, cursor)).
+# Chỉ thêm vào cuối, không sửa migration đã phát hành. Migration mới cũng phải
+# được phản ánh trong sqlite_backend.SCHEMA (backend SQLite tạo thẳng schema cuối).
+MIGRATIONS = [
+    (1, "Bảng products và cột measurements.product_id", DatabaseConfig._migrate_products),
+    (2, "Cột client_key cho products/measurements", DatabaseConfig._migrate_client_keys),
+    (3, "Cột image_path/template_path/description/model_id", DatabaseConfig._migrate_manager_columns),
+    (4, "Index cho các truy vấn dashboard", DatabaseConfig._migrate_query_indexes),
+    (5, "Index cho biểu đồ theo thông số", DatabaseConfig._migrate_series_index),
+    (6, "Bảng catalog_version cho cache model/thông số", DatabaseConfig._migrate_catalog_version),
+]
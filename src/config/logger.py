@@ -0,0 +1,31 @@
+"""Logger phân cấp dùng chung cho các thông báo chẩn đoán (thay cho print debug).
+
+Mức log lấy từ biến môi trường LOG_LEVEL (DEBUG/INFO/WARNING/ERROR, mặc định
+INFO). logger.debug("... %s", x) chỉ định dạng thông điệp khi mức DEBUG đang
+bật, nên trên đường xử lý nóng gần như không tốn gì khi tắt; thông điệp tốn
+công tạo thì kiểm tra logger.isEnabledFor(logging.DEBUG) trước.
+"""
+import logging
+import os
+import sys
+
+LOG_LEVEL = (os.getenv('LOG_LEVEL') or 'INFO').upper()
+ROOT_LOGGER = 'halla'
+
+
+def _configure():
+    root = logging.getLogger(ROOT_LOGGER)
+    if not root.handlers:
+        # Cùng định dạng "[INFO] ..." với các thông báo print còn lại
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+    return root
+
+
+def get_logger(name):
+    """Logger con 'halla.<name>' (vd. get_logger('ui.dashboard'))"""
+    _configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,286 @@
+"""Đo thời gian mọi truy vấn của các manager (đi qua connection pool).
+
+PooledConnection.cursor() trả về InstrumentedCursor bọc cursor gốc (MySQL hoặc
+SQLite). Mỗi lệnh execute/executemany sinh một bản ghi gồm:
+- dấu vân tay SQL (khoảng trắng gộp lại, literal/%s thay bằng ?, danh sách
+  (?, ?, ...) gộp thành (?+)) để gom các lần chạy cùng một câu lệnh;
+- số tham số, số dòng trả về (số dòng đã fetch, hoặc rowcount với lệnh ghi);
+- thời gian lấy kết nối từ pool (chỉ tính cho lệnh đầu tiên trên kết nối),
+  thời gian execute và thời gian fetch;
+- thao tác đã gọi truy vấn: QueryStats.action(), tác vụ nền của
+  AsyncTaskRunner (<widget>.<khoá>), hàm giao diện gần nhất trên stack, hoặc
+  tên luồng (vd. MeasurementWriter).
+
+QueryStats giữ WINDOW truy vấn gần nhất để tổng hợp theo thao tác + dấu vân
+tay (ui/query_stats_dialog.py). Truy vấn chậm hơn DB_SLOW_QUERY_MS được ghi vào
+logger 'halla.sql' (và file DB_SLOW_QUERY_LOG nếu có). DB_QUERY_STATS=0 tắt
+hoàn toàn việc đo: pool trả về cursor gốc.
+"""
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    from config.logger import get_logger
+except ImportError:
+    try:
+        from src.config.logger import get_logger
+    except ImportError:
+        from .logger import get_logger
+
+logger = get_logger('sql')
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_UI_DIR = os.sep + 'ui' + os.sep
+
+
+@lru_cache(maxsize=512)
+def fingerprint(sql):
+    """Dạng chuẩn hoá của câu lệnh SQL để gom các lần chạy với tham số khác nhau"""
+    text = _WHITESPACE.sub(' ', sql).strip()
+    text = _LITERALS.sub('?', text)
+    return _VALUE_LISTS.sub('(?+)', text)
+
+
+def _ui_caller():
+    """Hàm giao diện (trong thư mục ui/) gần nhất trên stack của luồng hiện tại"""
+    frame = sys._getframe(3)
+    depth = 0
+    while frame is not None and depth < 40:
+        code = frame.f_code
+        if _UI_DIR in code.co_filename:
+            return getattr(code, 'co_qualname', code.co_name)
+        frame = frame.f_back
+        depth += 1
+    return None
+
+
+class QueryStats:
+    ENABLED = (os.getenv('DB_QUERY_STATS') or '1') != '0'
+    SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS') or '200')
+    SLOW_QUERY_LOG = os.getenv('DB_SLOW_QUERY_LOG') or None
+    # Số truy vấn gần nhất dùng cho bảng thống kê
+    WINDOW = int(os.getenv('QUERY_STATS_WINDOW') or '2000')
+
+    _records = deque(maxlen=WINDOW)
+    _slow = deque(maxlen=200)
+    _totals = {'queries': 0, 'slow': 0, 'errors': 0}
+    _lock = threading.Lock()
+    _action = contextvars.ContextVar('query_action', default=None)
+    _log_file_handler = None
+
+    @staticmethod
+    @contextmanager
+    def action(name):
+        """Gắn tên thao tác cho mọi truy vấn chạy trong khối with (trên luồng hiện tại)"""
+        token = QueryStats._action.set(name)
+        try:
+            yield
+        finally:
+            QueryStats._action.reset(token)
+
+    @staticmethod
+    def current_action():
+        action = QueryStats._action.get()
+        if action:
+            return action
+        return _ui_caller() or threading.current_thread().name
+
+    @staticmethod
+    def record(record):
+        """Lưu một truy vấn đã xong; ghi log nếu chậm hơn SLOW_QUERY_MS"""
+        slow = record['total_ms'] >= QueryStats.SLOW_QUERY_MS
+        with QueryStats._lock:
+            QueryStats._records.append(record)
+            QueryStats._totals['queries'] += 1
+            if record['error']:
+                QueryStats._totals['errors'] += 1
+            if slow:
+                QueryStats._totals['slow'] += 1
+                QueryStats._slow.append(record)
+        if slow:
+            QueryStats._log_slow(record)
+
+    @staticmethod
+    def _log_slow(record):
+        if QueryStats.SLOW_QUERY_LOG and QueryStats._log_file_handler is None:
+            handler = logging.FileHandler(QueryStats.SLOW_QUERY_LOG, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            logger.addHandler(handler)
+            QueryStats._log_file_handler = handler
+        logger.warning(
+            "Truy vấn chậm %.1f ms (kết nối %.1f / execute %.1f / fetch %.1f ms, %d dòng, %d tham số) [%s] %s",
+            record['total_ms'], record['connect_ms'], record['execute_ms'], record['fetch_ms'],
+            record['rows'], record['params'], record['action'], record['fingerprint']
+        )
+
+    @staticmethod
+    def snapshot():
+        """Tổng hợp các truy vấn trong cửa sổ theo (thao tác, dấu vân tay), chậm nhất (tổng thời gian) trước"""
+        with QueryStats._lock:
+            records = list(QueryStats._records)
+        groups = {}
+        for record in records:
+            key = (record['action'], record['fingerprint'])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    'action': record['action'], 'fingerprint': record['fingerprint'],
+                    'count': 0, 'errors': 0, 'rows': 0, 'params': 0,
+                    'connect_ms': 0.0, 'execute_ms': 0.0, 'fetch_ms': 0.0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'last_at': 0.0,
+                }
+            group['count'] += 1
+            group['errors'] += 1 if record['error'] else 0
+            for field in ('rows', 'params', 'connect_ms', 'execute_ms', 'fetch_ms', 'total_ms'):
+                group[field] += record[field]
+            group['max_ms'] = max(group['max_ms'], record['total_ms'])
+            group['last_at'] = max(group['last_at'], record['at'])
+        result = []
+        for group in groups.values():
+            count = group['count']
+            group['avg_ms'] = group['total_ms'] / count
+            for field in ('rows', 'params', 'connect_ms', 'execute_ms', 'fetch_ms'):
+                group[f'avg_{field}'] = group[field] / count
+            result.append(group)
+        return sorted(result, key=lambda g: g['total_ms'], reverse=True)
+
+    @staticmethod
+    def slow_queries():
+        """Các truy vấn chậm gần nhất, mới nhất trước"""
+        with QueryStats._lock:
+            return list(reversed(QueryStats._slow))
+
+    @staticmethod
+    def totals():
+        with QueryStats._lock:
+            totals = dict(QueryStats._totals)
+            totals['window'] = len(QueryStats._records)
+        return totals
+
+    @staticmethod
+    def reset():
+        with QueryStats._lock:
+            QueryStats._records.clear()
+            QueryStats._slow.clear()
+            for key in QueryStats._totals:
+                QueryStats._totals[key] = 0
+
+
+class InstrumentedCursor:
+    """Cursor bọc cursor gốc, đo thời gian execute/fetch và số dòng của từng lệnh.
+
+    Bản ghi của một lệnh kết thúc khi cursor chạy lệnh tiếp theo, khi đóng
+    cursor hoặc khi kết nối được trả về pool.
+    """
+
+    def __init__(self, raw, connection):
+        self._raw = raw
+        self._connection = connection
+        self._record = None
+
+    def _begin(self, sql, params):
+        self._finish()
+        self._record = {
+            'fingerprint': fingerprint(sql),
+            'action': QueryStats.current_action(),
+            'params': params,
+            'rows': 0,
+            'connect_ms': self._connection.take_connect_ms(),
+            'execute_ms': 0.0,
+            'fetch_ms': 0.0,
+            'error': None,
+            'at': time.time(),
+        }
+        return self._record
+
+    def _finish(self):
+        record = self._record
+        if record is None:
+            return
+        self._record = None
+        record['total_ms'] = record['connect_ms'] + record['execute_ms'] + record['fetch_ms']
+        QueryStats.record(record)
+
+    def _executed(self, record, start, error):
+        record['execute_ms'] = (time.perf_counter() - start) * 1000
+        if error is not None:
+            record['error'] = str(error)
+            self._finish()
+        elif self._raw.description is None:
+            # Lệnh ghi: số dòng bị ảnh hưởng
+            record['rows'] = max(self._raw.rowcount or 0, 0)
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        record = self._begin(sql, len(params) if params else 0)
+        start = time.perf_counter()
+        try:
+            result = self._raw.execute(sql, params, *args, **kwargs)
+        except Exception as e:
+            self._executed(record, start, e)
+            raise
+        self._executed(record, start, None)
+        return result
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        if not isinstance(seq_params, (list, tuple)):
+            seq_params = list(seq_params)
+        record = self._begin(sql, sum(len(params) for params in seq_params))
+        start = time.perf_counter()
+        try:
+            result = self._raw.executemany(sql, seq_params, *args, **kwargs)
+        except Exception as e:
+            self._executed(record, start, e)
+            raise
+        self._executed(record, start, None)
+        return result
+
+    def _fetched(self, start, rows):
+        record = self._record
+        if record is not None:
+            record['fetch_ms'] += (time.perf_counter() - start) * 1000
+            record['rows'] += rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._raw.fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self._raw.fetchmany(*args, **kwargs)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._raw.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
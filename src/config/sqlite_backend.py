@@ -0,0 +1,317 @@
+"""Backend SQLite nhúng (DB_BACKEND=sqlite) cho máy đo chạy độc lập, không cần MySQL.
+
+SQLiteConnection/SQLiteCursor có cùng giao diện với phần mysql-connector mà các
+manager đang dùng (cursor(dictionary=True), placeholder %s, lastrowid,
+start_transaction, ping...), nên toàn bộ SQL trong models/ chạy được trên cả hai
+backend. Các cú pháp riêng của MySQL được dịch trong translate():
+- %s -> ?, INSERT IGNORE -> INSERT OR IGNORE;
+- INSERT ... ON DUPLICATE KEY UPDATE (chỉ dùng cho cột client_key UNIQUE) ->
+  INSERT OR IGNORE; dạng "id = LAST_INSERT_ID(id)" trả về id của dòng đã có
+  qua lastrowid như MySQL;
+- SET FOREIGN_KEY_CHECKS = 0/1 -> PRAGMA foreign_keys = OFF/ON (cùng phạm vi
+  phiên, phải gọi ngoài transaction như ở BackupManager), các lệnh SET khác bị bỏ qua;
+- STDDEV_SAMP là hàm aggregate đăng ký thêm.
+
+Database dùng WAL: đọc không chặn ghi, mỗi kết nối của pool là một kết nối
+SQLite riêng. Schema (SCHEMA) là schema MySQL sau mọi migration trong
+config/database.py; khi thêm migration phải cập nhật cả SCHEMA.
+"""
+import math
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS models (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        image_path VARCHAR(255),
+        template_path VARCHAR(255),
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE TABLE IF NOT EXISTS parameters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model_id INT REFERENCES models(id),
+        name VARCHAR(100) NOT NULL,
+        unit VARCHAR(50),
+        description TEXT,
+        min_value FLOAT,
+        max_value FLOAT
+    );
+    CREATE INDEX IF NOT EXISTS idx_parameters_model_name ON parameters (model_id, name);
+    CREATE TABLE IF NOT EXISTS measurements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model_id INT,
+        parameter_id INT REFERENCES parameters(id),
+        value FLOAT NOT NULL,
+        device_id VARCHAR(100),
+        product_id INT,
+        client_key CHAR(36) UNIQUE,
+        measured_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_measurements_product ON measurements (product_id);
+    CREATE INDEX IF NOT EXISTS idx_measurements_param_time ON measurements (parameter_id, measured_at);
+    CREATE INDEX IF NOT EXISTS idx_measurements_measured_at ON measurements (measured_at);
+    CREATE INDEX IF NOT EXISTS idx_measurements_param_id ON measurements (parameter_id, id);
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model_id INT,
+        client_key CHAR(36) UNIQUE,
+        started_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_products_model ON products (model_id, id);
+    CREATE TABLE IF NOT EXISTS templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(100) NOT NULL,
+        file_path VARCHAR(255) NOT NULL,
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id TINYINT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    );
+    INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(255),
+        applied_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+"""
+
+
+def _parse_timestamp(value):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+# Cột khai báo TIMESTAMP/DATETIME/DATE trả về datetime/date như mysql-connector
+sqlite3.register_converter('TIMESTAMP', _parse_timestamp)
+sqlite3.register_converter('DATETIME', _parse_timestamp)
+sqlite3.register_converter('DATE', _parse_date)
+
+
+class _StdDevSamp:
+    """STDDEV_SAMP của MySQL (độ lệch chuẩn mẫu, NULL khi ít hơn 2 giá trị)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        if self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+_ON_DUPLICATE = re.compile(r"\s+ON\s+DUPLICATE\s+KEY\s+UPDATE\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_INSERT = re.compile(r"^\s*INSERT\s+(?:IGNORE\s+)?INTO\s+(\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+_SET_STATEMENT = re.compile(r"^\s*SET\s+(\w+)\s*=\s*(\S+)\s*$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def translate(sql):
+    """Dịch câu lệnh MySQL sang SQLite.
+
+    Trả về (sql, existing_id_lookup); sql là None nếu lệnh không có tác dụng trên
+    SQLite. existing_id_lookup là (bảng, vị trí tham số client_key) khi lệnh cần
+    trả về id của dòng đã có (ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)).
+    """
+    setting = _SET_STATEMENT.match(sql)
+    if setting:
+        if setting.group(1).upper() == 'FOREIGN_KEY_CHECKS':
+            return f"PRAGMA foreign_keys = {'OFF' if setting.group(2) == '0' else 'ON'}", None
+        return None, None
+
+    existing_id_lookup = None
+    duplicate = _ON_DUPLICATE.search(sql)
+    if duplicate:
+        sql = sql[:duplicate.start()]
+        insert = _INSERT.match(sql)
+        if 'LAST_INSERT_ID' in duplicate.group(1).upper() and insert:
+            columns = [c.strip().strip('`') for c in insert.group(2).split(',')]
+            existing_id_lookup = (insert.group(1), columns.index('client_key'))
+        sql = re.sub(r"^\s*INSERT\s+INTO", "INSERT OR IGNORE INTO", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"^\s*INSERT\s+IGNORE\s+INTO", "INSERT OR IGNORE INTO", sql, flags=re.IGNORECASE)
+    return sql.replace('%s', '?').replace('%%', '%'), existing_id_lookup
+
+
+def _adapt(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'item'):
+        # Kiểu số của numpy
+        return value.item()
+    return value
+
+
+def _adapt_params(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return {key: _adapt(value) for key, value in params.items()}
+    return tuple(_adapt(value) for value in params)
+
+
+class SQLiteCursor:
+    """Cursor SQLite với giao diện của mysql-connector (dictionary=True trả về dict)"""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self._dictionary = dictionary
+        self._lastrowid = None
+        self._rowcount = -1
+
+    def execute(self, sql, params=None):
+        sql, existing_id_lookup = translate(sql)
+        self._lastrowid = None
+        if sql is None:
+            self._rowcount = 0
+            return
+        params = _adapt_params(params)
+        self._cursor.execute(sql, params)
+        self._rowcount = self._cursor.rowcount
+        if existing_id_lookup and self._cursor.rowcount == 0:
+            table, key_index = existing_id_lookup
+            self._cursor.execute(f"SELECT id FROM {table} WHERE client_key = ?", (params[key_index],))
+            row = self._cursor.fetchone()
+            self._lastrowid = row[0] if row else None
+
+    def executemany(self, sql, seq_of_params):
+        sql, _ = translate(sql)
+        self._lastrowid = None
+        if sql is None:
+            return
+        self._cursor.executemany(sql, [_adapt_params(params) for params in seq_of_params])
+        self._rowcount = self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._lastrowid if self._lastrowid is not None else self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Kết nối SQLite với giao diện của kết nối mysql-connector (autocommit tắt)"""
+
+    def __init__(self, raw, database):
+        self.raw = raw
+        self.database = database
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def start_transaction(self, **kwargs):
+        # Transaction đọc của SQLite ở chế độ WAL luôn là một snapshot nhất quán
+        if not self.raw.in_transaction:
+            self.raw.execute("BEGIN")
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def consume_results(self):
+        # Cursor SQLite không giữ kết quả chưa đọc trên kết nối
+        pass
+
+    def ping(self, reconnect=False, **kwargs):
+        self.raw.execute("SELECT 1").fetchone()
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self.raw.close()
+
+
+def connect(path, timeout=10, synchronous='NORMAL'):
+    """Mở database SQLite (tạo file nếu chưa có) ở chế độ WAL"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    raw = sqlite3.connect(path, timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                          check_same_thread=False)
+    raw.execute("PRAGMA journal_mode=WAL")
+    raw.execute(f"PRAGMA synchronous={synchronous}")
+    raw.execute("PRAGMA foreign_keys=ON")
+    raw.create_aggregate('STDDEV_SAMP', 1, _StdDevSamp)
+    return SQLiteConnection(raw, path)
+
+
+def init_schema(connection, migrations):
+    """Tạo các bảng còn thiếu và đánh dấu mọi migration là đã áp dụng (SCHEMA đã là bản mới nhất)"""
+    connection.raw.executescript(SCHEMA)
+    connection.raw.executemany(
+        "INSERT OR IGNORE INTO schema_migrations (version, description) VALUES (?, ?)",
+        [(version, description) for version, description, _ in migrations]
+    )
+    connection.commit()
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# Một mẫu đo: thời điểm nhận (time.time()), giá trị và dòng dữ liệu gốc
+Sample = namedtuple('Sample', ['timestamp', 'value', 'raw'])
+
+
+class RingBuffer:
+    """Bộ đệm vòng có giới hạn cho một luồng ghi và một luồng đọc.
+
+    Dựa trên collections.deque(maxlen=...): append/popleft là thao tác nguyên tử
+    nên không cần khoá. Khi đầy, mẫu cũ nhất bị ghi đè và được đếm vào overflows.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._items = deque(maxlen=capacity)
+        self.overflows = 0
+
+    def push(self, item):
+        if len(self._items) >= self.capacity:
+            self.overflows += 1
+        self._items.append(item)
+
+    def drain(self, max_items=None):
+        """Lấy ra (và xoá) các mẫu đang có, cũ nhất trước"""
+        items = []
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(self._items.popleft())
+            except IndexError:
+                break
+        return items
+
+    def latest(self):
+        try:
+            return self._items[-1]
+        except IndexError:
+            return None
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SerialReader(threading.Thread):
+    """Luồng nền đọc liên tục cổng serial và đẩy mẫu vào RingBuffer"""
+
+    # Cửa sổ (giây) dùng để tính tốc độ lấy mẫu
+    RATE_WINDOW = 2.0
+
+    def __init__(self, serial_port, buffer, parser=float, name="SerialReader"):
+        super().__init__(name=name, daemon=True)
+        self.serial_port = serial_port
+        self.buffer = buffer
+        self.parser = parser
+        self._stop_event = threading.Event()
+        self.total_samples = 0
+        self.parse_errors = 0
+        self.last_error = None
+        self.started_at = None
+        self._rate_mark = None
+        self._rate = 0.0
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        self.started_at = time.time()
+        while not self._stop_event.is_set():
+            try:
+                # readline() trả về khi có đủ 1 dòng hoặc hết timeout của cổng
+                line = self.serial_port.readline()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Lỗi khi đọc dữ liệu (luồng nền): {e}")
+                break
+            if not line:
+                continue
+            timestamp = time.time()
+            text = line.decode(errors='replace').strip()
+            if not text:
+                continue
+            try:
+                value = self.parser(text)
+            except ValueError:
+                self.parse_errors += 1
+                continue
+            self.buffer.push(Sample(timestamp, value, text))
+            self.total_samples += 1
+
+    def sample_rate(self):
+        """Tốc độ lấy mẫu (Hz), tính lại mỗi RATE_WINDOW giây theo nhịp gọi của UI"""
+        if self.started_at is None:
+            return 0.0
+        now = time.time()
+        total = self.total_samples
+        mark_time, mark_total = self._rate_mark or (self.started_at, 0)
+        elapsed = now - mark_time
+        if elapsed >= self.RATE_WINDOW:
+            self._rate = (total - mark_total) / elapsed
+            self._rate_mark = (now, total)
+        elif self._rate_mark is None and elapsed > 0:
+            # Chưa đủ một cửa sổ: ước lượng từ lúc bắt đầu
+            self._rate = total / elapsed
+        return self._rate
+
+    def stats(self):
+        return {
+            'running': self.is_alive(),
+            'sample_rate': self.sample_rate(),
+            'total_samples': self.total_samples,
+            'parse_errors': self.parse_errors,
+            'overflows': self.buffer.overflows,
+            'buffered': len(self.buffer),
+            'last_error': self.last_error,
+        }
@@ -4,6 +4,14 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import time
 from datetime import datetime
 
+try:
+    from hardware.acquisition import RingBuffer, SerialReader
+except ImportError:
+    try:
+        from src.hardware.acquisition import RingBuffer, SerialReader
+    except ImportError:
+        from .acquisition import RingBuffer, SerialReader
+
 class HighGaugeDevice(QObject):
     value_received = pyqtSignal(float)
     
@@ -11,6 +19,8 @@ class HighGaugeDevice(QObject):
         super().__init__()
         self.serial = None
         self.connected = False
+        self.buffer = None
+        self.reader = None
     
     @staticmethod
     def list_ports():
@@ -18,9 +28,9 @@ class HighGaugeDevice(QObject):
         return [port.device for port in serial.tools.list_ports.comports()]
     
     def connect(self, port):
-        """Kết nối với thiết bị qua cổng COM"""
+        """Kết nối với thiết bị qua cổng COM (hoặc URL của pyserial, vd. sim:// của thiết bị giả lập)"""
         try:
-            self.serial = serial.Serial(port, 9600, timeout=1)
+            self.serial = serial.serial_for_url(port, 9600, timeout=1)
             self.connected = True
             return True
         except Exception as e:
@@ -30,6 +40,7 @@ class HighGaugeDevice(QObject):
     
     def disconnect(self):
         """Ngắt kết nối với thiết bị"""
+        self.stop_acquisition()
         if self.serial and self.serial.is_open:
             self.serial.close()
         self.connected = False
@@ -88,10 +99,54 @@ class HighGaugeDevice(QObject):
             print(f"Lỗi khi dừng đo: {e}")
             return False
     
+    def start_acquisition(self, buffer_size=4096):
+        """Bắt đầu luồng nền đọc liên tục cổng serial vào bộ đệm vòng"""
+        if not self.connected or not self.serial:
+            return False
+        if self.reader and self.reader.is_alive():
+            return True
+        self.buffer = RingBuffer(buffer_size)
+        self.reader = SerialReader(self.serial, self.buffer, name=f"SerialReader-{self.serial.port}")
+        self.reader.start()
+        return True
+
+    def stop_acquisition(self):
+        """Dừng luồng đọc nền (các mẫu còn trong bộ đệm vẫn đọc được)"""
+        if self.reader:
+            self.reader.stop()
+            self.reader = None
+
+    def is_acquiring(self):
+        return self.reader is not None and self.reader.is_alive()
+
+    def read_samples(self, max_items=None):
+        """Lấy các mẫu (Sample) đã nhận kể từ lần gọi trước, cũ nhất trước"""
+        if self.buffer is None:
+            return []
+        return self.buffer.drain(max_items)
+
+    def acquisition_stats(self):
+        """Tốc độ lấy mẫu, số lần tràn bộ đệm và số dòng lỗi của luồng đọc nền"""
+        if self.reader is None:
+            return None
+        return self.reader.stats()
+
+    def is_device_connected(self):
+        """Kiểm tra trạng thái kết nối"""
+        return bool(self.connected and self.serial and self.serial.is_open)
+
     def read_data(self):
         """Đọc dữ liệu từ thiết bị"""
         if not self.connected or not self.serial:
             return None
+        if self.reader is not None:
+            # Đang đọc nền: lấy mẫu mới nhất trong bộ đệm, không chặn luồng gọi
+            samples = self.read_samples()
+            if not samples:
+                return None
+            value = samples[-1].value
+            self.value_received.emit(value)
+            return value
         try:
             if self.serial.in_waiting:
                 data = self.serial.readline().decode().strip()
@@ -103,4 +158,4 @@ class HighGaugeDevice(QObject):
                     return None
         except Exception as e:
             print(f"Lỗi khi đọc dữ liệu: {e}")
-            return None 
\ No newline at end of file
+            return None
@@ -0,0 +1,124 @@
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from hardware.device import HighGaugeDevice
+except ImportError:
+    try:
+        from src.hardware.device import HighGaugeDevice
+    except ImportError:
+        from .device import HighGaugeDevice
+
+
+class DeviceManager:
+    """Quản lý nhiều thiết bị đo cùng lúc, mỗi thiết bị gắn với một thông số.
+
+    Mỗi thiết bị có cổng serial và luồng đọc nền (SerialReader) riêng nên các
+    thông số của một sản phẩm được đo song song. poll() gom mẫu của mọi thiết bị
+    thành một dòng duy nhất sắp theo thời điểm nhận của từng mẫu, và ghi lại độ
+    trễ từ lúc luồng đọc nhận mẫu tới lúc poll() lấy ra.
+    """
+
+    def __init__(self, device_factory=HighGaugeDevice):
+        self.device_factory = device_factory
+        self.devices = {}    # parameter_id -> HighGaugeDevice
+        self.ports = {}      # parameter_id -> tên cổng
+        self._latency = {}   # parameter_id -> [số mẫu, tổng độ trễ, độ trễ lớn nhất]
+        self._lock = threading.Lock()
+
+    def connect_all(self, mapping):
+        """Mở song song các cổng theo mapping {parameter_id: port}; trả về {parameter_id: True/False}.
+
+        Một cổng chỉ được gắn với một thông số. Thông số đã kết nối sẽ được ngắt trước.
+        """
+        ports = list(mapping.values())
+        duplicates = {port for port in ports if ports.count(port) > 1}
+        if duplicates:
+            raise ValueError(f"Cổng được gán cho nhiều thông số: {', '.join(sorted(duplicates))}")
+        for parameter_id in mapping:
+            self.disconnect(parameter_id)
+        if not mapping:
+            return {}
+
+        # Thiết bị là QObject nên được tạo ở luồng gọi; chỉ việc mở cổng chạy song song
+        pending = [(parameter_id, port, self.device_factory()) for parameter_id, port in mapping.items()]
+
+        def open_device(item):
+            parameter_id, port, device = item
+            return parameter_id, port, device, device.connect(port)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            for parameter_id, port, device, ok in executor.map(open_device, pending):
+                results[parameter_id] = ok
+                if ok:
+                    with self._lock:
+                        self.devices[parameter_id] = device
+                        self.ports[parameter_id] = port
+                else:
+                    print(f"[WARNING] Không thể kết nối thiết bị {port} (thông số {parameter_id})")
+        return results
+
+    def disconnect(self, parameter_id):
+        with self._lock:
+            device = self.devices.pop(parameter_id, None)
+            self.ports.pop(parameter_id, None)
+            self._latency.pop(parameter_id, None)
+        if device:
+            device.disconnect()
+
+    def disconnect_all(self):
+        for parameter_id in list(self.devices):
+            self.disconnect(parameter_id)
+
+    def is_connected(self):
+        return any(device.is_device_connected() for device in self.devices.values())
+
+    def start(self, buffer_size=4096):
+        """Gửi lệnh bắt đầu đo và khởi động luồng đọc nền của mọi thiết bị"""
+        for device in self.devices.values():
+            device.start_measurement()
+            device.start_acquisition(buffer_size)
+
+    def stop(self):
+        for device in self.devices.values():
+            device.stop_acquisition()
+            device.stop_measurement()
+
+    def poll(self):
+        """Các mẫu mới của mọi thiết bị: danh sách (parameter_id, Sample) sắp theo timestamp"""
+        now = time.time()
+        streams = []
+        for parameter_id, device in list(self.devices.items()):
+            samples = device.read_samples()
+            if not samples:
+                continue
+            stats = self._latency.setdefault(parameter_id, [0, 0.0, 0.0])
+            for sample in samples:
+                delay = now - sample.timestamp
+                stats[0] += 1
+                stats[1] += delay
+                stats[2] = max(stats[2], delay)
+            # Mẫu của mỗi thiết bị đã theo thứ tự nhận nên chỉ cần trộn các dòng đã sắp
+            streams.append([(sample.timestamp, parameter_id, sample) for sample in samples])
+        return [(parameter_id, sample) for _, parameter_id, sample in heapq.merge(*streams)]
+
+    def stats(self, reset_latency=True):
+        """Thống kê từng thiết bị: cổng, tốc độ lấy mẫu (mẫu/s), độ trễ trung bình/lớn nhất (ms)...
+
+        Độ trễ tính từ lúc luồng đọc nhận mẫu tới lúc poll() lấy ra, trên các mẫu
+        kể từ lần gọi stats() trước (reset_latency=True).
+        """
+        result = {}
+        for parameter_id, device in list(self.devices.items()):
+            info = dict(device.acquisition_stats() or {})
+            count, total, worst = self._latency.get(parameter_id, (0, 0.0, 0.0))
+            info['port'] = self.ports.get(parameter_id)
+            info['latency_avg_ms'] = total / count * 1000 if count else None
+            info['latency_max_ms'] = worst * 1000 if count else None
+            if reset_latency:
+                self._latency[parameter_id] = [0, 0.0, 0.0]
+            result[parameter_id] = info
+        return result
@@ -11,6 +11,14 @@ except ImportError:
     except ImportError:
         from ..config.database import DatabaseConfig
 
+try:
+    from hardware.acquisition import RingBuffer, SerialReader
+except ImportError:
+    try:
+        from src.hardware.acquisition import RingBuffer, SerialReader
+    except ImportError:
+        from .acquisition import RingBuffer, SerialReader
+
 class HighGaugeDevice(QObject):
     # Signal khi nhận được dữ liệu từ thiết bị
     data_received = pyqtSignal(float)
@@ -26,12 +34,14 @@ class HighGaugeDevice(QObject):
         self.serial_port = None
         self.is_connected = False
         self.is_reading = False
+        self.buffer = None
+        self.reader = None
 
     def connect(self, port, baudrate=9600):
-        """Kết nối với thiết bị qua cổng COM"""
+        """Kết nối với thiết bị qua cổng COM (hoặc URL của pyserial, vd. sim:// của thiết bị giả lập)"""
         try:
-            self.serial_port = serial.Serial(
-                port=port,
+            self.serial_port = serial.serial_for_url(
+                port,
                 baudrate=baudrate,
                 bytesize=serial.EIGHTBITS,
                 parity=serial.PARITY_NONE,
@@ -63,6 +73,7 @@ class HighGaugeDevice(QObject):
         try:
             # Gửi lệnh bắt đầu đo
             self.serial_port.write(b'START\n')
+            self.start_acquisition()
             return True
         except Exception as e:
             self.connection_error.emit(f"Lỗi khi bắt đầu đọc: {str(e)}")
@@ -70,6 +81,7 @@ class HighGaugeDevice(QObject):
 
     def stop_reading(self):
         """Dừng đọc dữ liệu từ thiết bị"""
+        self.stop_acquisition()
         if self.is_connected:
             try:
                 # Gửi lệnh dừng đo
@@ -78,11 +90,50 @@ class HighGaugeDevice(QObject):
                 self.connection_error.emit(f"Lỗi khi dừng đọc: {str(e)}")
         self.is_reading = False
 
+    def start_acquisition(self, buffer_size=4096):
+        """Bắt đầu luồng nền đọc liên tục cổng serial vào bộ đệm vòng"""
+        if not self.is_connected:
+            return False
+        if self.reader and self.reader.is_alive():
+            return True
+        self.buffer = RingBuffer(buffer_size)
+        self.reader = SerialReader(self.serial_port, self.buffer,
+                                   name=f"SerialReader-{self.serial_port.port}")
+        self.reader.start()
+        return True
+
+    def stop_acquisition(self):
+        """Dừng luồng đọc nền (các mẫu còn trong bộ đệm vẫn đọc được)"""
+        if self.reader:
+            self.reader.stop()
+            self.reader = None
+
+    def read_samples(self, max_items=None):
+        """Lấy các mẫu (Sample) đã nhận kể từ lần gọi trước, cũ nhất trước"""
+        if self.buffer is None:
+            return []
+        return self.buffer.drain(max_items)
+
+    def acquisition_stats(self):
+        """Tốc độ lấy mẫu, số lần tràn bộ đệm và số dòng lỗi của luồng đọc nền"""
+        if self.reader is None:
+            return None
+        return self.reader.stats()
+
     def read_data(self):
         """Đọc dữ liệu từ thiết bị"""
         if not self.is_connected or not self.is_reading:
             return None
 
+        if self.reader is not None:
+            # Đang đọc nền: lấy mẫu mới nhất trong bộ đệm, không chặn luồng gọi
+            samples = self.read_samples()
+            if not samples:
+                return None
+            value = samples[-1].value
+            self.data_received.emit(value)
+            return value
+
         try:
             if self.serial_port.in_waiting:
                 data = self.serial_port.readline().decode().strip()
@@ -0,0 +1,142 @@
+"""Cổng serial giả lập trong tiến trình cho pyserial: URL dạng sim://<tên>.
+
+pyserial tìm lớp Serial của giao thức "sim" trong module protocol_sim của các
+package trong serial.protocol_handler_packages; GaugeSimulator
+(hardware/simulator.py) đăng ký package này và tạo kênh theo tên, nên
+HighGaugeDevice.connect("sim://<tên>") nối thẳng tới thiết bị giả lập.
+"""
+import threading
+import time
+
+from serial.serialutil import PortNotOpenError, SerialBase, SerialException, to_bytes
+
+# tên -> (pipe thiết bị -> máy tính, pipe máy tính -> thiết bị)
+CHANNELS = {}
+
+
+class Pipe:
+    """Luồng byte một chiều có giới hạn giữa hai luồng (thread)"""
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.closed = False
+        self._data = bytearray()
+        self._cond = threading.Condition()
+
+    def write(self, data):
+        """Ghi tối đa phần còn chỗ của data (không chặn); trả về số byte đã ghi"""
+        with self._cond:
+            if self.closed:
+                raise SerialException("Thiết bị đã ngắt kết nối")
+            count = min(len(data), self.capacity - len(self._data))
+            if count > 0:
+                self._data += data[:count]
+                self._cond.notify_all()
+            return max(count, 0)
+
+    def read(self, size, timeout=None):
+        """Đọc tối đa size byte, chờ tối đa timeout giây nếu chưa có dữ liệu"""
+        with self._cond:
+            self._wait(lambda: self._data, timeout)
+            data = bytes(self._data[:size])
+            del self._data[:size]
+            return data
+
+    def readline(self, timeout=None):
+        """Đọc tới hết dòng (gồm b'\\n'); hết timeout thì trả về phần đã có"""
+        with self._cond:
+            self._wait(lambda: b'\n' in self._data, timeout)
+            end = self._data.find(b'\n') + 1 or len(self._data)
+            data = bytes(self._data[:end])
+            del self._data[:end]
+            return data
+
+    def _wait(self, ready, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not ready():
+            if self.closed:
+                if not self._data:
+                    raise SerialException("Thiết bị đã ngắt kết nối")
+                return
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            self._cond.wait(remaining)
+
+    def clear(self):
+        with self._cond:
+            self._data.clear()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Serial(SerialBase):
+    """Phía máy tính của kênh sim://; các thông số cổng (baudrate...) được bỏ qua"""
+
+    def open(self):
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        if self._port is None:
+            raise SerialException("Port must be configured before it can be used.")
+        name = self._port.split('://', 1)[-1].strip('/')
+        channel = CHANNELS.get(name)
+        if channel is None:
+            raise SerialException(f"Không có thiết bị giả lập '{name}'")
+        self._rx, self._tx = channel
+        if self._rx.closed:
+            raise SerialException(f"Thiết bị giả lập '{name}' đã ngắt kết nối")
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+        super().close()
+
+    def _reconfigure_port(self):
+        pass
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return len(self._rx)
+
+    def read(self, size=1):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return self._rx.read(size, self._timeout)
+
+    def readline(self, size=-1):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return self._rx.readline(self._timeout)
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+        data = to_bytes(data)
+        written = 0
+        while written < len(data):
+            count = self._tx.write(data[written:])
+            if not count:
+                time.sleep(0.001)
+            written += count
+        return written
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._rx.clear()
+
+    def reset_output_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    @property
+    def out_waiting(self):
+        return 0
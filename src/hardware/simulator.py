@@ -0,0 +1,279 @@
+"""Thiết bị High Gauge giả lập để kiểm thử tải đường thu thập dữ liệu.
+
+Nói cùng giao thức dòng với thiết bị thật (hardware/device.py, high_gauge.py):
+nhận INFO/START/STOP, sau START gửi mỗi giá trị đo trên một dòng. Có thể thêm
+nhiễu, trôi giá trị, dòng rác và ngắt kết nối giữa chừng.
+
+Hai cách nối:
+- pty (Linux/macOS): start_pty() trả về đường dẫn /dev/pts/N, mở bằng
+  HighGaugeDevice.connect() như một cổng COM thật (kể cả từ tiến trình khác);
+- trong tiến trình: start_inprocess() trả về URL sim://<tên> (hardware/protocol_sim.py).
+
+Chạy riêng để có cổng giả cho ứng dụng:
+    python -m src.hardware.simulator --rate 1000 --noise 0.01 --garbage 0.001
+"""
+import itertools
+import os
+import random
+import threading
+import time
+
+import serial
+
+try:
+    from hardware import protocol_sim
+except ImportError:
+    try:
+        from src.hardware import protocol_sim
+    except ImportError:
+        from . import protocol_sim
+
+# Để serial.serial_for_url("sim://...") tìm được protocol_sim
+_HANDLER_PACKAGE = protocol_sim.__name__.rsplit('.', 1)[0]
+if _HANDLER_PACKAGE not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append(_HANDLER_PACKAGE)
+
+# Các dòng rác giống lỗi truyền thường gặp
+GARBAGE_LINES = [b'ERR', b'#@!', b'12.3.4', b'\xff\xfe\xfd', b'-', b'1e', b'OVERLOAD']
+
+_names = itertools.count(1)
+
+
+class _PtyTransport:
+    def __init__(self):
+        import pty
+        import tty
+        self.master, self.slave = pty.openpty()
+        # Không echo, không đổi \n thành \r\n
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+    def read(self, timeout):
+        import select
+        ready, _, _ = select.select([self.master], [], [], timeout)
+        if not ready:
+            return b''
+        try:
+            return os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            return b''
+
+    def write(self, data):
+        try:
+            return os.write(self.master, data)
+        except BlockingIOError:
+            return 0
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class _PipeTransport:
+    def __init__(self, name, capacity):
+        self.name = name
+        self.rx = protocol_sim.Pipe(capacity)  # thiết bị -> máy tính
+        self.tx = protocol_sim.Pipe(capacity)  # máy tính -> thiết bị
+        protocol_sim.CHANNELS[name] = (self.rx, self.tx)
+        self.port = f"sim://{name}"
+
+    def read(self, timeout):
+        try:
+            return self.tx.read(4096, timeout)
+        except serial.SerialException:
+            return b''
+
+    def write(self, data):
+        return self.rx.write(data)
+
+    def close(self):
+        self.rx.close()
+        self.tx.close()
+        protocol_sim.CHANNELS.pop(self.name, None)
+
+
+class GaugeSimulator:
+    """Thiết bị High Gauge giả lập.
+
+    rate: số mẫu/giây (1 Hz tới vài kHz); value, noise, drift: giá trị danh
+    định, độ lệch chuẩn của nhiễu và độ trôi (đơn vị/giây tính từ START);
+    garbage_ratio: tỉ lệ dòng rác; disconnect_after: số giây sau START thì
+    "rút cáp" (None = không). Khi phía máy tính đọc không kịp, dữ liệu chưa
+    gửi vượt quá out_buffer byte thì các mẫu mới bị bỏ (đếm trong dropped),
+    giống tràn bộ đệm UART của thiết bị thật.
+    """
+
+    def __init__(self, rate=100.0, value=10.0, noise=0.01, drift=0.0, garbage_ratio=0.0,
+                 disconnect_after=None, decimals=4, seed=None, out_buffer=65536):
+        self.rate = float(rate)
+        self.value = value
+        self.noise = noise
+        self.drift = drift
+        self.garbage_ratio = garbage_ratio
+        self.disconnect_after = disconnect_after
+        self.decimals = decimals
+        self.out_buffer = out_buffer
+        self.random = random.Random(seed)
+        self.transport = None
+        self.port = None
+        self.streaming = False
+        self.connected = False
+        self.sent = 0
+        self.dropped = 0
+        self.garbage = 0
+        self.commands = []
+        self._started_at = None
+        self._due = 0
+        self._out = bytearray()
+        self._command_buffer = bytearray()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start_pty(self):
+        """Tạo cặp pty; trả về đường dẫn cổng cho HighGaugeDevice.connect()"""
+        return self._start(_PtyTransport())
+
+    def start_inprocess(self, name=None, capacity=65536):
+        """Tạo kênh trong tiến trình; trả về URL sim://<tên> cho HighGaugeDevice.connect()"""
+        return self._start(_PipeTransport(name or f"gauge{next(_names)}", capacity))
+
+    def _start(self, transport):
+        if self._thread is not None:
+            raise RuntimeError("Thiết bị giả lập đã chạy")
+        self.transport = transport
+        self.port = transport.port
+        self.connected = True
+        self._thread = threading.Thread(target=self._run, name=f"GaugeSimulator-{self.port}", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        """Dừng luồng giả lập và đóng cổng"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.disconnect()
+
+    def disconnect(self):
+        """Giả lập rút cáp: phía máy tính nhận lỗi khi đọc/ghi"""
+        with self._lock:
+            if self.transport is not None and self.connected:
+                self.connected = False
+                self.streaming = False
+                self.transport.close()
+                print(f"[INFO] Thiết bị giả lập {self.port} đã ngắt kết nối")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'port': self.port,
+                'streaming': self.streaming,
+                'connected': self.connected,
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'garbage': self.garbage,
+            }
+
+    def handle_command(self, command):
+        """Xử lý một lệnh từ máy tính; trả về các dòng phản hồi"""
+        self.commands.append(command)
+        if command == 'START':
+            if not self.streaming:
+                self.streaming = True
+                self._started_at = time.monotonic()
+                self._due = 0
+            return []
+        if command == 'STOP':
+            self.streaming = False
+            return []
+        if command == 'INFO':
+            return [
+                'MODEL: HIGH GAUGE SIMULATOR',
+                f'SERIAL: {self.port}',
+                f'RATE: {self.rate:g} Hz',
+            ]
+        return [f'ERR UNKNOWN {command}']
+
+    def sample(self, elapsed):
+        """Giá trị đo (hoặc dòng rác) tại thời điểm elapsed giây sau START"""
+        if self.garbage_ratio and self.random.random() < self.garbage_ratio:
+            self.garbage += 1
+            return self.random.choice(GARBAGE_LINES)
+        value = self.value + self.drift * elapsed
+        if self.noise:
+            value += self.random.gauss(0.0, self.noise)
+        return f"{value:.{self.decimals}f}".encode()
+
+    def _run(self):
+        # Nhịp gửi: gom các mẫu đến hạn mỗi TICK giây để đạt được vài kHz
+        tick = min(1.0 / self.rate, 0.005) if self.rate > 0 else 0.05
+        while not self._stop_event.is_set() and self.connected:
+            data = self.transport.read(tick)
+            if data:
+                self._command_buffer += data
+                while b'\n' in self._command_buffer:
+                    line, _, rest = bytes(self._command_buffer).partition(b'\n')
+                    self._command_buffer = bytearray(rest)
+                    command = line.decode(errors='replace').strip().upper()
+                    if command:
+                        for reply in self.handle_command(command):
+                            self._out += reply.encode() + b'\n'
+
+            if self.streaming:
+                elapsed = time.monotonic() - self._started_at
+                if self.disconnect_after is not None and elapsed >= self.disconnect_after:
+                    self.disconnect()
+                    break
+                due = int(elapsed * self.rate)
+                lines = [self.sample(elapsed) for _ in range(due - self._due)]
+                self._due = due
+                with self._lock:
+                    for line in lines:
+                        if len(self._out) + len(line) + 1 > self.out_buffer:
+                            self.dropped += 1
+                        else:
+                            self._out += line + b'\n'
+                            self.sent += 1
+
+            if self._out:
+                try:
+                    written = self.transport.write(bytes(self._out))
+                except (OSError, serial.SerialException):
+                    self.disconnect()
+                    break
+                del self._out[:written]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Thiết bị High Gauge giả lập qua pty")
+    parser.add_argument('--rate', type=float, default=10.0, help="Số mẫu/giây")
+    parser.add_argument('--value', type=float, default=10.0)
+    parser.add_argument('--noise', type=float, default=0.01)
+    parser.add_argument('--drift', type=float, default=0.0, help="Độ trôi (đơn vị/giây)")
+    parser.add_argument('--garbage', type=float, default=0.0, help="Tỉ lệ dòng rác (0-1)")
+    parser.add_argument('--disconnect-after', type=float, default=None, help="Ngắt kết nối sau N giây kể từ START")
+    args = parser.parse_args()
+
+    simulator = GaugeSimulator(rate=args.rate, value=args.value, noise=args.noise, drift=args.drift,
+                               garbage_ratio=args.garbage, disconnect_after=args.disconnect_after)
+    port = simulator.start_pty()
+    print(f"[INFO] Thiết bị giả lập đang chạy tại {port} (Ctrl+C để dừng)")
+    try:
+        while simulator.connected:
+            time.sleep(1.0)
+            print(f"[INFO] {simulator.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
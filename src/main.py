@@ -1,56 +1,155 @@
+import time
+from contextlib import contextmanager
+
+# Mốc thời gian bắt đầu khởi động (dùng cho báo cáo thời gian khởi động)
+STARTUP_T0 = time.perf_counter()
+STARTUP_TIMINGS = []
+
+
+@contextmanager
+def startup_step(label):
+    """Đo thời gian một bước khởi động (import, tạo trang...) để in trong báo cáo"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMINGS.append((label, (time.perf_counter() - start) * 1000))
+
+
+def print_startup_report(first_paint_ms):
+    print("=== THỜI GIAN KHỞI ĐỘNG ===")
+    for label, elapsed in STARTUP_TIMINGS:
+        print(f"  {label:<40} {elapsed:8.1f} ms")
+    print(f"  {'Hiển thị lần đầu (tính từ lúc khởi động)':<40} {first_paint_ms:8.1f} ms")
+
+
 import sys
 import traceback
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel, QStackedWidget, QMessageBox, QHBoxLayout
-from PyQt6.QtCore import Qt
+import multiprocessing
+with startup_step("import PyQt6"):
+    from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel, QStackedWidget, QMessageBox, QHBoxLayout
+    from PyQt6.QtCore import Qt, QTimer
 
 # Import database config
-try:
-    from config.database import DatabaseConfig
-except ImportError:
+with startup_step("import config.database"):
+    try:
+        from config.database import DatabaseConfig
+        from config.logger import get_logger
+        from config.query_stats import QueryStats
+    except ImportError:
+        try:
+            from src.config.database import DatabaseConfig
+            from src.config.logger import get_logger
+            from src.config.query_stats import QueryStats
+        except ImportError:
+            from .config.database import DatabaseConfig
+            from .config.logger import get_logger
+            from .config.query_stats import QueryStats
+
+logger = get_logger('main')
+
+with startup_step("import ui.diagnostics"):
+    try:
+        from ui.diagnostics import UiDiagnostics
+    except ImportError:
+        try:
+            from src.ui.diagnostics import UiDiagnostics
+        except ImportError:
+            from .ui.diagnostics import UiDiagnostics
+
+with startup_step("import models.measurement_manager"):
     try:
-        from src.config.database import DatabaseConfig
+        from models.measurement_manager import MeasurementManager
     except ImportError:
-        from .config.database import DatabaseConfig
-
-# Import UI modules
-try:
-    from ui.measurement import MeasurementWidget
-    from ui.dashboard import DashboardWidget
-    from ui.template_management import TemplateManagementWidget
-    from ui.model_management import ModelManagementWidget
-    from ui.report_generator import ReportGeneratorWidget
-    from ui.backup_management import BackupManagementWidget
-    from ui.model_selector import ModelSelectorWidget
-except ImportError:
+        try:
+            from src.models.measurement_manager import MeasurementManager
+        except ImportError:
+            from .models.measurement_manager import MeasurementManager
+
+# Các trang được import và tạo khi chuyển tới lần đầu (pandas, matplotlib,
+# openpyxl... chỉ được nạp khi cần)
+def create_dashboard_page():
     try:
-        from src.ui.measurement import MeasurementWidget
-        from src.ui.dashboard import DashboardWidget
-        from src.ui.template_management import TemplateManagementWidget
-        from src.ui.model_management import ModelManagementWidget
-        from src.ui.report_generator import ReportGeneratorWidget
-        from src.ui.backup_management import BackupManagementWidget
-        from src.ui.model_selector import ModelSelectorWidget
+        from ui.dashboard import DashboardWidget
     except ImportError:
-        from .ui.measurement import MeasurementWidget
-        from .ui.dashboard import DashboardWidget
-        from .ui.template_management import TemplateManagementWidget
-        from .ui.model_management import ModelManagementWidget
-        from .ui.report_generator import ReportGeneratorWidget
-        from .ui.backup_management import BackupManagementWidget
-        from .ui.model_selector import ModelSelectorWidget
+        try:
+            from src.ui.dashboard import DashboardWidget
+        except ImportError:
+            from .ui.dashboard import DashboardWidget
+    return DashboardWidget()
+
+def create_model_management_page():
+    try:
+        from ui.model_management import ModelManagementWidget
+    except ImportError:
+        try:
+            from src.ui.model_management import ModelManagementWidget
+        except ImportError:
+            from .ui.model_management import ModelManagementWidget
+    return ModelManagementWidget()
+
+def create_measurement_page():
+    try:
+        from ui.measurement import MeasurementWidget
+    except ImportError:
+        try:
+            from src.ui.measurement import MeasurementWidget
+        except ImportError:
+            from .ui.measurement import MeasurementWidget
+    return MeasurementWidget()
+
+def create_report_page():
+    try:
+        from ui.report_generator import ReportGeneratorWidget
+    except ImportError:
+        try:
+            from src.ui.report_generator import ReportGeneratorWidget
+        except ImportError:
+            from .ui.report_generator import ReportGeneratorWidget
+    return ReportGeneratorWidget()
+
+def create_backup_page():
+    try:
+        from ui.backup_management import BackupManagementWidget
+    except ImportError:
+        try:
+            from src.ui.backup_management import BackupManagementWidget
+        except ImportError:
+            from .ui.backup_management import BackupManagementWidget
+    return BackupManagementWidget()
+
+def create_template_page():
+    try:
+        from ui.template_management import TemplateManagementWidget
+    except ImportError:
+        try:
+            from src.ui.template_management import TemplateManagementWidget
+        except ImportError:
+            from .ui.template_management import TemplateManagementWidget
+    return TemplateManagementWidget()
+
+PAGE_FACTORIES = {
+    "dashboard": create_dashboard_page,
+    "model_management": create_model_management_page,
+    "measurement": create_measurement_page,
+    "report": create_report_page,
+    "backup": create_backup_page,
+    "template": create_template_page,
+}
 
 def main():
     try:
-        print("Bắt đầu tạo QApplication")
-        app = QApplication(sys.argv)
+        logger.debug("Bắt đầu tạo QApplication")
+        with startup_step("QApplication"):
+            app = QApplication(sys.argv)
         
-        print("Tạo MainWindow")
+        logger.debug("Tạo MainWindow")
         window = MainWindow()
         
-        print("Show MainWindow")
+        logger.debug("Show MainWindow")
         window.show()
         
-        print("Bắt đầu app.exec()")
+        logger.debug("Bắt đầu app.exec()")
         return app.exec()
     except Exception as e:
         print(f"Lỗi trong main: {str(e)}")
@@ -61,23 +160,28 @@ def main():
 class MainWindow(QMainWindow):
     def __init__(self):
         try:
-            print("Bắt đầu khởi tạo MainWindow")
+            logger.debug("Bắt đầu khởi tạo MainWindow")
             super().__init__()
             self.setWindowTitle("Halla Measurement System")
             self.setMinimumSize(1280, 800)
-            print("Đã thiết lập kích thước cửa sổ")
+            logger.debug("Đã thiết lập kích thước cửa sổ")
 
             # Tạo central widget
-            print("Bắt đầu tạo central widget")
+            logger.debug("Bắt đầu tạo central widget")
             self.central_widget = QWidget()
             self.setCentralWidget(self.central_widget)
-            print("Đã tạo central widget")
+            logger.debug("Đã tạo central widget")
+
+            self._first_paint_reported = False
 
             # Kiểm tra kết nối database
             try:
-                print("Bắt đầu kiểm tra kết nối database...")
+                logger.debug("Bắt đầu kiểm tra kết nối database...")
                 db_config = DatabaseConfig()
-                conn = db_config.get_connection()
+                with startup_step("Kết nối + migrate database"):
+                    conn = db_config.get_connection()
+                    if conn:
+                        db_config.migrate(conn)
                 if conn:
                     print("Đã kết nối thành công đến database")
                     conn.close()
@@ -86,7 +190,7 @@ class MainWindow(QMainWindow):
                     QMessageBox.warning(self, "Cảnh báo", 
                         "Không thể kết nối đến database. Một số tính năng có thể không hoạt động.\n"
                         "Vui lòng kiểm tra:\n"
-                        "1. MySQL đã được cài đặt và đang chạy\n"
+                        "1. MySQL đã được cài đặt và đang chạy (hoặc đặt DB_BACKEND=sqlite)\n"
                         "2. Database 'halla' đã được tạo\n"
                         "3. Thông tin kết nối trong file .env là chính xác")
             except Exception as e:
@@ -96,13 +200,26 @@ class MainWindow(QMainWindow):
                     f"Không thể kết nối đến database: {str(e)}\n"
                     "Một số tính năng có thể không hoạt động.")
 
-            print("Bắt đầu khởi tạo UI")
-            self.init_ui()
-            print("Đã khởi tạo UI xong")
+            # Mở nhật ký cục bộ và đồng bộ các kết quả đo còn tồn từ lần chạy trước
+            try:
+                with startup_step("Mở nhật ký kết quả đo"):
+                    status = MeasurementManager.get_sync_status()
+                if status['depth'] > 0:
+                    print(f"[INFO] Còn {status['depth']} kết quả đo chờ đồng bộ lên MySQL")
+            except Exception as e:
+                print(f"Lỗi khi mở nhật ký kết quả đo: {str(e)}")
+
+            logger.debug("Bắt đầu khởi tạo UI")
+            with startup_step("MainWindow.init_ui"):
+                self.init_ui()
 
-            print("Bắt đầu hiển thị cửa sổ")
+            # Watchdog event loop / profiler (tắt mặc định, xem ui/diagnostics.py)
+            self.diagnostics = UiDiagnostics(self)
+            logger.debug("Đã khởi tạo UI xong")
+
+            logger.debug("Bắt đầu hiển thị cửa sổ")
             self.show()
-            print("Đã hiển thị cửa sổ xong")
+            logger.debug("Đã hiển thị cửa sổ xong")
 
         except Exception as e:
             print(f"Lỗi khởi tạo MainWindow: {str(e)}")
@@ -112,14 +229,14 @@ class MainWindow(QMainWindow):
 
     def init_ui(self):
         try:
-            print("Bắt đầu khởi tạo UI")
+            logger.debug("Bắt đầu khởi tạo UI")
             layout = QVBoxLayout(self.central_widget)
             layout.setContentsMargins(0, 0, 0, 0)
             layout.setSpacing(0)
-            print("Đã thiết lập layout")
+            logger.debug("Đã thiết lập layout")
 
             # Header
-            print("Bắt đầu tạo header")
+            logger.debug("Bắt đầu tạo header")
             header = QWidget()
             header.setStyleSheet("""
                 QWidget {
@@ -137,21 +254,21 @@ class MainWindow(QMainWindow):
             
             title = QLabel("Halla Measurement System")
             header_layout.addWidget(title)
-            print("Đã tạo header")
+            logger.debug("Đã tạo header")
             
             layout.addWidget(header)
-            print("Đã thêm header vào layout")
+            logger.debug("Đã thêm header vào layout")
 
             # Main content
-            print("Bắt đầu tạo content")
+            logger.debug("Bắt đầu tạo content")
             content = QWidget()
             content_layout = QHBoxLayout(content)
             content_layout.setContentsMargins(24, 24, 24, 24)
             content_layout.setSpacing(24)
-            print("Đã tạo content layout")
+            logger.debug("Đã tạo content layout")
 
             # Left sidebar
-            print("Bắt đầu tạo sidebar")
+            logger.debug("Bắt đầu tạo sidebar")
             sidebar = QWidget()
             sidebar.setFixedWidth(200)
             sidebar.setStyleSheet("""
@@ -177,10 +294,10 @@ class MainWindow(QMainWindow):
             sidebar_layout = QVBoxLayout(sidebar)
             sidebar_layout.setContentsMargins(16, 16, 16, 16)
             sidebar_layout.setSpacing(8)
-            print("Đã tạo sidebar")
+            logger.debug("Đã tạo sidebar")
 
             # Navigation buttons
-            print("Bắt đầu tạo navigation buttons")
+            logger.debug("Bắt đầu tạo navigation buttons")
             self.nav_buttons = []
             nav_items = [
                 ("Dashboard", "dashboard"),
@@ -198,52 +315,40 @@ class MainWindow(QMainWindow):
                 btn.clicked.connect(self.on_nav_click)
                 sidebar_layout.addWidget(btn)
                 self.nav_buttons.append(btn)
-            print("Đã tạo các nút navigation")
+            logger.debug("Đã tạo các nút navigation")
 
             # Add spacer to push buttons to the top
             sidebar_layout.addStretch()
+
+            # Thống kê truy vấn database (chẩn đoán thao tác chậm)
+            query_stats_btn = QPushButton("Thống kê truy vấn")
+            query_stats_btn.clicked.connect(self.show_query_stats)
+            sidebar_layout.addWidget(query_stats_btn)
+            self.query_stats_dialog = None
             content_layout.addWidget(sidebar)
-            print("Đã thêm sidebar vào content layout")
+            logger.debug("Đã thêm sidebar vào content layout")
 
             # Right content area
-            print("Bắt đầu tạo content stack")
+            logger.debug("Bắt đầu tạo content stack")
             self.content_stack = QStackedWidget()
             self.content_stack.setStyleSheet("""
                 QStackedWidget {
                     background: transparent;
                 }
             """)
-            print("Đã tạo content stack")
+            logger.debug("Đã tạo content stack")
 
-            # Initialize pages
-            print("Bắt đầu khởi tạo các trang")
-            try:
-                self.pages = {
-                    "dashboard": DashboardWidget(),
-                    "model_management": ModelManagementWidget(),
-                    "measurement": MeasurementWidget(),
-                    "report": ReportGeneratorWidget(),
-                    "backup": BackupManagementWidget(),
-                    "template": TemplateManagementWidget()
-                }
-                print("Đã khởi tạo các trang")
-
-                for page in self.pages.values():
-                    self.content_stack.addWidget(page)
-                print("Đã thêm các trang vào content stack")
-            except Exception as e:
-                print(f"Lỗi khởi tạo các trang: {str(e)}")
-                print(traceback.format_exc())
-                raise
+            # Các trang được tạo khi chuyển tới lần đầu (xem show_page)
+            self.pages = {}
 
             content_layout.addWidget(self.content_stack)
             layout.addWidget(content)
-            print("Đã thêm content vào layout chính")
+            logger.debug("Đã thêm content vào layout chính")
 
             # Set initial page
             self.nav_buttons[0].setChecked(True)
-            self.content_stack.setCurrentWidget(self.pages["dashboard"])
-            print("Đã thiết lập trang mặc định")
+            self.show_page("dashboard")
+            logger.debug("Đã thiết lập trang mặc định")
 
         except Exception as e:
             print(f"Lỗi trong init_ui: {str(e)}")
@@ -252,34 +357,95 @@ class MainWindow(QMainWindow):
 
     def on_nav_click(self):
         try:
-            print("Bắt đầu xử lý sự kiện click navigation")
+            logger.debug("Bắt đầu xử lý sự kiện click navigation")
             clicked_button = self.sender()
             page_name = clicked_button.property("page")
-            print(f"Đã click vào nút {page_name}")
+            logger.debug("Đã click vào nút %s", page_name)
 
             # Uncheck all buttons
             for btn in self.nav_buttons:
                 btn.setChecked(False)
-            print("Đã bỏ chọn tất cả các nút")
+            logger.debug("Đã bỏ chọn tất cả các nút")
 
             # Check clicked button
             clicked_button.setChecked(True)
-            print(f"Đã chọn nút {page_name}")
+            logger.debug("Đã chọn nút %s", page_name)
 
             # Show corresponding page
-            self.content_stack.setCurrentWidget(self.pages[page_name])
-            print(f"Đã chuyển đến trang {page_name}")
+            self.show_page(page_name)
+            logger.debug("Đã chuyển đến trang %s", page_name)
         except Exception as e:
             print(f"Lỗi trong on_nav_click: {str(e)}")
             print(traceback.format_exc())
+            QMessageBox.critical(self, "Lỗi", f"Không thể mở trang: {str(e)}")
+
+    def show_page(self, page_name):
+        """Chuyển tới trang, tạo trang (và import module của nó) nếu là lần đầu"""
+        page = self.pages.get(page_name)
+        if page is None:
+            start = time.perf_counter()
+            with startup_step(f"Tạo trang {page_name}"):
+                page = PAGE_FACTORIES[page_name]()
+            if self._first_paint_reported:
+                print(f"[INFO] Tạo trang {page_name}: {(time.perf_counter() - start) * 1000:.1f} ms")
+            self.pages[page_name] = page
+            self.content_stack.addWidget(page)
+        self.content_stack.setCurrentWidget(page)
+
+    def show_query_stats(self):
+        """Mở cửa sổ thống kê truy vấn (không chặn cửa sổ chính)"""
+        if self.query_stats_dialog is None:
+            try:
+                from ui.query_stats_dialog import QueryStatsDialog
+            except ImportError:
+                try:
+                    from src.ui.query_stats_dialog import QueryStatsDialog
+                except ImportError:
+                    from .ui.query_stats_dialog import QueryStatsDialog
+            self.query_stats_dialog = QueryStatsDialog(self)
+        self.query_stats_dialog.show()
+        self.query_stats_dialog.raise_()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_reported:
+            self._first_paint_reported = True
+            first_paint_ms = (time.perf_counter() - STARTUP_T0) * 1000
+            # In sau khi vòng vẽ hiện tại kết thúc
+            QTimer.singleShot(0, lambda: print_startup_report(first_paint_ms))
+
+    def closeEvent(self, event):
+        """Ghi nốt dữ liệu đo, in thống kê connection pool/truy vấn và đóng các kết nối khi thoát"""
+        self.diagnostics.shutdown()
+        try:
+            # Ghi nốt các kết quả đo đang chờ trước khi đóng pool
+            MeasurementManager.close_writer()
+            stats = DatabaseConfig.get_pool_stats()
+            print("=== THỐNG KÊ CONNECTION POOL ===")
+            print(f"Hit: {stats['hits']} | Miss: {stats['misses']} | Tỷ lệ hit: {stats['hit_rate']:.1%}")
+            print(f"Số lần chờ: {stats['waits']} | Timeout: {stats['timeouts']} | "
+                  f"Chờ TB: {stats['wait_time_avg'] * 1000:.1f} ms | Chờ max: {stats['wait_time_max'] * 1000:.1f} ms")
+            print(f"Health check lỗi: {stats['health_check_failures']}")
+            totals = QueryStats.totals()
+            print("=== THỐNG KÊ TRUY VẤN ===")
+            print(f"Số truy vấn: {totals['queries']} | Chậm: {totals['slow']} | Lỗi: {totals['errors']}")
+            for group in QueryStats.snapshot()[:5]:
+                print(f"  {group['total_ms']:9.1f} ms  x{group['count']:<5} [{group['action']}] {group['fingerprint'][:100]}")
+            DatabaseConfig.close_pool()
+        except Exception as e:
+            print(f"Lỗi khi đóng connection pool: {str(e)}")
+        super().closeEvent(event)
 
 if __name__ == "__main__":
+    # Bắt buộc cho process pool vẽ biểu đồ báo cáo khi chạy bản PyInstaller
+    multiprocessing.freeze_support()
     try:
-        print("Bắt đầu chạy ứng dụng")
-        app = QApplication(sys.argv)
-        print("Đã tạo QApplication")
+        logger.debug("Bắt đầu chạy ứng dụng")
+        with startup_step("QApplication"):
+            app = QApplication(sys.argv)
+        logger.debug("Đã tạo QApplication")
         window = MainWindow()
-        print("Đã tạo MainWindow")
+        logger.debug("Đã tạo MainWindow")
         sys.exit(app.exec())
     except Exception as e:
         print(f"Lỗi trong main: {str(e)}")
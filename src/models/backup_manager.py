@@ -1,7 +1,10 @@
 import os
 import shutil
 import json
-from datetime import datetime
+import gzip
+import hashlib
+from datetime import datetime, date
+from decimal import Decimal
 
 # Import config modules
 try:
@@ -11,74 +14,398 @@ except ImportError:
         from src.config.database import DatabaseConfig
     except ImportError:
         from ..config.database import DatabaseConfig
+try:
+    from models.model_catalog import ModelCatalog
+except ImportError:
+    try:
+        from src.models.model_catalog import ModelCatalog
+    except ImportError:
+        from .model_catalog import ModelCatalog
+
+# Thứ tự sao lưu/khôi phục (bảng cha trước bảng con)
+BACKUP_TABLES = ["models", "parameters", "products", "measurements", "templates"]
+# Bảng chỉ thêm dòng mới (id tăng dần): bản sao lưu tăng dần chỉ ghi các dòng id > watermark
+APPEND_ONLY_TABLES = ("products", "measurements")
+MANIFEST_FILE = "manifest.json"
+BACKUP_FORMAT = 2
+
+
+class BackupRestoreCancelled(Exception):
+    """Người dùng huỷ khôi phục (transaction đã được rollback)"""
+
+
+def _encode_value(value):
+    """Chuyển giá trị MySQL không có sẵn trong JSON sang chuỗi"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    raise TypeError(f"Không sao lưu được kiểu {type(value).__name__}")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 
 class BackupManager:
+    """Sao lưu/khôi phục database và file template.
+
+    Mỗi bản sao lưu là một thư mục backup_<thời gian> gồm các file chunk
+    <bảng>_<số>.jsonl.gz (mỗi dòng là một mảng giá trị theo thứ tự cột) và
+    manifest.json ghi danh sách cột, số dòng và sha256 của từng chunk. Dữ liệu
+    được đọc bằng cursor không đệm (unbuffered) theo từng khối CHUNK_ROWS dòng
+    nên bộ nhớ không phụ thuộc kích thước bảng. Bản sao lưu cũ (database.json)
+    vẫn khôi phục được.
+
+    Bản sao lưu tăng dần (incremental) tham chiếu bản trước đó (base) và chỉ
+    ghi phần thay đổi: bảng APPEND_ONLY_TABLES ghi các dòng có id lớn hơn
+    max_id của base (mode "append"); các bảng nhỏ còn lại được ghi đầy đủ
+    nếu nội dung khác base (mode "full"), ngược lại chỉ ghi "unchanged".
+    Khôi phục bản tăng dần sẽ áp dụng cả chuỗi từ bản đầy đủ gần nhất.
+    """
+
+    # Số dòng mỗi file chunk
+    CHUNK_ROWS = int(os.getenv('BACKUP_CHUNK_ROWS') or '100000')
+    # Mức nén gzip (1 = nhanh nhất, 9 = nhỏ nhất)
+    COMPRESS_LEVEL = int(os.getenv('BACKUP_COMPRESS_LEVEL') or '6')
+    # Số bản tăng dần tối đa nối tiếp một bản đầy đủ; vượt quá thì tạo bản đầy đủ mới
+    MAX_CHAIN = int(os.getenv('BACKUP_MAX_CHAIN') or '30')
+    # Số dòng mỗi lệnh INSERT nhiều dòng (executemany) khi khôi phục
+    RESTORE_BATCH = int(os.getenv('BACKUP_RESTORE_BATCH') or '5000')
+
     def __init__(self):
         self.db_config = DatabaseConfig()
         self.backup_dir = "backups"
         if not os.path.exists(self.backup_dir):
             os.makedirs(self.backup_dir)
+        self._encode_row = json.JSONEncoder(
+            default=_encode_value, ensure_ascii=False, separators=(",", ":")
+        ).encode
 
-    def create_backup(self):
-        """Tạo bản sao lưu mới"""
+    def create_backup(self, backup_dir=None, incremental=False):
+        """Tạo bản sao lưu mới, trả về đường dẫn thư mục sao lưu (None nếu lỗi).
+
+        incremental=True: chỉ ghi phần thay đổi so với bản sao lưu mới nhất trong
+        backup_dir (tạo bản đầy đủ nếu chưa có bản nào hoặc chuỗi đã quá MAX_CHAIN).
+        """
+        backup_dir = backup_dir or self.backup_dir
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = os.path.join(backup_dir, f"backup_{timestamp}")
         try:
-            # Tạo tên file backup
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = os.path.join(self.backup_dir, f"backup_{timestamp}")
+            base_path, base = self._incremental_base(backup_dir) if incremental else (None, None)
             os.makedirs(backup_path)
-
-            # Sao lưu database
-            db_backup = {
-                "models": self._get_table_data("models"),
-                "parameters": self._get_table_data("parameters"),
-                "measurements": self._get_table_data("measurements"),
-                "templates": self._get_table_data("templates")
-            }
-
-            # Lưu dữ liệu database
-            with open(os.path.join(backup_path, "database.json"), "w", encoding="utf-8") as f:
-                json.dump(db_backup, f, ensure_ascii=False, indent=2)
+            connection = self.db_config.get_connection()
+            if not connection:
+                raise ConnectionError("Không thể kết nối database")
+            try:
+                # Mọi bảng được đọc trong cùng một snapshot
+                connection.start_transaction(consistent_snapshot=True, readonly=True)
+                schema_version = self._schema_version(connection)
+                if base and base.get("schema_version") != schema_version:
+                    # Migration có thể sửa các dòng cũ: không dùng watermark được
+                    print("[INFO] Schema đã thay đổi từ bản sao lưu trước, tạo bản sao lưu đầy đủ")
+                    base_path, base = None, None
+                tables = {}
+                for table_name in BACKUP_TABLES:
+                    base_table = base["tables"].get(table_name) if base else None
+                    tables[table_name] = self._backup_table(connection, table_name, backup_path, base_table)
+                cursor = connection.cursor()
+                cursor.execute("SELECT file_path FROM templates")
+                template_files = [row[0] for row in cursor.fetchall()]
+                cursor.close()
+                connection.rollback()
+            finally:
+                connection.close()
 
             # Sao lưu templates
             templates_dir = os.path.join(backup_path, "templates")
             os.makedirs(templates_dir)
-            for template in db_backup["templates"]:
-                if os.path.exists(template["file_path"]):
-                    shutil.copy2(template["file_path"], templates_dir)
+            for file_path in template_files:
+                if os.path.exists(file_path):
+                    shutil.copy2(file_path, templates_dir)
 
-            return True
+            # Manifest ghi sau cùng: thư mục không có manifest là bản sao lưu dở dang
+            manifest = {
+                "format": BACKUP_FORMAT,
+                "type": "incremental" if base else "full",
+                "base": os.path.basename(base_path) if base else None,
+                "chain_length": base.get("chain_length", 0) + 1 if base else 0,
+                "created_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+                "schema_version": schema_version,
+                "compression": "gzip",
+                "tables": tables,
+                "template_files": template_files
+            }
+            manifest_tmp = os.path.join(backup_path, MANIFEST_FILE + ".tmp")
+            with open(manifest_tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(manifest_tmp, os.path.join(backup_path, MANIFEST_FILE))
+            return backup_path
         except Exception as e:
             print(f"Lỗi khi tạo backup: {e}")
-            return False
+            shutil.rmtree(backup_path, ignore_errors=True)
+            return None
+
+    def _incremental_base(self, backup_dir):
+        """Bản sao lưu mới nhất (có manifest) làm base cho bản tăng dần; (None, None) nếu không dùng được"""
+        for item in sorted(os.listdir(backup_dir), reverse=True):
+            path = os.path.join(backup_dir, item)
+            if not (item.startswith("backup_") and os.path.isdir(path)):
+                continue
+            manifest = self.read_manifest(path)
+            if manifest is None:
+                if os.path.exists(os.path.join(path, "database.json")):
+                    break  # Bản cũ không có watermark
+                continue  # Bản dở dang
+            if manifest.get("chain_length", 0) >= self.MAX_CHAIN:
+                print(f"[INFO] Chuỗi sao lưu tăng dần đã đủ {self.MAX_CHAIN} bản, tạo bản sao lưu đầy đủ")
+                break
+            return path, manifest
+        return None, None
+
+    def _schema_version(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT MAX(version) FROM schema_migrations")
+            return cursor.fetchone()[0]
+        except Exception:
+            return None
+        finally:
+            cursor.close()
+
+    def _backup_table(self, connection, table_name, backup_path, base_table):
+        """Sao lưu một bảng (đầy đủ hoặc phần thay đổi so với base_table), trả về thông tin cho manifest"""
+        if base_table and "max_id" in base_table and table_name in APPEND_ONLY_TABLES:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE id <= %s", (base_table["max_id"],))
+            kept = cursor.fetchone()[0]
+            cursor.close()
+            # Có dòng cũ bị xoá thì phải ghi lại toàn bộ bảng
+            if kept == base_table["total_rows"]:
+                table = self._dump_table(connection, table_name, backup_path, after_id=base_table["max_id"])
+                if table["columns"] == base_table["columns"]:
+                    table.update({
+                        "mode": "append",
+                        "max_id": base_table["max_id"] if table["max_id"] is None else table["max_id"],
+                        "total_rows": base_table["total_rows"] + table["rows"]
+                    })
+                    return table
+                self._remove_chunks(backup_path, table)
 
-    def restore_backup(self, backup_path):
-        """Khôi phục từ bản sao lưu"""
+        table = self._dump_table(connection, table_name, backup_path)
+        table["mode"] = "full"
+        table["total_rows"] = table["rows"]
+        if (base_table and table_name not in APPEND_ONLY_TABLES
+                and base_table.get("content_sha256") == table["content_sha256"]
+                and base_table["columns"] == table["columns"]):
+            # Nội dung không đổi so với base: không cần giữ các chunk
+            self._remove_chunks(backup_path, table)
+            table.update({"mode": "unchanged", "rows": 0, "chunks": []})
+        return table
+
+    def _remove_chunks(self, backup_path, table):
+        for chunk in table["chunks"]:
+            os.remove(os.path.join(backup_path, chunk["file"]))
+
+    def _dump_table(self, connection, table_name, backup_path, after_id=None):
+        """Ghi một bảng (hoặc các dòng id > after_id) ra các file chunk, trả về thông tin bảng"""
+        cursor = connection.cursor()
+        try:
+            if after_id is None:
+                cursor.execute(f"SELECT * FROM {table_name} ORDER BY id")
+            else:
+                cursor.execute(f"SELECT * FROM {table_name} WHERE id > %s ORDER BY id", (after_id,))
+            columns = list(cursor.column_names)
+            id_index = columns.index("id")
+            digest = hashlib.sha256()
+            chunks = []
+            total = 0
+            max_id = None
+            while True:
+                rows = cursor.fetchmany(self.CHUNK_ROWS)
+                if not rows:
+                    break
+                file_name = f"{table_name}_{len(chunks):05d}.jsonl.gz"
+                chunks.append(self._write_chunk(backup_path, file_name, rows, digest))
+                total += len(rows)
+                max_id = rows[-1][id_index]
+            return {
+                "columns": columns,
+                "rows": total,
+                "chunks": chunks,
+                "max_id": max_id,
+                "content_sha256": digest.hexdigest()
+            }
+        finally:
+            cursor.close()
+
+    def _write_chunk(self, backup_path, file_name, rows, digest):
+        path = os.path.join(backup_path, file_name)
+        lines = "\n".join(self._encode_row(list(row)) for row in rows) + "\n"
+        digest.update(lines.encode("utf-8"))
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=self.COMPRESS_LEVEL) as f:
+            f.write(lines)
+        return {
+            "file": file_name,
+            "rows": len(rows),
+            "bytes": os.path.getsize(path),
+            "sha256": _file_sha256(path)
+        }
+
+    def read_manifest(self, backup_path):
+        """Đọc manifest của bản sao lưu; None nếu là bản sao lưu cũ (database.json)"""
+        manifest_path = os.path.join(backup_path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def verify_backup(self, backup_path, manifest=None):
+        """Kiểm tra sha256 và số dòng của mọi chunk; trả về danh sách lỗi (rỗng nếu hợp lệ)"""
+        manifest = manifest or self.read_manifest(backup_path)
+        if manifest is None:
+            return [f"Không có {MANIFEST_FILE}"]
+        errors = []
+        for table_name, table in manifest["tables"].items():
+            total = 0
+            for chunk in table["chunks"]:
+                path = os.path.join(backup_path, chunk["file"])
+                if not os.path.exists(path):
+                    errors.append(f"Thiếu file {chunk['file']}")
+                elif _file_sha256(path) != chunk["sha256"]:
+                    errors.append(f"Sai checksum {chunk['file']}")
+                total += chunk["rows"]
+            if total != table["rows"]:
+                errors.append(f"Số dòng bảng {table_name} không khớp ({total} != {table['rows']})")
+        return errors
+
+    def iter_table_rows(self, backup_path, table):
+        """Đọc lần lượt các dòng (list giá trị theo table['columns']) từ các chunk của bảng"""
+        for chunk in table["chunks"]:
+            with gzip.open(os.path.join(backup_path, chunk["file"]), "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def backup_chain(self, backup_path):
+        """Chuỗi (đường dẫn, manifest) từ bản đầy đủ tới backup_path; lỗi nếu thiếu bản base"""
+        chain = []
+        path = backup_path
+        while True:
+            manifest = self.read_manifest(path)
+            if manifest is None:
+                raise ValueError(f"Thiếu bản sao lưu base {os.path.basename(path)}")
+            chain.append((path, manifest))
+            if manifest.get("type", "full") == "full":
+                return list(reversed(chain))
+            path = os.path.join(os.path.dirname(backup_path), manifest["base"])
+
+    def restore_segments(self, chain, table_name):
+        """Các phần (đường dẫn, bảng trong manifest) tạo nên bảng tại thời điểm bản cuối của chuỗi:
+        bản "full" gần nhất rồi các phần "append" sau nó"""
+        start = 0
+        for i, (path, manifest) in enumerate(chain):
+            table = manifest["tables"].get(table_name)
+            if table and table.get("mode", "full") == "full":
+                start = i
+        segments = []
+        for path, manifest in chain[start:]:
+            table = manifest["tables"].get(table_name)
+            if table and table.get("mode", "full") in ("full", "append"):
+                segments.append((path, table))
+        return segments
+
+    def _iter_segments(self, segments):
+        for path, table in segments:
+            yield from self.iter_table_rows(path, table)
+
+    def restore_backup(self, backup_path, progress=None, is_cancelled=None):
+        """Khôi phục từ bản sao lưu (bản tăng dần: khôi phục cả chuỗi từ bản đầy đủ).
+
+        Mọi bảng được khôi phục trong một transaction: lỗi hoặc huỷ giữa chừng thì
+        database giữ nguyên như trước. progress(done, total): số dòng đã ghi;
+        is_cancelled(): trả về True để huỷ.
+        """
         try:
-            # Đọc dữ liệu database
-            with open(os.path.join(backup_path, "database.json"), "r", encoding="utf-8") as f:
-                db_backup = json.load(f)
+            manifest = self.read_manifest(backup_path)
+            if manifest is None:
+                return self._restore_legacy_backup(backup_path, progress, is_cancelled)
+
+            # Kiểm tra toàn bộ chunk của cả chuỗi trước khi xoá dữ liệu hiện tại
+            chain = self.backup_chain(backup_path)
+            for path, chain_manifest in chain:
+                errors = self.verify_backup(path, chain_manifest)
+                if errors:
+                    raise ValueError(f"Bản sao lưu {os.path.basename(path)} bị hỏng: " + "; ".join(errors))
 
             # Khôi phục database
-            self._restore_table_data("models", db_backup["models"])
-            self._restore_table_data("parameters", db_backup["parameters"])
-            self._restore_table_data("measurements", db_backup["measurements"])
-            self._restore_table_data("templates", db_backup["templates"])
+            tables = []
+            for table_name in BACKUP_TABLES:
+                table = manifest["tables"].get(table_name)
+                if table:
+                    segments = self.restore_segments(chain, table_name)
+                    tables.append((
+                        table_name, table["columns"], self._iter_segments(segments),
+                        sum(segment["rows"] for _, segment in segments)
+                    ))
+            self._restore_tables(tables, progress, is_cancelled)
 
             # Khôi phục templates
             templates_dir = os.path.join(backup_path, "templates")
-            if os.path.exists(templates_dir):
-                for template in db_backup["templates"]:
-                    if os.path.exists(template["file_path"]):
-                        shutil.copy2(
-                            os.path.join(templates_dir, os.path.basename(template["file_path"])),
-                            template["file_path"]
-                        )
+            for file_path in manifest.get("template_files", []):
+                source = os.path.join(templates_dir, os.path.basename(file_path))
+                if os.path.exists(source):
+                    target_dir = os.path.dirname(file_path)
+                    if target_dir and not os.path.exists(target_dir):
+                        os.makedirs(target_dir)
+                    shutil.copy2(source, file_path)
 
             return True
+        except BackupRestoreCancelled:
+            print("[INFO] Đã huỷ khôi phục, dữ liệu hiện tại được giữ nguyên")
+            return False
         except Exception as e:
             print(f"Lỗi khi khôi phục backup: {e}")
             return False
 
+    def _restore_legacy_backup(self, backup_path, progress=None, is_cancelled=None):
+        """Khôi phục bản sao lưu định dạng cũ (một file database.json)"""
+        # Đọc dữ liệu database
+        with open(os.path.join(backup_path, "database.json"), "r", encoding="utf-8") as f:
+            db_backup = json.load(f)
+
+        # Khôi phục database
+        tables = []
+        for table_name in BACKUP_TABLES:
+            data = db_backup.get(table_name, [])
+            if data:
+                tables.append((
+                    table_name, list(data[0].keys()), (list(row.values()) for row in data), len(data)
+                ))
+        # Bản sao lưu trước khi có bảng products: tạo lại sản phẩm từ measurements
+        columns = {table[0]: table[1] for table in tables}
+        rebuild_products = "measurements" in columns and "product_id" not in columns["measurements"]
+        self._restore_tables(tables, progress, is_cancelled, rebuild_products=rebuild_products)
+
+        # Khôi phục templates
+        templates_dir = os.path.join(backup_path, "templates")
+        if os.path.exists(templates_dir):
+            for template in db_backup["templates"]:
+                if os.path.exists(template["file_path"]):
+                    shutil.copy2(
+                        os.path.join(templates_dir, os.path.basename(template["file_path"])),
+                        template["file_path"]
+                    )
+
+        return True
+
     def get_backups(self):
         """Lấy danh sách các bản sao lưu"""
         backups = []
@@ -87,45 +414,92 @@ class BackupManager:
             if os.path.isdir(backup_path) and item.startswith("backup_"):
                 try:
                     timestamp = datetime.strptime(item[7:], "%Y%m%d_%H%M%S")
+                    manifest = self.read_manifest(backup_path)
+                    if manifest is None and not os.path.exists(os.path.join(backup_path, "database.json")):
+                        # Bản sao lưu dở dang (chưa ghi manifest)
+                        continue
                     backups.append({
                         "timestamp": timestamp,
-                        "path": backup_path
+                        "path": backup_path,
+                        "format": manifest["format"] if manifest else 1,
+                        "type": manifest.get("type", "full") if manifest else "full",
+                        # Số dòng mỗi bảng tại thời điểm sao lưu (chỉ có với bản sao lưu có manifest)
+                        "rows": {
+                            name: t.get("total_rows", t["rows"]) for name, t in manifest["tables"].items()
+                        } if manifest else {}
                     })
                 except:
                     continue
         return sorted(backups, key=lambda x: x["timestamp"], reverse=True)
 
-    def _get_table_data(self, table_name):
-        """Lấy dữ liệu từ một bảng"""
+    def _restore_tables(self, tables, progress=None, is_cancelled=None, rebuild_products=False):
+        """Ghi đè các bảng bằng dữ liệu sao lưu trong một transaction.
+
+        tables: danh sách (tên bảng, columns, rows, số dòng) theo thứ tự BACKUP_TABLES;
+        rows là các list giá trị theo columns. Dữ liệu được chèn theo lô
+        RESTORE_BATCH dòng (executemany gộp thành một lệnh INSERT nhiều dòng).
+        rebuild_products: xoá bảng products và tạo lại sản phẩm cho các
+        measurement chưa có product_id (bản sao lưu cũ), trong cùng transaction.
+        """
         connection = self.db_config.get_connection()
-        if connection:
-            try:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute(f"SELECT * FROM {table_name}")
-                return cursor.fetchall()
-            finally:
-                cursor.close()
-                connection.close()
-        return []
+        if not connection:
+            raise ConnectionError("Không thể kết nối database")
+        total = sum(table[3] for table in tables)
+        done = 0
+        cursor = connection.cursor()
+        try:
+            # Dữ liệu sao lưu đã nhất quán: tắt kiểm tra khoá ngoại/unique trong phiên này
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            cursor.execute("SET UNIQUE_CHECKS = 0")
+            connection.start_transaction()
 
-    def _restore_table_data(self, table_name, data):
-        """Khôi phục dữ liệu vào một bảng"""
-        if not data:
-            return
+            # Xóa dữ liệu cũ (bảng con trước)
+            for table_name, _, _, _ in reversed(tables):
+                cursor.execute(f"DELETE FROM {table_name}")
+            if rebuild_products and "products" not in [table[0] for table in tables]:
+                cursor.execute("DELETE FROM products")
 
-        connection = self.db_config.get_connection()
-        if connection:
+            # Thêm dữ liệu mới (bảng cha trước)
+            for table_name, columns, rows, _ in tables:
+                query = (
+                    f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join(['%s'] * len(columns))})"
+                )
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= self.RESTORE_BATCH:
+                        cursor.executemany(query, batch)
+                        done += len(batch)
+                        batch = []
+                        if progress:
+                            progress(done, total)
+                        if is_cancelled and is_cancelled():
+                            raise BackupRestoreCancelled()
+                if batch:
+                    cursor.executemany(query, batch)
+                    done += len(batch)
+                    if progress:
+                        progress(done, total)
+
+            if rebuild_products:
+                created, assigned = DatabaseConfig.backfill_products(cursor)
+                print(f"[INFO] Đã gán {assigned} measurement vào {created} sản phẩm")
+
+            # models/parameters đã bị thay: cache danh mục ở mọi máy cần nạp lại
+            ModelCatalog.bump_version(cursor)
+            connection.commit()
+            ModelCatalog.invalidate()
+            print(f"[INFO] Đã khôi phục {done} dòng")
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
             try:
-                cursor = connection.cursor()
-                # Xóa dữ liệu cũ
-                cursor.execute(f"DELETE FROM {table_name}")
-                # Thêm dữ liệu mới
-                for row in data:
-                    columns = ", ".join(row.keys())
-                    placeholders = ", ".join(["%s"] * len(row))
-                    query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-                    cursor.execute(query, list(row.values()))
-                connection.commit()
-            finally:
-                cursor.close()
-                connection.close() 
\ No newline at end of file
+                # Connection trả về pool: bật lại kiểm tra cho các phiên sau
+                cursor.execute("SET UNIQUE_CHECKS = 1")
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+            except Exception as e:
+                print(f"[WARNING] Không thể bật lại FOREIGN_KEY_CHECKS: {e}")
+            cursor.close()
+            connection.close()
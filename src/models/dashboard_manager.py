@@ -6,26 +6,137 @@ except ImportError:
         from src.config.database import DatabaseConfig
     except ImportError:
         from ..config.database import DatabaseConfig
-import pandas as pd
+try:
+    from models.model_catalog import ModelCatalog
+except ImportError:
+    try:
+        from src.models.model_catalog import ModelCatalog
+    except ImportError:
+        from .model_catalog import ModelCatalog
 from datetime import datetime, timedelta
 
+# Các truy vấn thường dùng (được kiểm tra EXPLAIN trong benchmarks/check_query_plans.py)
+MEASUREMENT_DATA_QUERY = """
+    SELECT m.measured_at, m.value, m.product_id, p.name as parameter_name, 
+           p.unit, md.name as model_name
+    FROM measurements m
+    JOIN parameters p ON m.parameter_id = p.id
+    JOIN models md ON p.model_id = md.id
+    WHERE m.parameter_id = %s
+"""
+
+# Chuỗi giá trị cho biểu đồ: chỉ lấy các dòng mới hơn id đã có (index parameter_id, id)
+MEASUREMENT_SERIES_QUERY = """
+    SELECT id, value
+    FROM measurements
+    WHERE parameter_id = %s AND id > %s
+    ORDER BY id
+"""
+
+# Toàn bộ dữ liệu đo của model trong khoảng thời gian: đi từ parameters (index model_id)
+# rồi quét theo khoảng idx_measurements_param_time của từng thông số
+MODEL_MEASUREMENTS_QUERY = """
+    SELECT m.parameter_id, m.product_id, m.measured_at, m.value
+    FROM parameters p
+    JOIN measurements m ON m.parameter_id = p.id
+    WHERE p.model_id = %s AND m.measured_at >= %s AND m.measured_at < %s
+    ORDER BY m.parameter_id, m.measured_at
+"""
+
+# Cùng dữ liệu nhưng sắp theo thời gian, để ghi báo cáo theo luồng (đọc từng khối)
+MODEL_MEASUREMENTS_STREAM_QUERY = """
+    SELECT m.parameter_id, m.measured_at, m.value
+    FROM parameters p
+    JOIN measurements m ON m.parameter_id = p.id
+    WHERE p.model_id = %s AND m.measured_at >= %s AND m.measured_at < %s
+    ORDER BY m.measured_at, m.id
+"""
+
+# Số dòng mỗi khối khi đọc dữ liệu báo cáo theo luồng
+REPORT_CHUNK_SIZE = 50000
+
+# Thống kê tính trực tiếp trong MySQL (STDDEV_SAMP khớp với pandas std, ddof=1)
+MODEL_STATISTICS_QUERY = """
+    SELECT m.parameter_id, MIN(m.value) AS min, MAX(m.value) AS max, AVG(m.value) AS mean,
+           STDDEV_SAMP(m.value) AS std, COUNT(*) AS count
+    FROM parameters p
+    JOIN measurements m ON m.parameter_id = p.id
+    WHERE p.model_id = %s AND m.measured_at >= %s AND m.measured_at < %s
+    GROUP BY m.parameter_id
+"""
+
+PARAMETER_STATISTICS_QUERY = """
+    SELECT MIN(value) AS min, MAX(value) AS max, AVG(value) AS mean,
+           STDDEV_SAMP(value) AS std, COUNT(*) AS count
+    FROM measurements
+    WHERE parameter_id = %s
+"""
+
+STATISTIC_COLUMNS = ['min', 'max', 'mean', 'std', 'count']
+
+LATEST_MEASUREMENTS_QUERY = """
+    SELECT m.*, p.name as parameter_name, p.unit,
+           md.name as model_name
+    FROM measurements m
+    JOIN parameters p ON m.parameter_id = p.id
+    JOIN models md ON p.model_id = md.id
+    ORDER BY m.measured_at DESC
+    LIMIT %s
+"""
+
+MEASUREMENT_SUMMARY_QUERY = """
+    SELECT DATE(measured_at) as date, COUNT(*) as count
+    FROM measurements
+    WHERE measured_at >= %s
+    GROUP BY DATE(measured_at)
+    ORDER BY date
+"""
+
+TOTAL_PRODUCT_QUERY = "SELECT COUNT(*) FROM products WHERE model_id = %s"
+
+# Toàn bộ ma trận sản phẩm × thông số trong một truy vấn, ghép theo khoá products.id (có index).
+# LEFT JOIN để sản phẩm chưa có kết quả đo vẫn chiếm một hàng (số sản phẩm mỗi trang ổn định)
+HISTORY_QUERY = """
+    SELECT pr.id AS product_id, pr.started_at AS measured_at,
+           m.parameter_id, m.value
+    FROM (
+        SELECT id, started_at
+        FROM products
+        WHERE model_id = %s
+        ORDER BY id DESC
+        LIMIT %s
+    ) pr
+    LEFT JOIN measurements m ON m.product_id = pr.id
+    ORDER BY pr.id DESC, m.id DESC
+"""
+
+# Một trang lịch sử theo keyset: các sản phẩm có id nhỏ hơn id cuối trang trước
+HISTORY_PAGE_QUERY = """
+    SELECT pr.id AS product_id, pr.started_at AS measured_at,
+           m.parameter_id, m.value
+    FROM (
+        SELECT id, started_at
+        FROM products
+        WHERE model_id = %s AND id < %s
+        ORDER BY id DESC
+        LIMIT %s
+    ) pr
+    LEFT JOIN measurements m ON m.product_id = pr.id
+    ORDER BY pr.id DESC, m.id DESC
+"""
+
 class DashboardManager:
     def __init__(self):
         self.db_config = DatabaseConfig()
 
     def get_measurement_data(self, parameter_id, start_date=None, end_date=None):
         """Lấy dữ liệu đo cho một thông số trong khoảng thời gian"""
+        # pandas chỉ nạp khi cần DataFrame (báo cáo/thống kê), không nạp lúc khởi động
+        import pandas as pd
         connection = self.db_config.get_connection()
         if connection:
             try:
-                query = """
-                    SELECT m.measured_at, m.value, p.name as parameter_name, 
-                           p.unit, md.name as model_name
-                    FROM measurements m
-                    JOIN parameters p ON m.parameter_id = p.id
-                    JOIN models md ON p.model_id = md.id
-                    WHERE m.parameter_id = %s
-                """
+                query = MEASUREMENT_DATA_QUERY
                 params = [parameter_id]
 
                 if start_date:
@@ -46,60 +157,165 @@ class DashboardManager:
                 connection.close()
         return pd.DataFrame()
 
-    def get_parameter_statistics(self, parameter_id, start_date=None, end_date=None):
-        """Lấy thống kê của một thông số trong khoảng thời gian"""
-        df = self.get_measurement_data(parameter_id, start_date, end_date)
-        if df.empty:
-            return None
-
-        stats = {
-            'min': df['value'].min(),
-            'max': df['value'].max(),
-            'mean': df['value'].mean(),
-            'std': df['value'].std(),
-            'count': len(df)
-        }
-        return stats
-
-    def get_parameters_by_model(self, model_id):
-        """Lấy danh sách thông số của một model"""
+    def get_measurement_series(self, parameter_id, after_id=0):
+        """Lấy (id, value) của một thông số theo thứ tự ghi, chỉ các dòng có id > after_id"""
         connection = self.db_config.get_connection()
         if connection:
             try:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute(
-                    """SELECT p.*, m.name as model_name 
-                    FROM parameters p
-                    JOIN models m ON p.model_id = m.id
-                    WHERE p.model_id = %s
-                    ORDER BY p.name""",
-                    (model_id,)
-                )
+                cursor = connection.cursor()
+                cursor.execute(MEASUREMENT_SERIES_QUERY, (parameter_id, after_id or 0))
                 return cursor.fetchall()
             except Exception as e:
-                print(f"Lỗi khi lấy danh sách thông số: {e}")
+                print(f"Lỗi khi lấy dữ liệu biểu đồ: {e}")
                 return []
             finally:
                 cursor.close()
                 connection.close()
         return []
 
+    def get_parameter_statistics(self, parameter_id, start_date=None, end_date=None):
+        """Lấy thống kê của một thông số trong khoảng thời gian (tính bằng SQL, không tải dữ liệu)"""
+        connection = self.db_config.get_connection()
+        if connection:
+            try:
+                cursor = connection.cursor(dictionary=True)
+                query = PARAMETER_STATISTICS_QUERY
+                params = [parameter_id]
+                if start_date:
+                    query += " AND measured_at >= %s"
+                    params.append(start_date)
+                if end_date:
+                    query += " AND measured_at <= %s"
+                    params.append(end_date)
+                cursor.execute(query, params)
+                stats = cursor.fetchone()
+                if not stats or not stats['count']:
+                    return None
+                return stats
+            except Exception as e:
+                print(f"Lỗi khi lấy thống kê: {e}")
+                return None
+            finally:
+                cursor.close()
+                connection.close()
+        return None
+
+    @staticmethod
+    def _date_range(start_date, end_date):
+        """Chuyển khoảng ngày thành [start, end) - ngày kết thúc (kiểu date) được tính trọn ngày"""
+        if not isinstance(start_date, datetime):
+            start_date = datetime.combine(start_date, datetime.min.time())
+        if not isinstance(end_date, datetime):
+            end_date = datetime.combine(end_date, datetime.min.time()) + timedelta(days=1)
+        return start_date, end_date
+
+    def get_model_measurements(self, model_id, start_date, end_date):
+        """Toàn bộ kết quả đo của mọi thông số của model trong khoảng thời gian, một truy vấn.
+
+        Trả về DataFrame dạng cột (parameter_id, product_id, measured_at, value),
+        sắp theo thông số rồi thời gian; None nếu lỗi kết nối.
+        """
+        import pandas as pd
+        start, end = self._date_range(start_date, end_date)
+        connection = self.db_config.get_connection()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(MODEL_MEASUREMENTS_QUERY, (model_id, start, end))
+                return pd.DataFrame(cursor.fetchall(), columns=cursor.column_names)
+            except Exception as e:
+                print(f"Lỗi khi lấy dữ liệu báo cáo: {e}")
+                return None
+            finally:
+                cursor.close()
+                connection.close()
+        return None
+
+    def get_model_statistics(self, model_id, start_date, end_date):
+        """Thống kê min/max/mean/std/count của mọi thông số của model, tính bằng SQL.
+
+        Dùng khi chỉ cần thống kê (không cần dữ liệu thô). Trả về dict
+        parameter_id -> dict thống kê; None nếu lỗi kết nối.
+        """
+        start, end = self._date_range(start_date, end_date)
+        connection = self.db_config.get_connection()
+        if connection:
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(MODEL_STATISTICS_QUERY, (model_id, start, end))
+                return {row.pop('parameter_id'): row for row in cursor.fetchall()}
+            except Exception as e:
+                print(f"Lỗi khi lấy thống kê: {e}")
+                return None
+            finally:
+                cursor.close()
+                connection.close()
+        return None
+
+    def iter_model_measurements(self, model_id, start_date, end_date, chunk_size=REPORT_CHUNK_SIZE):
+        """Đọc dữ liệu đo của model theo từng khối, dùng cho báo cáo lớn.
+
+        Phần tử đầu tiên là thống kê (như get_model_statistics), các phần tử
+        sau là DataFrame (parameter_id, measured_at, value) sắp theo thời gian,
+        mỗi khối tối đa chunk_size dòng. Thống kê và dữ liệu được đọc trong cùng
+        một snapshot nên số mẫu luôn khớp. Dùng với contextlib.closing để trả
+        kết nối khi dừng giữa chừng. Ném lỗi nếu không kết nối được.
+        """
+        import pandas as pd
+        start, end = self._date_range(start_date, end_date)
+        connection = self.db_config.get_connection()
+        if not connection:
+            raise ConnectionError("Không thể kết nối database")
+        finished = False
+        try:
+            connection.start_transaction(consistent_snapshot=True, readonly=True)
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(MODEL_STATISTICS_QUERY, (model_id, start, end))
+            statistics = {row.pop('parameter_id'): row for row in cursor.fetchall()}
+            cursor.close()
+            yield statistics
+
+            cursor = connection.cursor()
+            cursor.execute(MODEL_MEASUREMENTS_STREAM_QUERY, (model_id, start, end))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=cursor.column_names)
+            cursor.close()
+            finished = True
+        finally:
+            try:
+                if not finished:
+                    # Dừng giữa chừng: bỏ phần kết quả chưa đọc để trả kết nối về pool
+                    connection.consume_results()
+                connection.rollback()
+            except Exception as e:
+                print(f"[WARNING] Không thể kết thúc transaction đọc báo cáo: {e}")
+            connection.close()
+
+    @staticmethod
+    def compute_statistics(frame):
+        """Thống kê min/max/mean/std/count theo parameter_id bằng một lần groupby"""
+        if frame is None or frame.empty:
+            import pandas as pd
+            return pd.DataFrame(columns=STATISTIC_COLUMNS)
+        return frame.groupby('parameter_id', sort=False)['value'].agg(STATISTIC_COLUMNS)
+
+    def get_parameters_by_model(self, model_id):
+        """Lấy danh sách thông số của một model (từ ModelCatalog, kèm model_name)"""
+        model = ModelCatalog.get_model(model_id)
+        if not model:
+            return []
+        return [dict(param, model_name=model['name']) for param in ModelCatalog.get_parameters(model_id)]
+
     def get_latest_measurements(self, limit=10):
         """Lấy các kết quả đo gần nhất"""
         connection = self.db_config.get_connection()
         if connection:
             try:
                 cursor = connection.cursor(dictionary=True)
-                cursor.execute(
-                    """SELECT m.*, p.name as parameter_name, p.unit,
-                           md.name as model_name
-                    FROM measurements m
-                    JOIN parameters p ON m.parameter_id = p.id
-                    JOIN models md ON p.model_id = md.id
-                    ORDER BY m.measured_at DESC
-                    LIMIT %s""",
-                    (limit,)
-                )
+                cursor.execute(LATEST_MEASUREMENTS_QUERY, (limit,))
                 return cursor.fetchall()
             except Exception as e:
                 print(f"Lỗi khi lấy kết quả đo gần nhất: {e}")
@@ -116,14 +332,7 @@ class DashboardManager:
             try:
                 cursor = connection.cursor(dictionary=True)
                 start_date = datetime.now() - timedelta(days=days)
-                cursor.execute(
-                    """SELECT DATE(measured_at) as date, COUNT(*) as count
-                    FROM measurements
-                    WHERE measured_at >= %s
-                    GROUP BY DATE(measured_at)
-                    ORDER BY date""",
-                    (start_date,)
-                )
+                cursor.execute(MEASUREMENT_SUMMARY_QUERY, (start_date,))
                 return cursor.fetchall()
             except Exception as e:
                 print(f"Lỗi khi lấy tổng hợp đo: {e}")
@@ -139,11 +348,7 @@ class DashboardManager:
         if connection:
             try:
                 cursor = connection.cursor()
-                query = """
-                    SELECT COUNT(*) FROM measurements
-                    WHERE parameter_id IN (SELECT id FROM parameters WHERE model_id = %s)
-                """
-                cursor.execute(query, (model_id,))
+                cursor.execute(TOTAL_PRODUCT_QUERY, (model_id,))
                 result = cursor.fetchone()
                 return result[0] if result else 0
             except Exception as e:
@@ -156,76 +361,18 @@ class DashboardManager:
 
     def get_history_by_model(self, model_id, limit=50):
         """Lấy lịch sử đo các sản phẩm của model - mỗi hàng là 1 sản phẩm"""
-        print(f"[DEBUG] get_history_by_model called with model_id={model_id}, limit={limit}")
+        # Lấy danh sách thông số của model
+        parameters = self.get_history_parameters(model_id)
+        if not parameters:
+            return []
         connection = self.db_config.get_connection()
         if connection:
             try:
                 cursor = connection.cursor(dictionary=True)
+                cursor.execute(HISTORY_QUERY, (model_id, limit))
+                rows = cursor.fetchall()
                 
-                # Lấy danh sách thông số của model
-                cursor.execute("""
-                    SELECT id, name, unit 
-                    FROM parameters 
-                    WHERE model_id = %s 
-                    ORDER BY id
-                """, (model_id,))
-                parameters = cursor.fetchall()
-                
-                if not parameters:
-                    return []
-                
-                # Lấy các thời điểm đo khác nhau (group theo thời gian gần nhất)
-                # Giả định: các measurement cùng thời gian (trong vòng 30 giây) thuộc cùng 1 sản phẩm
-                query_time = """
-                    SELECT DISTINCT DATE_FORMAT(m.measured_at, '%Y-%m-%d %H:%i:%s') as time_group,
-                           MIN(m.measured_at) as measured_at
-                    FROM measurements m
-                    JOIN parameters p ON m.parameter_id = p.id
-                    WHERE p.model_id = %s
-                    GROUP BY DATE_FORMAT(m.measured_at, '%Y-%m-%d %H:%i:%s')
-                    ORDER BY measured_at DESC
-                    LIMIT %s
-                """
-                params_time = (model_id, limit)
-                print(f"[DEBUG] Executing time query: {query_time}")
-                print(f"[DEBUG] With params: {params_time}")
-                cursor.execute(query_time, params_time)
-                time_groups = cursor.fetchall()
-                
-                history = []
-                for i, time_group in enumerate(time_groups):
-                    # Tạo một record cho sản phẩm này
-                    product = {
-                        'STT': i + 1,
-                        'measured_at': time_group['measured_at']
-                    }
-                    
-                    # Lấy giá trị của từng thông số cho time_group này
-                    for param in parameters:
-                        query_value = """
-                            SELECT value 
-                            FROM measurements 
-                            WHERE parameter_id = %s
-                            AND DATE_FORMAT(measured_at, '%Y-%m-%d %H:%i:%s') = %s
-                            ORDER BY measured_at DESC
-                            LIMIT 1
-                        """
-                        params_value = (param['id'], time_group['time_group'])
-                        print(f"[DEBUG] Executing value query for param {param['name']}: {query_value}")
-                        print(f"[DEBUG] With params: {params_value}")
-                        cursor.execute(query_value, params_value)
-                        
-                        result = cursor.fetchone()
-                        param_key = f"{param['name']} ({param['unit']})"
-                        
-                        if result and result['value'] is not None:
-                            product[param_key] = f"{result['value']:.3f}"
-                        else:
-                            product[param_key] = "--"
-                    
-                    history.append(product)
-                
-                return history
+                return self._pivot_history(parameters, rows)
                 
             except Exception as e:
                 print(f"Lỗi khi lấy lịch sử đo: {e}")
@@ -233,4 +380,62 @@ class DashboardManager:
             finally:
                 cursor.close()
                 connection.close()
-        return [] 
\ No newline at end of file
+        return []
+
+    def get_history_parameters(self, model_id):
+        """Các thông số (id, name, unit) của model theo thứ tự cột trong bảng lịch sử"""
+        parameters = sorted(ModelCatalog.get_parameters(model_id), key=lambda p: p['id'])
+        return [{'id': p['id'], 'name': p['name'], 'unit': p['unit']} for p in parameters]
+
+    def get_history_page(self, model_id, parameters, before_id=None, limit=200):
+        """Lấy một trang lịch sử, sản phẩm mới nhất trước.
+
+        before_id: chỉ lấy sản phẩm có id nhỏ hơn (id sản phẩm cuối trang trước),
+        None để lấy trang đầu. Trả về danh sách (product_id, measured_at, values)
+        với values theo thứ tự của parameters; None nếu lỗi kết nối.
+        """
+        connection = self.db_config.get_connection()
+        if connection:
+            try:
+                cursor = connection.cursor(dictionary=True)
+                if before_id is None:
+                    cursor.execute(HISTORY_QUERY, (model_id, limit))
+                else:
+                    cursor.execute(HISTORY_PAGE_QUERY, (model_id, before_id, limit))
+                return self._group_history(parameters, cursor.fetchall())
+            except Exception as e:
+                print(f"Lỗi khi lấy lịch sử đo: {e}")
+                return None
+            finally:
+                cursor.close()
+                connection.close()
+        return None
+
+    @staticmethod
+    def _group_history(parameters, rows):
+        """Gom các dòng (sản phẩm, thông số, giá trị) thành (product_id, measured_at, values)"""
+        products = {}
+        for row in rows:
+            product = products.setdefault(row['product_id'], (row['measured_at'], {}))
+            # Các dòng đã sắp xếp theo id giảm dần: giữ giá trị mới nhất của mỗi thông số
+            if row['parameter_id'] is not None:
+                product[1].setdefault(row['parameter_id'], row['value'])
+        return [
+            (product_id, measured_at, tuple(values.get(p['id']) for p in parameters))
+            for product_id, (measured_at, values) in products.items()
+        ]
+
+    @staticmethod
+    def _pivot_history(parameters, rows):
+        """Chuyển các dòng (sản phẩm, thông số, giá trị) thành mỗi hàng 1 sản phẩm"""
+        param_keys = [f"{p['name']} ({p['unit']})" for p in parameters]
+        history = []
+        for i, (product_id, measured_at, values) in enumerate(DashboardManager._group_history(parameters, rows)):
+            record = {
+                'STT': i + 1,
+                'measured_at': measured_at
+            }
+            for param_key, value in zip(param_keys, values):
+                record[param_key] = f"{value:.3f}" if value is not None else "--"
+            history.append(record)
+        return history
@@ -1,33 +1,323 @@
 # Import config modules
 try:
-    from config.database import DatabaseConfig
+    from config.database import DatabaseConfig, DatabaseError, RejectedRowError, is_transient_error
 except ImportError:
     try:
-        from src.config.database import DatabaseConfig
+        from src.config.database import DatabaseConfig, DatabaseError, RejectedRowError, is_transient_error
     except ImportError:
-        from ..config.database import DatabaseConfig
-from datetime import datetime
+        from ..config.database import DatabaseConfig, DatabaseError, RejectedRowError, is_transient_error
+try:
+    from models.measurement_outbox import MeasurementOutbox
+except ImportError:
+    try:
+        from src.models.measurement_outbox import MeasurementOutbox
+    except ImportError:
+        from .measurement_outbox import MeasurementOutbox
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future
 
-class MeasurementManager:
-    def __init__(self):
-        self.db_config = DatabaseConfig()
+# Ghi lại cùng một client_key không tạo bản sao (cột client_key là UNIQUE)
+INSERT_MEASUREMENT = (
+    "INSERT INTO measurements (client_key, model_id, parameter_id, product_id, value, measured_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE client_key = client_key"
+)
+INSERT_PRODUCT = (
+    "INSERT INTO products (client_key, model_id, started_at) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)"
+)
+
+class MeasurementWriter:
+    """Đồng bộ nhật ký cục bộ (MeasurementOutbox) lên MySQL ở luồng nền.
+
+    submit() ghi measurement xuống nhật ký SQLite rồi trả về ngay; luồng nền
+    ghi các dòng lên MySQL bằng executemany, mỗi lô tối đa batch_size dòng trong
+    một transaction, khi đủ batch_size dòng mới, sau mỗi flush_interval giây,
+    khi gọi flush() hoặc khi đóng. Nếu MySQL không truy cập được, dữ liệu vẫn
+    nằm trong nhật ký và được thử lại với thời gian chờ tăng dần.
+
+    Future của mỗi dòng hoàn thành (True) khi dòng đã được commit lên MySQL,
+    hoặc mang exception nếu MySQL từ chối dòng đó vĩnh viễn.
+    """
 
-    def add_measurement(self, model_id, parameter_id, value):
-        """Lưu kết quả đo vào database"""
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, db_config, outbox, batch_size=200, flush_interval=0.5):
+        self.db_config = db_config
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._futures = {}
+        self._futures_lock = threading.Lock()
+        self._unsynced = 0
+        self._wakeup = threading.Event()
+        self._synced = threading.Condition()
+        self._stopping = threading.Event()
+        self._closed = False
+        self.stats = {
+            'rows_synced': 0,
+            'batches': 0,
+            'failed_rows': 0,
+            'sync_errors': 0,
+            'last_batch_size': 0,
+            'last_flush_ms': 0.0,
+            'last_sync_at': None,
+            'last_error': None,
+        }
+        self._thread = threading.Thread(target=self._run, name="MeasurementWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, model_id, parameter_id, value, product_id=None, measured_at=None, callback=None):
+        """Ghi một measurement vào nhật ký cục bộ và xếp lịch đồng bộ; trả về Future.
+
+        product_id là local id trả về từ MeasurementManager.create_product().
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        if self._closed:
+            future.set_exception(RuntimeError("MeasurementWriter đã đóng"))
+            return future
+        client_key = self.outbox.append(
+            model_id, parameter_id, value,
+            local_product_id=product_id, measured_at=measured_at
+        )
+        with self._futures_lock:
+            self._futures[client_key] = future
+            self._unsynced += 1
+            if self._unsynced >= self.batch_size:
+                self._wakeup.set()
+        return future
+
+    def flush(self, timeout=None):
+        """Đồng bộ ngay và đợi tới khi nhật ký trống; trả về False nếu hết thời gian"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._synced:
+            while self.outbox.depth() > 0:
+                self._wakeup.set()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._synced.wait(remaining)
+        return True
+
+    def status(self):
+        """Độ sâu hàng đợi, độ trễ đồng bộ và trạng thái lần đồng bộ gần nhất"""
+        status = dict(self.stats)
+        status['depth'] = self.outbox.depth()
+        status['lag'] = self.outbox.oldest_age()
+        status['failed'] = self.outbox.failed_count()
+        return status
+
+    def close(self, timeout=10):
+        """Thử đồng bộ lần cuối rồi dừng luồng nền; dòng chưa ghi được vẫn nằm trong nhật ký"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        delay = self.flush_interval
+        while not self._stopping.is_set():
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if self._sync_pending():
+                delay = self.flush_interval
+            else:
+                # MySQL không truy cập được: thử lại thưa dần
+                delay = min(max(delay, self.flush_interval) * 2, self.MAX_RETRY_DELAY)
+        self._sync_pending()
+
+    def _sync_pending(self):
+        """Đồng bộ tới khi nhật ký trống; trả về False nếu không ghi được lên MySQL"""
+        with self._futures_lock:
+            self._unsynced = 0
         connection = self.db_config.get_connection()
-        if connection:
+        if connection is None:
+            self._record_error("Không thể kết nối database")
+            return False
+        try:
+            cursor = connection.cursor()
             try:
-                cursor = connection.cursor()
-                cursor.execute(
-                    "INSERT INTO measurements (model_id, parameter_id, value, measured_at) VALUES (%s, %s, %s, %s)",
-                    (model_id, parameter_id, value, datetime.now())
-                )
-                connection.commit()
-                return cursor.lastrowid
-            except Exception as e:
-                print(f"Lỗi khi lưu kết quả đo: {e}")
-                return None
+                self._sync_products(connection, cursor)
+                while True:
+                    rows = self.outbox.peek(self.batch_size)
+                    if not rows:
+                        break
+                    self._sync_batch(connection, cursor, rows)
             finally:
                 cursor.close()
-                connection.close()
-        return None 
\ No newline at end of file
+            self.stats['last_sync_at'] = time.time()
+            self.stats['last_error'] = None
+            return True
+        except Exception as e:
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            self._record_error(e)
+            return False
+        finally:
+            connection.close()
+            with self._synced:
+                self._synced.notify_all()
+
+    def _sync_products(self, connection, cursor):
+        for product in self.outbox.pending_products():
+            cursor.execute(INSERT_PRODUCT, (
+                product['client_key'], product['model_id'], product['started_at']
+            ))
+            connection.commit()
+            self.outbox.set_product_server_id(product['local_id'], cursor.lastrowid)
+
+    def _sync_batch(self, connection, cursor, rows):
+        start = time.perf_counter()
+        params = [self._row_params(row) for row in rows]
+        try:
+            cursor.executemany(INSERT_MEASUREMENT, params)
+            connection.commit()
+            synced = rows
+        except DatabaseError as e:
+            if is_transient_error(e) or not isinstance(e, RejectedRowError):
+                # Lỗi tạm thời (mất kết nối, khoá, deadlock...): giữ nguyên nhật ký, thử lại sau
+                raise
+            # Có dòng bị từ chối (vd. thông số đã bị xoá): ghi từng dòng, tách dòng lỗi ra
+            connection.rollback()
+            synced = []
+            for row, row_params in zip(rows, params):
+                try:
+                    cursor.execute(INSERT_MEASUREMENT, row_params)
+                    connection.commit()
+                    synced.append(row)
+                except DatabaseError as e:
+                    if is_transient_error(e) or not isinstance(e, RejectedRowError):
+                        # Các dòng đã commit sẽ được ghi lại (client_key UNIQUE nên không trùng)
+                        raise
+                    connection.rollback()
+                    print(f"Kết quả đo {row['client_key']} bị database từ chối: {e}")
+                    self.outbox.mark_failed(row['seq'], e)
+                    self.stats['failed_rows'] += 1
+                    self._resolve(row['client_key'], e)
+
+        self.outbox.remove([row['seq'] for row in synced])
+        for row in synced:
+            self._resolve(row['client_key'])
+        self.stats['rows_synced'] += len(synced)
+        self.stats['batches'] += 1
+        self.stats['last_batch_size'] = len(rows)
+        self.stats['last_flush_ms'] = (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _row_params(row):
+        return (row['client_key'], row['model_id'], row['parameter_id'],
+                row['product_id'], row['value'], row['measured_at'])
+
+    def _resolve(self, client_key, error=None):
+        with self._futures_lock:
+            future = self._futures.pop(client_key, None)
+        if future is None:
+            return
+        if error is None:
+            future.set_result(True)
+        else:
+            future.set_exception(error)
+
+    def _record_error(self, error):
+        self.stats['sync_errors'] += 1
+        if self.stats['last_error'] != str(error):
+            print(f"Chưa đồng bộ được kết quả đo lên MySQL (vẫn lưu trong nhật ký cục bộ): {error}")
+        self.stats['last_error'] = str(error)
+
+class MeasurementManager:
+    # Cấu hình ghi theo lô
+    WRITE_BATCH_SIZE = int(os.getenv('MEASUREMENT_BATCH_SIZE') or '200')
+    WRITE_FLUSH_INTERVAL = float(os.getenv('MEASUREMENT_FLUSH_INTERVAL') or '0.5')
+    # Nhật ký cục bộ
+    OUTBOX_PATH = os.getenv('OUTBOX_PATH') or os.path.join('data', 'outbox.db')
+    OUTBOX_SYNCHRONOUS = os.getenv('OUTBOX_SYNCHRONOUS') or 'FULL'
+
+    _writer = None
+    _writer_lock = threading.Lock()
+
+    def __init__(self):
+        self.db_config = DatabaseConfig()
+
+    @staticmethod
+    def get_writer():
+        """Lấy MeasurementWriter dùng chung cho toàn bộ tiến trình"""
+        if MeasurementManager._writer is None:
+            with MeasurementManager._writer_lock:
+                if MeasurementManager._writer is None:
+                    outbox = MeasurementOutbox(
+                        MeasurementManager.OUTBOX_PATH,
+                        synchronous=MeasurementManager.OUTBOX_SYNCHRONOUS
+                    )
+                    MeasurementManager._writer = MeasurementWriter(
+                        DatabaseConfig(),
+                        outbox,
+                        batch_size=MeasurementManager.WRITE_BATCH_SIZE,
+                        flush_interval=MeasurementManager.WRITE_FLUSH_INTERVAL
+                    )
+                    atexit.register(MeasurementManager.close_writer)
+        return MeasurementManager._writer
+
+    @staticmethod
+    def close_writer():
+        """Đồng bộ lần cuối và dừng luồng ghi (gọi khi thoát)"""
+        with MeasurementManager._writer_lock:
+            writer = MeasurementManager._writer
+            MeasurementManager._writer = None
+        if writer is not None:
+            writer.close()
+            writer.outbox.close()
+
+    @staticmethod
+    def get_sync_status():
+        """Trạng thái nhật ký cục bộ: depth (số dòng chờ), lag (giây), failed, last_error..."""
+        return MeasurementManager.get_writer().status()
+
+    def create_product(self, model_id):
+        """Tạo sản phẩm mới để gom các kết quả đo của cùng một sản phẩm.
+
+        Sản phẩm được ghi vào nhật ký cục bộ nên không cần MySQL; trả về local id
+        để truyền vào add_measurement()/add_measurement_async().
+        """
+        try:
+            return self.get_writer().outbox.add_product(model_id)
+        except Exception as e:
+            print(f"Lỗi khi tạo sản phẩm: {e}")
+            return None
+
+    def add_measurement_async(self, model_id, parameter_id, value, product_id=None, callback=None,
+                              measured_at=None):
+        """Ghi kết quả đo vào nhật ký cục bộ, đồng bộ lên MySQL ở nền.
+
+        measured_at: thời điểm nhận mẫu từ thiết bị (mặc định là lúc gọi).
+        Trả về Future; callback(future) được gọi trên luồng ghi khi dòng đã
+        được commit lên MySQL (future.result() là True) hoặc bị từ chối.
+        """
+        return self.get_writer().submit(
+            model_id, parameter_id, value,
+            product_id=product_id, measured_at=measured_at, callback=callback
+        )
+
+    def add_measurement(self, model_id, parameter_id, value, product_id=None, measured_at=None):
+        """Lưu kết quả đo; trả về True khi đã ghi xuống nhật ký cục bộ (bền vững)"""
+        try:
+            self.add_measurement_async(model_id, parameter_id, value, product_id=product_id,
+                                       measured_at=measured_at)
+            return True
+        except Exception as e:
+            print(f"Lỗi khi lưu kết quả đo: {e}")
+            return None
+
+    def flush(self, timeout=None):
+        """Đợi tới khi mọi kết quả đo trong nhật ký đã được đồng bộ lên MySQL"""
+        if MeasurementManager._writer is not None:
+            return MeasurementManager._writer.flush(timeout)
+        return True
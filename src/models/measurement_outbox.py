@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class MeasurementOutbox:
+    """Nhật ký cục bộ (SQLite) cho kết quả đo chưa được ghi lên MySQL.
+
+    Mọi measurement được ghi vào đây trước (commit xuống đĩa), sau đó luồng
+    đồng bộ đọc theo lô để ghi lên MySQL và xoá các dòng đã ghi. Mỗi dòng có
+    client_key (UUID) để việc ghi lại sau khi lỗi giữa chừng không tạo bản sao.
+
+    Sản phẩm tạo khi mất kết nối cũng nằm ở đây với local_id; server_id được
+    điền khi sản phẩm đã có trên MySQL.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            local_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_key TEXT NOT NULL UNIQUE,
+            model_id INTEGER,
+            started_at TEXT NOT NULL,
+            server_id INTEGER,
+            last_used_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS measurements (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_key TEXT NOT NULL UNIQUE,
+            model_id INTEGER,
+            parameter_id INTEGER,
+            local_product_id INTEGER,
+            value REAL NOT NULL,
+            measured_at TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS failed_measurements (
+            seq INTEGER PRIMARY KEY,
+            client_key TEXT NOT NULL,
+            model_id INTEGER,
+            parameter_id INTEGER,
+            local_product_id INTEGER,
+            value REAL NOT NULL,
+            measured_at TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            error TEXT,
+            failed_at REAL NOT NULL
+        );
+    """
+
+    # Sản phẩm đã đồng bộ được giữ lại chừng này giây kể từ lần đo cuối (last_used_at)
+    # để các lần đo sau của cùng sản phẩm còn tham chiếu được
+    PRODUCT_RETENTION = 24 * 3600
+
+    def __init__(self, path, synchronous='FULL'):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript(self.SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(products)")]
+        if 'last_used_at' not in columns:
+            # Nhật ký tạo trước khi có cột last_used_at
+            self._conn.execute("ALTER TABLE products ADD COLUMN last_used_at REAL")
+            self._conn.execute("UPDATE products SET last_used_at = ?", (time.time(),))
+        # Số dòng chờ/bị từ chối giữ trong bộ nhớ: status() được gọi định kỳ từ luồng giao diện
+        self._depth = self._conn.execute("SELECT COUNT(*) FROM measurements").fetchone()[0]
+        self._failed = self._conn.execute("SELECT COUNT(*) FROM failed_measurements").fetchone()[0]
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN ... COMMIT (gọi khi giữ _lock); lỗi giữa chừng thì ROLLBACK để kết nối
+        không bị kẹt trong một transaction không bao giờ commit"""
+        self._conn.execute("BEGIN")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+
+    def add_product(self, model_id, started_at=None):
+        """Ghi sản phẩm mới vào nhật ký, trả về local_id"""
+        started_at = started_at or datetime.now()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO products (client_key, model_id, started_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (str(uuid.uuid4()), model_id, started_at.isoformat(sep=' '), time.time())
+            )
+            return cursor.lastrowid
+
+    def append(self, model_id, parameter_id, value, local_product_id=None, measured_at=None):
+        """Ghi một measurement vào nhật ký; trả về client_key khi đã commit"""
+        client_key = str(uuid.uuid4())
+        measured_at = measured_at or datetime.now()
+        now = time.time()
+        with self._lock:
+            with self._transaction():
+                self._conn.execute(
+                    "INSERT INTO measurements (client_key, model_id, parameter_id, local_product_id, "
+                    "value, measured_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (client_key, model_id, parameter_id, local_product_id, value,
+                     measured_at.isoformat(sep=' '), now)
+                )
+                if local_product_id is not None:
+                    self._conn.execute(
+                        "UPDATE products SET last_used_at = ? WHERE local_id = ?",
+                        (now, local_product_id)
+                    )
+            self._depth += 1
+        return client_key
+
+    def pending_products(self):
+        """Các sản phẩm chưa có trên MySQL"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT local_id, client_key, model_id, started_at FROM products "
+                "WHERE server_id IS NULL ORDER BY local_id"
+            ).fetchall()
+        return [
+            {'local_id': r[0], 'client_key': r[1], 'model_id': r[2],
+             'started_at': datetime.fromisoformat(r[3])}
+            for r in rows
+        ]
+
+    def set_product_server_id(self, local_id, server_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE products SET server_id = ? WHERE local_id = ?",
+                (server_id, local_id)
+            )
+
+    def peek(self, limit):
+        """Lấy tối đa limit measurement cũ nhất có thể đồng bộ (sản phẩm đã có server_id)"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT m.seq, m.client_key, m.model_id, m.parameter_id, p.server_id,
+                       m.value, m.measured_at
+                FROM measurements m
+                LEFT JOIN products p ON m.local_product_id = p.local_id
+                WHERE m.local_product_id IS NULL OR p.server_id IS NOT NULL
+                ORDER BY m.seq
+                LIMIT ?
+                """,
+                (limit,)
+            ).fetchall()
+        return [
+            {'seq': r[0], 'client_key': r[1], 'model_id': r[2], 'parameter_id': r[3],
+             'product_id': r[4], 'value': r[5], 'measured_at': datetime.fromisoformat(r[6])}
+            for r in rows
+        ]
+
+    def remove(self, seqs):
+        """Xoá các measurement đã ghi thành công lên MySQL"""
+        if not seqs:
+            return
+        with self._lock:
+            with self._transaction():
+                removed = self._conn.executemany(
+                    "DELETE FROM measurements WHERE seq = ?", [(s,) for s in seqs]
+                ).rowcount
+                # Sản phẩm đang được giao diện dùng vẫn có lần đo gần đây nên không bị xoá
+                self._conn.execute(
+                    "DELETE FROM products WHERE server_id IS NOT NULL AND last_used_at < ? "
+                    "AND local_id NOT IN (SELECT local_product_id FROM measurements "
+                    "WHERE local_product_id IS NOT NULL)",
+                    (time.time() - self.PRODUCT_RETENTION,)
+                )
+            self._depth -= removed
+
+    def mark_failed(self, seq, error):
+        """Chuyển measurement bị MySQL từ chối vĩnh viễn sang bảng failed_measurements"""
+        with self._lock:
+            with self._transaction():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO failed_measurements "
+                    "SELECT seq, client_key, model_id, parameter_id, local_product_id, value, "
+                    "measured_at, created_at, ?, ? FROM measurements WHERE seq = ?",
+                    (str(error), time.time(), seq)
+                )
+                moved = self._conn.execute("DELETE FROM measurements WHERE seq = ?", (seq,)).rowcount
+            self._depth -= moved
+            self._failed = self._conn.execute("SELECT COUNT(*) FROM failed_measurements").fetchone()[0]
+
+    def depth(self):
+        """Số measurement đang chờ đồng bộ"""
+        return self._depth
+
+    def oldest_age(self):
+        """Tuổi (giây) của measurement chờ lâu nhất, 0 nếu hàng đợi trống"""
+        # created_at tăng theo seq: đọc dòng đầu theo khoá chính, không quét cả bảng
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM measurements ORDER BY seq LIMIT 1"
+            ).fetchone()
+        return time.time() - row[0] if row is not None else 0.0
+
+    def failed_count(self):
+        return self._failed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,195 @@
+# Import config modules
+try:
+    from config.database import DatabaseConfig
+except ImportError:
+    try:
+        from src.config.database import DatabaseConfig
+    except ImportError:
+        from ..config.database import DatabaseConfig
+import os
+import threading
+import time
+
+CATALOG_VERSION_QUERY = "SELECT version FROM catalog_version WHERE id = 1"
+BUMP_CATALOG_VERSION = "UPDATE catalog_version SET version = version + 1 WHERE id = 1"
+CATALOG_MODELS_QUERY = "SELECT * FROM models ORDER BY name"
+CATALOG_PARAMETERS_QUERY = "SELECT * FROM parameters ORDER BY model_id, name"
+
+
+class ModelCatalog:
+    """Cache dùng chung (cả tiến trình) cho danh sách model và thông số.
+
+    Hai bảng được nạp trọn bằng hai truy vấn rồi giữ trong bộ nhớ. Mỗi lần ghi
+    qua ModelManager tăng catalog_version.version trong cùng transaction và xoá
+    cache của tiến trình này; thay đổi từ máy khác được phát hiện bằng cách đọc
+    version (tra theo khoá chính), tối đa một lần mỗi CHECK_INTERVAL giây.
+    Giữa hai lần kiểm tra, dữ liệu trả về từ bộ nhớ, không truy vấn database.
+    Kết quả trả về là bản sao nên nơi gọi có thể sửa tuỳ ý.
+
+    Truy vấn database chạy ngoài _lock (chỉ một luồng nạp tại một thời điểm),
+    kết quả được thay vào cache khi giữ _lock: trong lúc đang nạp, các luồng
+    khác vẫn nhận bản cache cũ ngay. Database lỗi hoặc không kết nối được thì
+    tiếp tục dùng cache và chỉ thử lại sau CHECK_INTERVAL giây.
+    """
+
+    # Số giây giữa hai lần kiểm tra version (0 = kiểm tra mỗi lần đọc)
+    CHECK_INTERVAL = float(os.getenv('CATALOG_CHECK_INTERVAL') or '5')
+
+    _lock = threading.Lock()          # bảo vệ dữ liệu cache, không giữ trong lúc truy vấn
+    _refresh_lock = threading.Lock()  # chỉ một luồng truy vấn database để nạp lại
+    _models = None        # danh sách model, sắp theo tên
+    _models_by_id = {}
+    _parameters = {}      # model_id -> danh sách thông số, sắp theo tên
+    _version = None
+    _checked_at = None    # lần kiểm tra gần nhất (kể cả khi lỗi), None = phải nạp lại
+    _generation = 0       # tăng mỗi lần invalidate(): bỏ kết quả nạp bắt đầu trước đó
+
+    @staticmethod
+    def get_all_models():
+        """Danh sách model, sắp theo tên"""
+        ModelCatalog._refresh()
+        with ModelCatalog._lock:
+            return [dict(model) for model in ModelCatalog._models or []]
+
+    @staticmethod
+    def get_model(model_id):
+        """Thông tin một model, None nếu không có"""
+        ModelCatalog._refresh()
+        with ModelCatalog._lock:
+            model = ModelCatalog._models_by_id.get(model_id)
+            return dict(model) if model else None
+
+    @staticmethod
+    def get_parameters(model_id):
+        """Thông số của model, sắp theo tên"""
+        ModelCatalog._refresh()
+        with ModelCatalog._lock:
+            return [dict(param) for param in ModelCatalog._parameters.get(model_id, [])]
+
+    @staticmethod
+    def invalidate():
+        """Xoá cache; lần đọc sau nạp lại từ database"""
+        with ModelCatalog._lock:
+            ModelCatalog._models = None
+            ModelCatalog._models_by_id = {}
+            ModelCatalog._parameters = {}
+            ModelCatalog._version = None
+            ModelCatalog._checked_at = None
+            ModelCatalog._generation += 1
+
+    @staticmethod
+    def bump_version(cursor):
+        """Tăng catalog_version trong transaction đang ghi models/parameters (gọi trước commit)"""
+        try:
+            cursor.execute(BUMP_CATALOG_VERSION)
+        except Exception as e:
+            # Database chưa chạy migration: các máy khác chỉ thấy thay đổi khi tự nạp lại
+            print(f"[WARNING] Không cập nhật được catalog_version: {e}")
+
+    @staticmethod
+    def has_changed():
+        """True nếu danh mục trên database khác với bản đang cache (một truy vấn theo khoá chính)"""
+        connection = DatabaseConfig.get_connection()
+        if not connection:
+            return False
+        try:
+            cursor = connection.cursor()
+            try:
+                version = ModelCatalog._read_version(cursor)
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+        return version is None or version != ModelCatalog._version
+
+    @staticmethod
+    def _read_version(cursor):
+        try:
+            cursor.execute(CATALOG_VERSION_QUERY)
+            row = cursor.fetchone()
+        except Exception as e:
+            print(f"[WARNING] Không đọc được catalog_version: {e}")
+            return None
+        if row is None:
+            return None
+        return row['version'] if isinstance(row, dict) else row[0]
+
+    @staticmethod
+    def _is_fresh():
+        """Chưa cần kiểm tra lại database (gọi khi giữ _lock)"""
+        checked_at = ModelCatalog._checked_at
+        return checked_at is not None and time.monotonic() - checked_at < ModelCatalog.CHECK_INTERVAL
+
+    @staticmethod
+    def _refresh():
+        """Nạp lại cache nếu đã quá CHECK_INTERVAL và version trên database đã đổi"""
+        for _ in range(3):
+            with ModelCatalog._lock:
+                if ModelCatalog._is_fresh():
+                    return
+                has_cache = ModelCatalog._models is not None
+            # Đã có cache thì không đợi luồng khác đang nạp: dùng bản cache hiện tại
+            if not ModelCatalog._refresh_lock.acquire(blocking=not has_cache):
+                return
+            try:
+                with ModelCatalog._lock:
+                    if ModelCatalog._is_fresh():
+                        return
+                    generation = ModelCatalog._generation
+                    cached_version = ModelCatalog._version if ModelCatalog._models is not None else None
+                loaded = ModelCatalog._fetch(cached_version)
+                with ModelCatalog._lock:
+                    if generation != ModelCatalog._generation:
+                        # invalidate() trong lúc nạp: dữ liệu vừa đọc có thể đã cũ, nạp lại
+                        continue
+                    ModelCatalog._checked_at = time.monotonic()
+                    if loaded is not None:
+                        version, models, parameters = loaded
+                        if models is not None:
+                            ModelCatalog._models = models
+                            ModelCatalog._models_by_id = {model['id']: model for model in models}
+                            ModelCatalog._parameters = parameters
+                        ModelCatalog._version = version
+                    return
+            finally:
+                ModelCatalog._refresh_lock.release()
+
+    @staticmethod
+    def _fetch(cached_version):
+        """Đọc version và (nếu khác cached_version) toàn bộ danh mục từ database.
+
+        Trả về (version, models, parameters), models là None nếu không đổi;
+        None nếu lỗi (tiếp tục dùng cache).
+        """
+        connection = DatabaseConfig.get_connection()
+        if not connection:
+            print("[WARNING] Không kết nối được database, dùng danh mục model đã cache")
+            return None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                # Cùng một snapshot nên version khớp với dữ liệu nạp sau đó
+                version = ModelCatalog._read_version(cursor)
+                if cached_version is not None and version == cached_version:
+                    return version, None, None
+                models, parameters = ModelCatalog._load(cursor)
+                return version, models, parameters
+            finally:
+                cursor.close()
+        except Exception as e:
+            print(f"[WARNING] Lỗi khi nạp danh mục model, dùng danh mục đã cache: {e}")
+            return None
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _load(cursor):
+        cursor.execute(CATALOG_MODELS_QUERY)
+        models = cursor.fetchall()
+        cursor.execute(CATALOG_PARAMETERS_QUERY)
+        parameters = {}
+        for param in cursor.fetchall():
+            parameters.setdefault(param['model_id'], []).append(param)
+        print(f"[INFO] Đã nạp danh mục: {len(models)} model, "
+              f"{sum(len(p) for p in parameters.values())} thông số")
+        return models, parameters
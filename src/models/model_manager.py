@@ -1,18 +1,39 @@
-import mysql.connector
-
 # Import config modules
 try:
-    from config.database import DatabaseConfig
+    from config.database import DatabaseConfig, DatabaseError
+except ImportError:
+    try:
+        from src.config.database import DatabaseConfig, DatabaseError
+    except ImportError:
+        from ..config.database import DatabaseConfig, DatabaseError
+try:
+    from models.model_catalog import ModelCatalog
+except ImportError:
+    try:
+        from src.models.model_catalog import ModelCatalog
+    except ImportError:
+        from .model_catalog import ModelCatalog
+try:
+    from config.logger import get_logger
 except ImportError:
     try:
-        from src.config.database import DatabaseConfig
+        from src.config.logger import get_logger
     except ImportError:
-        from ..config.database import DatabaseConfig
+        from ..config.logger import get_logger
+
+logger = get_logger('models.model_manager')
 
 class ModelManager:
     def __init__(self):
         self.db_config = DatabaseConfig()
 
+    @staticmethod
+    def _commit_catalog_change(conn, cursor):
+        """Commit thay đổi models/parameters kèm tăng catalog_version để cache ở mọi máy được nạp lại"""
+        ModelCatalog.bump_version(cursor)
+        conn.commit()
+        ModelCatalog.invalidate()
+
     def add_model(self, name, description="", image_path=None, template_path=None):
         """Thêm model mới với hình ảnh và template"""
         try:
@@ -24,7 +45,7 @@ class ModelManager:
             """
             cursor.execute(query, (name, description, image_path, template_path))
             model_id = cursor.lastrowid
-            conn.commit()
+            self._commit_catalog_change(conn, cursor)
             return model_id
         except Exception as err:
             print(f"Lỗi khi thêm model: {err}")
@@ -37,20 +58,19 @@ class ModelManager:
         """Thêm thông số mới cho model"""
         try:
             conn = self.db_config.get_connection()
-            print("[DEBUG] Đang kết nối tới database:", conn.database)
             cursor = conn.cursor()
             query = """
                 INSERT INTO parameters (model_id, name, unit, description, min_value, max_value)
                 VALUES (%s, %s, %s, %s, %s, %s)
             """
-            print("[DEBUG] Thực thi query:", query)
-            print("[DEBUG] Với dữ liệu:", (model_id, name, unit, description, min_value, max_value))
+            logger.debug("Thêm thông số %r cho model %s (%s..%s) vào %s",
+                         name, model_id, min_value, max_value, conn.database)
             cursor.execute(query, (model_id, name, unit, description, min_value, max_value))
             parameter_id = cursor.lastrowid
-            conn.commit()
-            print("[DEBUG] Kết quả insert parameter_id:", parameter_id)
+            self._commit_catalog_change(conn, cursor)
+            logger.debug("Đã thêm thông số id=%s", parameter_id)
             return parameter_id
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print("[ERROR] Lỗi khi thêm thông số:")
             print("[ERROR] Query:", query)
             print("[ERROR] Dữ liệu:", (model_id, name, unit, description, min_value, max_value))
@@ -61,46 +81,12 @@ class ModelManager:
                 conn.close()
 
     def get_all_models(self):
-        print("Bắt đầu get_all_models trong ModelManager")
-        try:
-            conn = self.db_config.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = "SELECT * FROM models ORDER BY name"
-            cursor.execute(query)
-            models = cursor.fetchall()
-            print(f"Truy vấn thành công, số model: {len(models)}")
-            return models
-        except Exception as err:
-            print(f"Lỗi khi lấy danh sách model: {err}")
-            return []
-        finally:
-            if 'conn' in locals():
-                conn.close()
-        print("Kết thúc get_all_models trong ModelManager")
+        """Danh sách model (từ ModelCatalog)"""
+        return ModelCatalog.get_all_models()
 
     def get_parameters_by_model(self, model_id):
-        """Lấy danh sách thông số của model"""
-        try:
-            conn = self.db_config.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-                SELECT * FROM parameters 
-                WHERE model_id = %s 
-                ORDER BY name
-            """
-            cursor.execute(query, (model_id,))
-            parameters = cursor.fetchall()
-            
-            return parameters
-            
-        except mysql.connector.Error as err:
-            print(f"Lỗi khi lấy danh sách thông số: {err}")
-            return []
-            
-        finally:
-            if 'conn' in locals():
-                conn.close()
+        """Lấy danh sách thông số của model (từ ModelCatalog)"""
+        return ModelCatalog.get_parameters(model_id)
 
     def update_model(self, model_id, name, description=""):
         """Cập nhật thông tin model"""
@@ -115,10 +101,10 @@ class ModelManager:
             """
             cursor.execute(query, (name, description, model_id))
             
-            conn.commit()
+            self._commit_catalog_change(conn, cursor)
             return True
             
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print(f"Lỗi khi cập nhật model: {err}")
             return False
             
@@ -139,10 +125,10 @@ class ModelManager:
             """
             cursor.execute(query, (name, unit, description, parameter_id))
             
-            conn.commit()
+            self._commit_catalog_change(conn, cursor)
             return True
             
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print(f"Lỗi khi cập nhật thông số: {err}")
             return False
             
@@ -162,10 +148,10 @@ class ModelManager:
             # Xóa model
             cursor.execute("DELETE FROM models WHERE id = %s", (model_id,))
             
-            conn.commit()
+            self._commit_catalog_change(conn, cursor)
             return True
             
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print(f"Lỗi khi xóa model: {err}")
             return False
             
@@ -182,10 +168,10 @@ class ModelManager:
             query = "DELETE FROM parameters WHERE id = %s"
             cursor.execute(query, (parameter_id,))
             
-            conn.commit()
+            self._commit_catalog_change(conn, cursor)
             return True
             
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print(f"Lỗi khi xóa thông số: {err}")
             return False
             
@@ -194,19 +180,8 @@ class ModelManager:
                 conn.close()
 
     def get_model_by_id(self, model_id):
-        """Lấy thông tin model theo id"""
-        try:
-            conn = self.db_config.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM models WHERE id = %s", (model_id,))
-            model = cursor.fetchone()
-            return model
-        except Exception as err:
-            print(f"Lỗi khi lấy model: {err}")
-            return None
-        finally:
-            if 'conn' in locals():
-                conn.close()
+        """Lấy thông tin model theo id (từ ModelCatalog)"""
+        return ModelCatalog.get_model(model_id)
 
     def get_parameters(self, model_id):
         """Alias cho get_parameters_by_model để tương thích với các nơi gọi cũ"""
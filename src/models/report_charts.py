@@ -0,0 +1,139 @@
+import atexit
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ChartRenderCancelled(Exception):
+    """Người dùng huỷ việc tạo báo cáo (ghi dữ liệu hoặc vẽ biểu đồ)"""
+
+
+def _figure_png(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def render_parameter_charts(param_name, dates, values, histogram=None):
+    """Vẽ biểu đồ thời gian và biểu đồ phân phối của một thông số.
+
+    histogram: (số đếm, biên các khoảng) đã tính sẵn; mặc định tính từ values.
+    Dùng Figure/FigureCanvasAgg (không dùng pyplot) nên chạy được trong tiến
+    trình con hoặc luồng nền. Trả về danh sách (tên biểu đồ, ảnh PNG dạng bytes).
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    charts = []
+
+    # Biểu đồ đường thời gian
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    ax.plot(dates, values)
+    ax.set_title(f'Biểu đồ {param_name}')
+    ax.set_xlabel('Thời gian')
+    ax.set_ylabel('Giá trị')
+    ax.tick_params(axis='x', labelrotation=45)
+    figure.tight_layout()
+    charts.append((f'{param_name}_timeline', _figure_png(figure)))
+
+    # Biểu đồ phân phối
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    if histogram is None:
+        ax.hist(values, bins=20)
+    else:
+        counts, edges = histogram
+        ax.hist(edges[:-1], bins=edges, weights=counts)
+    ax.set_title(f'Phân phối {param_name}')
+    ax.set_xlabel('Giá trị')
+    ax.set_ylabel('Tần suất')
+    figure.tight_layout()
+    charts.append((f'{param_name}_distribution', _figure_png(figure)))
+
+    return charts
+
+
+class ReportChartRenderer:
+    """Vẽ biểu đồ của các thông số song song bằng process pool.
+
+    Mỗi thông số là một tác vụ; kết quả trả về theo đúng thứ tự đầu vào.
+    progress(done, total) được gọi sau mỗi thông số vẽ xong, is_cancelled()
+    được kiểm tra giữa các tác vụ để huỷ các tác vụ còn lại.
+
+    Pool được tạo khi vẽ lần đầu và dùng lại cho các báo cáo sau. Tiến trình
+    con luôn được tạo bằng 'spawn' (như trên Windows): fork một tiến trình Qt
+    đang có nhiều luồng (QThreadPool, MeasurementWriter, luồng đọc serial...)
+    có thể làm tiến trình con kẹt ở khoá đang bị giữ lúc fork.
+    """
+
+    # Số tiến trình vẽ; 0 = tự chọn theo số CPU, 1 = vẽ tuần tự trong tiến trình hiện tại
+    WORKERS = int(os.getenv('REPORT_CHART_WORKERS') or '0')
+
+    def __init__(self, workers=None):
+        workers = workers if workers is not None else self.WORKERS
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._executor = None
+
+    def render(self, series, progress=None, is_cancelled=None):
+        """series: danh sách tham số của render_parameter_charts. Trả về danh sách (tên, PNG)"""
+        if not series:
+            return []
+        if self.workers <= 1 or len(series) == 1:
+            return self._render_inline(series, progress, is_cancelled)
+        try:
+            return self._render_pool(series, progress, is_cancelled)
+        except (BrokenProcessPool, OSError) as e:
+            # Không tạo được tiến trình con (vd. môi trường bị hạn chế): vẽ tuần tự
+            print(f"[WARNING] Không dùng được process pool để vẽ biểu đồ, vẽ tuần tự: {e}")
+            self.close()
+            return self._render_inline(series, progress, is_cancelled)
+
+    def close(self):
+        """Dừng các tiến trình vẽ (pool được tạo lại ở lần vẽ sau)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(self.close)
+        return self._executor
+
+    def _render_inline(self, series, progress, is_cancelled):
+        results = []
+        for done, args in enumerate(series, 1):
+            if is_cancelled and is_cancelled():
+                raise ChartRenderCancelled()
+            results.extend(render_parameter_charts(*args))
+            if progress:
+                progress(done, len(series))
+        return results
+
+    def _render_pool(self, series, progress, is_cancelled):
+        results = [None] * len(series)
+        executor = self._get_executor()
+        futures = {
+            executor.submit(render_parameter_charts, *args): i
+            for i, args in enumerate(series)
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                if is_cancelled and is_cancelled():
+                    raise ChartRenderCancelled()
+                results[futures[future]] = future.result()
+                if progress:
+                    progress(done, len(series))
+        finally:
+            # Khi huỷ/lỗi: bỏ các tác vụ chưa chạy, không đợi tác vụ đang chạy
+            for future in futures:
+                future.cancel()
+        return [chart for charts in results for chart in charts]
@@ -0,0 +1,242 @@
+import math
+
+import numpy as np
+
+from models.report_charts import ChartRenderCancelled
+
+DATA_SHEET = 'Dữ liệu'
+STATISTICS_SHEET = 'Thống kê'
+INFO_COLUMNS = ['Ngày tạo', 'Từ ngày', 'Đến ngày']
+STATISTICS_COLUMNS = [
+    'Thông số', 'Giá trị nhỏ nhất', 'Giá trị lớn nhất',
+    'Giá trị trung bình', 'Độ lệch chuẩn', 'Số lượng mẫu'
+]
+
+
+def match_template_columns(columns, parameters):
+    """Cột template của từng thông số: cột đầu tiên có tên chứa tên thông số (không phân biệt hoa thường).
+
+    Trả về dict parameter_id -> chỉ số cột.
+    """
+    matched = {}
+    for param in parameters:
+        for i, col in enumerate(columns):
+            if param['name'].lower() in str(col).lower():
+                matched[param['id']] = i
+                break
+    return matched
+
+
+class ReportRowAssembler:
+    """Ghép các kết quả đo (đọc theo thứ tự thời gian) thành hàng của sheet Dữ liệu.
+
+    Hàng i chứa giá trị đo thứ i của mỗi thông số, ô không có giá trị đo giữ
+    nội dung của template. Một hàng được trả ra ngay khi mọi thông số đã có giá
+    trị thứ i (hoặc đã hết mẫu theo counts) nên chỉ phần chênh lệch giữa các
+    thông số nằm trong bộ nhớ.
+    """
+
+    def __init__(self, template_frame, columns, counts, info):
+        self.template_frame = template_frame
+        self.info = list(info)
+        self.parameter_ids = np.array(sorted(columns), dtype=np.int64)
+        self.target_columns = [columns[pid] for pid in self.parameter_ids]
+        self.counts = np.array([counts.get(pid, 0) for pid in self.parameter_ids], dtype=np.int64)
+        self.offsets = np.zeros(len(self.parameter_ids), dtype=np.int64)
+        self.total_rows = max(len(template_frame), int(self.counts.max()) if len(self.counts) else 0)
+        self._base = 0
+        self._block = np.full((0, len(self.parameter_ids)), np.nan)
+
+    def add(self, parameter_ids, values):
+        """Nhận một khối kết quả đo, trả về danh sách các hàng đã đủ dữ liệu"""
+        if len(self.parameter_ids) and len(parameter_ids):
+            pos = np.searchsorted(self.parameter_ids, parameter_ids)
+            pos = np.minimum(pos, len(self.parameter_ids) - 1)
+            keep = self.parameter_ids[pos] == parameter_ids
+            pos, values = pos[keep], values[keep]
+
+            # Thứ tự của từng giá trị trong thông số của nó (khối đã sắp theo thời gian)
+            order = np.argsort(pos, kind='stable')
+            sorted_pos = pos[order]
+            ordinal = np.empty(len(pos), dtype=np.int64)
+            ordinal[order] = np.arange(len(pos)) - np.searchsorted(sorted_pos, sorted_pos)
+            rows = self.offsets[pos] + ordinal
+            self.offsets += np.bincount(pos, minlength=len(self.offsets))
+
+            # Không ghi quá số mẫu đã tính thống kê (hàng đó có thể đã được trả ra)
+            keep = rows < self.counts[pos]
+            rows, pos, values = rows[keep], pos[keep], values[keep]
+            if len(rows):
+                self._reserve(int(rows.max()) + 1 - self._base)
+                self._block[rows - self._base, pos] = values
+
+        pending = self.offsets < self.counts
+        ready = int(self.offsets[pending].min()) if pending.any() else self.total_rows
+        return self._emit(ready)
+
+    def finish(self):
+        """Trả về các hàng còn lại (kể cả các hàng template không có dữ liệu đo)"""
+        return self._emit(self.total_rows)
+
+    def _reserve(self, size):
+        if size <= len(self._block):
+            return
+        block = np.full((max(size, 2 * len(self._block)), len(self.parameter_ids)), np.nan)
+        block[:len(self._block)] = self._block
+        self._block = block
+
+    def _emit(self, upto):
+        if upto <= self._base:
+            return []
+        count = upto - self._base
+        out = np.full((count, self.template_frame.shape[1]), None, dtype=object)
+        template_end = min(upto, len(self.template_frame))
+        if template_end > self._base:
+            # Chỉ chuyển phần template của các hàng này sang object (ô trống là None)
+            part = self.template_frame.iloc[self._base:template_end].astype(object)
+            out[:template_end - self._base] = part.where(part.notna(), None).to_numpy()
+
+        # Điền giá trị đo theo cả cột
+        block = self._block[:count]
+        for k, col in enumerate(self.target_columns):
+            filled = np.nonzero(~np.isnan(block[:, k]))[0]
+            out[filled, col] = block[filled, k]
+
+        self._block = self._block[count:].copy()
+        self._base = upto
+        return [self.info + row for row in out.tolist()]
+
+
+class ChartSeries:
+    """Dữ liệu vẽ biểu đồ của một thông số, gom dần từ các khối kết quả đo.
+
+    Biểu đồ thời gian giữ min/max của mỗi nhóm điểm liên tiếp (tối đa khoảng
+    MAX_POINTS điểm); biểu đồ phân phối được đếm dần trên BINS khoảng chia đều
+    từ min đến max (lấy từ thống kê). Bộ nhớ không phụ thuộc số mẫu.
+    """
+
+    MAX_POINTS = 4000
+    BINS = 20
+
+    def __init__(self, count, min_value, max_value):
+        self.step = max(1, math.ceil(count * 2 / self.MAX_POINTS))
+        self.edges = np.histogram_bin_edges([min_value, max_value], bins=self.BINS)
+        self.histogram = np.zeros(self.BINS, dtype=np.int64)
+        self._dates = []
+        self._values = []
+        self._pending_dates = None
+        self._pending_values = None
+
+    def add(self, dates, values):
+        self.histogram += np.histogram(values, self.edges)[0]
+        if self._pending_values is not None:
+            dates = np.concatenate([self._pending_dates, dates])
+            values = np.concatenate([self._pending_values, values])
+        usable = len(values) // self.step * self.step
+        if self.step == 1:
+            self._dates.append(dates)
+            self._values.append(values)
+        elif usable:
+            groups = values[:usable].reshape(-1, self.step)
+            offsets = np.arange(len(groups)) * self.step
+            idx = np.sort(np.stack([offsets + groups.argmin(axis=1),
+                                    offsets + groups.argmax(axis=1)], axis=1), axis=1).ravel()
+            self._dates.append(dates[idx])
+            self._values.append(values[idx])
+        self._pending_dates = dates[usable:] if self.step > 1 else None
+        self._pending_values = values[usable:] if self.step > 1 else None
+
+    def result(self):
+        """(dates, values, (histogram, edges)) để truyền cho render_parameter_charts"""
+        dates = self._dates + ([self._pending_dates] if self._pending_dates is not None else [])
+        values = self._values + ([self._pending_values] if self._pending_values is not None else [])
+        if not values:
+            return np.empty(0, dtype='datetime64[ns]'), np.empty(0), (self.histogram, self.edges)
+        return np.concatenate(dates), np.concatenate(values), (self.histogram, self.edges)
+
+
+def measured_parameters(parameters, statistics):
+    """Các thông số có kết quả đo trong khoảng thời gian của báo cáo (giữ thứ tự parameters)"""
+    return [p for p in parameters if statistics.get(p['id'], {}).get('count')]
+
+
+def statistics_rows(parameters, statistics):
+    """Các hàng của sheet Thống kê (không gồm tiêu đề)"""
+    rows = []
+    for param in measured_parameters(parameters, statistics):
+        stats = statistics[param['id']]
+        rows.append([
+            param['name'], stats['min'], stats['max'], stats['mean'], stats['std'], int(stats['count'])
+        ])
+    return rows
+
+
+def iter_report_rows(template_frame, parameters, statistics, chunks, info,
+                     is_cancelled=None, progress=None, series=None):
+    """Sinh các hàng của sheet Dữ liệu (hàng đầu là tiêu đề) từ dữ liệu đo theo khối.
+
+    statistics: dict parameter_id -> thống kê (min/max/mean/std/count);
+    chunks: các DataFrame (parameter_id, measured_at, value) sắp theo thời gian.
+    series: dict parameter_id -> ChartSeries để gom dữ liệu biểu đồ (tuỳ chọn).
+    progress(done, total): số hàng đã sinh. Ném ChartRenderCancelled nếu
+    is_cancelled() trả về True.
+    """
+    measured = measured_parameters(parameters, statistics)
+    assembler = ReportRowAssembler(
+        template_frame, match_template_columns(template_frame.columns, measured),
+        {p['id']: int(statistics[p['id']]['count']) for p in measured}, info
+    )
+    yield INFO_COLUMNS + list(template_frame.columns)
+
+    done = 0
+    for chunk in chunks:
+        if is_cancelled and is_cancelled():
+            raise ChartRenderCancelled()
+        parameter_ids = chunk['parameter_id'].to_numpy(dtype=np.int64)
+        values = chunk['value'].to_numpy(dtype=float)
+        rows = assembler.add(parameter_ids, values)
+        yield from rows
+        done += len(rows)
+        if progress:
+            progress(done, assembler.total_rows)
+
+        if series:
+            # Chia khối theo thông số cho dữ liệu biểu đồ (giữ thứ tự thời gian trong mỗi nhóm)
+            dates = chunk['measured_at'].to_numpy()
+            order = np.argsort(parameter_ids, kind='stable')
+            ids, starts = np.unique(parameter_ids[order], return_index=True)
+            for parameter_id, part in zip(ids, np.split(order, starts[1:])):
+                if parameter_id in series:
+                    series[parameter_id].add(dates[part], values[part])
+    yield from assembler.finish()
+    if progress:
+        progress(assembler.total_rows, assembler.total_rows)
+
+
+def build_report_workbook(template_frame, parameters, statistics, chunks, info, is_cancelled=None):
+    """Ghi báo cáo vào workbook openpyxl chế độ write-only theo từng khối dữ liệu.
+
+    Trả về (workbook chưa lưu, danh sách (tên thông số, dates, values, histogram)
+    để vẽ biểu đồ). Tham số như iter_report_rows.
+    """
+    from openpyxl import Workbook
+
+    measured = measured_parameters(parameters, statistics)
+    series = {
+        p['id']: ChartSeries(int(statistics[p['id']]['count']),
+                             statistics[p['id']]['min'], statistics[p['id']]['max'])
+        for p in measured
+    }
+
+    workbook = Workbook(write_only=True)
+    data_sheet = workbook.create_sheet(DATA_SHEET)
+    for row in iter_report_rows(template_frame, parameters, statistics, chunks, info,
+                                is_cancelled=is_cancelled, series=series):
+        data_sheet.append(row)
+
+    stats_sheet = workbook.create_sheet(STATISTICS_SHEET)
+    stats_sheet.append(STATISTICS_COLUMNS)
+    for row in statistics_rows(parameters, statistics):
+        stats_sheet.append(row)
+
+    return workbook, [(p['name'],) + series[p['id']].result() for p in measured]
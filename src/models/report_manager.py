@@ -1,17 +1,32 @@
+import csv
+import io
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
+from contextlib import closing
 from datetime import datetime
 from models.template_manager import TemplateManager
 from models.dashboard_manager import DashboardManager
+from models.report_charts import ReportChartRenderer, ChartRenderCancelled
+from models.report_export import build_report_workbook, iter_report_rows, statistics_rows, STATISTICS_COLUMNS
 
 class ReportManager:
     def __init__(self):
         self.template_manager = TemplateManager()
         self.dashboard_manager = DashboardManager()
+        self.chart_renderer = ReportChartRenderer()
+        # Kết quả của báo cáo tạo gần nhất (thông tin, thống kê, biểu đồ PNG), theo đường dẫn file Excel;
+        # chỉ giữ một báo cáo để ảnh biểu đồ không tích luỹ trong phiên làm việc dài
+        self.report_results = {}
         
-    def generate_report(self, template_id, model_id, start_date, end_date, output_path):
-        """Tạo báo cáo từ template"""
+    def generate_report(self, template_id, model_id, start_date, end_date, output_path,
+                        progress=None, is_cancelled=None):
+        """Tạo báo cáo từ template.
+
+        progress(done, total): tiến độ vẽ biểu đồ; is_cancelled(): trả về True để huỷ.
+        Thống kê và biểu đồ của báo cáo gần nhất được giữ trong bộ nhớ (report_results)
+        để export_to_pdf dùng lại.
+        """
+        # pandas chỉ nạp khi tạo báo cáo (giảm thời gian khởi động)
+        import pandas as pd
         try:
             # Lấy thông tin template
             templates = self.template_manager.get_all_templates()
@@ -19,130 +34,60 @@ class ReportManager:
             if not template:
                 raise ValueError("Không tìm thấy template")
                 
-            # Lấy dữ liệu đo
-            parameters = self.dashboard_manager.get_parameters_by_model(model_id)
-            measurements = {}
-            statistics = {}
-            
-            for param in parameters:
-                data = self.dashboard_manager.get_measurement_data(
-                    param['id'],
-                    start_date,
-                    end_date
-                )
-                measurements[param['name']] = data
-                
-                # Tính toán thống kê
-                stats = self.dashboard_manager.get_parameter_statistics(
-                    param['id'],
-                    start_date,
-                    end_date
-                )
-                statistics[param['name']] = stats
-                
             # Đọc template
             df_template = pd.read_excel(template['file_path'])
+            parameters = self.dashboard_manager.get_parameters_by_model(model_id)
+            info = self._report_info(start_date, end_date)
+            
+            # Đọc dữ liệu đo theo từng khối và ghi thẳng vào workbook write-only,
+            # bộ nhớ không tăng theo số kết quả đo
+            with closing(self.dashboard_manager.iter_model_measurements(
+                    model_id, start_date, end_date)) as chunks:
+                statistics = next(chunks)
+                workbook, series = build_report_workbook(
+                    df_template, parameters, statistics, chunks, info, is_cancelled
+                )
             
-            # Tạo báo cáo mới
-            df_report = df_template.copy()
-            
-            # Điền dữ liệu vào báo cáo
-            for param_name, data in measurements.items():
-                if not data:
-                    continue
-                    
-                # Tìm cột tương ứng trong template
-                col_idx = None
-                for i, col in enumerate(df_template.columns):
-                    if param_name.lower() in col.lower():
-                        col_idx = i
-                        break
-                        
-                if col_idx is not None:
-                    # Điền giá trị đo
-                    for i, row in enumerate(data):
-                        if i < len(df_report):
-                            df_report.iloc[i, col_idx] = row['value']
-                            
-            # Thêm thông tin báo cáo
-            df_report.insert(0, 'Ngày tạo', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            df_report.insert(1, 'Từ ngày', start_date.strftime('%Y-%m-%d'))
-            df_report.insert(2, 'Đến ngày', end_date.strftime('%Y-%m-%d'))
-            
-            # Tạo thư mục cho biểu đồ
-            charts_dir = os.path.join(os.path.dirname(output_path), 'charts')
-            os.makedirs(charts_dir, exist_ok=True)
-            
-            # Tạo biểu đồ cho từng thông số
-            for param_name, data in measurements.items():
-                if not data:
-                    continue
-                    
-                # Tạo biểu đồ đường thời gian
-                plt.figure(figsize=(10, 6))
-                dates = [row['timestamp'] for row in data]
-                values = [row['value'] for row in data]
-                plt.plot(dates, values)
-                plt.title(f'Biểu đồ {param_name}')
-                plt.xlabel('Thời gian')
-                plt.ylabel('Giá trị')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                
-                # Lưu biểu đồ
-                chart_path = os.path.join(charts_dir, f'{param_name}_timeline.png')
-                plt.savefig(chart_path)
-                plt.close()
-                
-                # Tạo biểu đồ phân phối
-                plt.figure(figsize=(10, 6))
-                plt.hist(values, bins=20)
-                plt.title(f'Phân phối {param_name}')
-                plt.xlabel('Giá trị')
-                plt.ylabel('Tần suất')
-                plt.tight_layout()
-                
-                # Lưu biểu đồ
-                chart_path = os.path.join(charts_dir, f'{param_name}_distribution.png')
-                plt.savefig(chart_path)
-                plt.close()
-                
-            # Tạo sheet thống kê
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                df_report.to_excel(writer, sheet_name='Dữ liệu', index=False)
-                
-                # Tạo sheet thống kê
-                stats_data = []
-                for param_name, stats in statistics.items():
-                    stats_data.append({
-                        'Thông số': param_name,
-                        'Giá trị nhỏ nhất': stats['min'],
-                        'Giá trị lớn nhất': stats['max'],
-                        'Giá trị trung bình': stats['mean'],
-                        'Độ lệch chuẩn': stats['std'],
-                        'Số lượng mẫu': stats['count']
-                    })
-                    
-                df_stats = pd.DataFrame(stats_data)
-                df_stats.to_excel(writer, sheet_name='Thống kê', index=False)
+            # Vẽ biểu đồ cho từng thông số (song song, ngoài luồng giao diện)
+            charts = self.chart_renderer.render(series, progress=progress, is_cancelled=is_cancelled)
+            if is_cancelled and is_cancelled():
+                raise ChartRenderCancelled()
                 
+            workbook.save(output_path)
+            self.report_results = {output_path: {
+                'info': info,
+                'statistics': statistics_rows(parameters, statistics),
+                'charts': charts
+            }}
             return True
             
+        except ChartRenderCancelled:
+            print("[INFO] Đã huỷ tạo báo cáo")
+            return False
         except Exception as e:
             print(f"Lỗi khi tạo báo cáo: {e}")
             return False
             
+    @staticmethod
+    def _report_info(start_date, end_date):
+        """Giá trị các cột Ngày tạo / Từ ngày / Đến ngày"""
+        return [
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            start_date.strftime('%Y-%m-%d'),
+            end_date.strftime('%Y-%m-%d')
+        ]
+
     def get_report_templates(self):
         """Lấy danh sách template có thể dùng để tạo báo cáo"""
         return self.template_manager.get_all_templates()
         
     def export_to_pdf(self, excel_path, pdf_path):
-        """Xuất báo cáo ra file PDF"""
+        """Xuất báo cáo ra file PDF từ thống kê và biểu đồ đã tính khi tạo báo cáo excel_path"""
+        result = self.report_results.get(excel_path)
+        if result is None:
+            print(f"[WARNING] Chưa có dữ liệu của báo cáo {excel_path}, hãy tạo lại báo cáo")
+            return False
         try:
-            # Đọc file Excel
-            df_data = pd.read_excel(excel_path, sheet_name='Dữ liệu')
-            df_stats = pd.read_excel(excel_path, sheet_name='Thống kê')
-            
             # Tạo file PDF
             from reportlab.lib import colors
             from reportlab.lib.pagesizes import letter
@@ -155,13 +100,14 @@ class ReportManager:
             
             # Thêm tiêu đề
             elements.append(Paragraph("Báo Cáo Đo Lường", styles['Title']))
-            elements.append(Paragraph(f"Ngày tạo: {df_data['Ngày tạo'][0]}", styles['Normal']))
-            elements.append(Paragraph(f"Từ ngày: {df_data['Từ ngày'][0]}", styles['Normal']))
-            elements.append(Paragraph(f"Đến ngày: {df_data['Đến ngày'][0]}", styles['Normal']))
+            created_at, from_date, to_date = result['info']
+            elements.append(Paragraph(f"Ngày tạo: {created_at}", styles['Normal']))
+            elements.append(Paragraph(f"Từ ngày: {from_date}", styles['Normal']))
+            elements.append(Paragraph(f"Đến ngày: {to_date}", styles['Normal']))
             
             # Thêm bảng thống kê
             elements.append(Paragraph("Thống Kê", styles['Heading1']))
-            stats_data = [df_stats.columns.tolist()] + df_stats.values.tolist()
+            stats_data = [STATISTICS_COLUMNS] + result['statistics']
             stats_table = Table(stats_data)
             stats_table.setStyle(TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
@@ -178,15 +124,12 @@ class ReportManager:
             ]))
             elements.append(stats_table)
             
-            # Thêm biểu đồ
-            charts_dir = os.path.join(os.path.dirname(excel_path), 'charts')
-            if os.path.exists(charts_dir):
+            # Thêm biểu đồ (ảnh trong bộ nhớ của chính báo cáo này)
+            if result['charts']:
                 elements.append(Paragraph("Biểu Đồ", styles['Heading1']))
-                for file in os.listdir(charts_dir):
-                    if file.endswith('.png'):
-                        img_path = os.path.join(charts_dir, file)
-                        img = Image(img_path, width=400, height=300)
-                        elements.append(img)
+                for name, png in result['charts']:
+                    img = Image(io.BytesIO(png), width=400, height=300)
+                    elements.append(img)
             
             # Tạo file PDF
             doc.build(elements)
@@ -196,16 +139,39 @@ class ReportManager:
             print(f"Lỗi khi xuất PDF: {e}")
             return False
             
-    def export_to_csv(self, excel_path, csv_path):
-        """Xuất báo cáo ra file CSV"""
+    def export_to_csv(self, template_id, model_id, start_date, end_date, csv_path,
+                      progress=None, is_cancelled=None):
+        """Xuất dữ liệu báo cáo (cùng dạng sheet Dữ liệu) ra CSV, đọc thẳng từ database.
+
+        Không cần tạo file Excel trước; dữ liệu được đọc và ghi theo từng khối
+        nên xuất được khoảng thời gian dài (vd. cả năm). progress(done, total):
+        số hàng đã ghi; is_cancelled(): trả về True để huỷ.
+        """
+        import pandas as pd
         try:
-            # Đọc file Excel
-            df_data = pd.read_excel(excel_path, sheet_name='Dữ liệu')
-            
-            # Xuất ra CSV
-            df_data.to_csv(csv_path, index=False, encoding='utf-8-sig')
+            templates = self.template_manager.get_all_templates()
+            template = next((t for t in templates if t['id'] == template_id), None)
+            if not template:
+                raise ValueError("Không tìm thấy template")
+            df_template = pd.read_excel(template['file_path'])
+            parameters = self.dashboard_manager.get_parameters_by_model(model_id)
+            info = self._report_info(start_date, end_date)
+
+            with closing(self.dashboard_manager.iter_model_measurements(
+                    model_id, start_date, end_date)) as chunks:
+                statistics = next(chunks)
+                with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    csv.writer(f).writerows(iter_report_rows(
+                        df_template, parameters, statistics, chunks, info,
+                        is_cancelled=is_cancelled, progress=progress
+                    ))
             return True
             
+        except ChartRenderCancelled:
+            print("[INFO] Đã huỷ xuất CSV")
         except Exception as e:
             print(f"Lỗi khi xuất CSV: {e}")
-            return False 
\ No newline at end of file
+        # Không để lại file CSV ghi dở
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+        return False
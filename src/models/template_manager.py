@@ -8,8 +8,6 @@ except ImportError:
         from ..config.database import DatabaseConfig
 import os
 import shutil
-from openpyxl import load_workbook
-from openpyxl.drawing.image import Image
 from datetime import datetime
 
 class TemplateManager:
@@ -104,7 +102,8 @@ class TemplateManager:
                 if not template:
                     return False
 
-                # Load template
+                # Load template (openpyxl chỉ nạp khi cần)
+                from openpyxl import load_workbook
                 wb = load_workbook(template['file_path'])
                 ws = wb.active
 
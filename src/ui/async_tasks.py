@@ -0,0 +1,162 @@
+import os
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+try:
+    from config.query_stats import QueryStats
+except ImportError:
+    try:
+        from src.config.query_stats import QueryStats
+    except ImportError:
+        from ..config.query_stats import QueryStats
+
+# Số luồng đọc database dùng chung cho giao diện (nhỏ hơn DB_POOL_SIZE để
+# còn kết nối cho luồng ghi kết quả đo và tác vụ báo cáo)
+UI_DB_WORKERS = int(os.getenv('UI_DB_WORKERS') or '3')
+
+_pool = None
+
+
+def shared_pool():
+    """QThreadPool dùng chung cho các tác vụ nền của mọi widget"""
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(max(1, UI_DB_WORKERS))
+    return _pool
+
+
+class _TaskSignals(QObject):
+    # key, generation, thành công hay không, kết quả (hoặc exception)
+    done = pyqtSignal(object, int, bool, object)
+
+
+class _Task(QRunnable):
+    def __init__(self, key, generation, fn, args, action):
+        super().__init__()
+        # Runner giữ tham chiếu tới task cho tới khi có kết quả (để có thể tryTake)
+        self.setAutoDelete(False)
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.action = action
+        self.signals = _TaskSignals()
+
+    def same_request(self, fn, args):
+        try:
+            return self.fn == fn and self.args == args
+        except (TypeError, ValueError):
+            return False
+
+    def run(self):
+        try:
+            # Truy vấn của tác vụ được ghi nhận dưới tên thao tác <widget>.<khoá>
+            with QueryStats.action(self.action):
+                result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.done.emit(self.key, self.generation, False, e)
+            return
+        self.signals.done.emit(self.key, self.generation, True, result)
+
+
+class AsyncTaskRunner(QObject):
+    """Chạy các lệnh gọi manager (truy vấn database, đọc file) của một widget ở luồng nền.
+
+    Mỗi yêu cầu có một khoá (vd. 'model', 'chart'); với mỗi khoá chỉ có tối đa
+    một tác vụ nằm trong QThreadPool dùng chung:
+    - gửi lại đúng yêu cầu đang chạy (cùng hàm, cùng tham số) thì dùng chung kết quả;
+    - yêu cầu mới hơn làm kết quả của yêu cầu cũ bị bỏ qua: tác vụ cũ chưa chạy
+      thì được rút khỏi hàng đợi, đang chạy thì yêu cầu mới nhất đợi nó xong
+      (các yêu cầu ở giữa bị bỏ).
+    on_result/on_error luôn được gọi trên luồng giao diện và chỉ cho yêu cầu
+    mới nhất của khoá. Runner là con của widget nên kết quả về sau khi widget
+    bị huỷ sẽ bị bỏ qua.
+
+    Lệnh ghi (thêm/xoá...) dùng submit_write(): mỗi lần gọi là một tác vụ riêng,
+    không bị yêu cầu sau thay thế.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = shared_pool()
+        self._keys = {}
+        self._writes = 0
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None):
+        """Chạy fn(*args) ở luồng nền; on_result(kết quả) hoặc on_error(exception) khi xong"""
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = {'generation': 0, 'task': None, 'pending': None}
+        state['on_result'] = on_result
+        state['on_error'] = on_error
+
+        task = state['task']
+        if task is not None and task.same_request(fn, args):
+            state['generation'] = task.generation
+            state['pending'] = None
+            return
+        state['generation'] += 1
+        if task is not None and self.pool.tryTake(task):
+            task = state['task'] = None
+        if task is None:
+            self._start(key, state, fn, args)
+        else:
+            state['pending'] = (fn, args)
+
+    def submit_write(self, name, fn, *args, on_result=None, on_error=None):
+        """Chạy lệnh ghi fn(*args) ở luồng nền; mọi lệnh ghi đều được chạy (không gộp, không bỏ)"""
+        self._writes += 1
+        self.submit((name, self._writes), fn, *args, on_result=on_result, on_error=on_error)
+
+    def cancel(self, key=None):
+        """Bỏ kết quả của các yêu cầu đang chờ (của một khoá hoặc tất cả).
+
+        Lệnh ghi vẫn được chạy, chỉ bỏ qua kết quả.
+        """
+        for k in ([key] if key is not None else list(self._keys)):
+            state = self._keys.get(k)
+            if state is None:
+                continue
+            state['generation'] += 1
+            state['pending'] = None
+            if state['task'] is not None and not isinstance(k, tuple) and self.pool.tryTake(state['task']):
+                state['task'] = None
+            if state['task'] is None:
+                del self._keys[k]
+
+    def is_running(self, key):
+        return key in self._keys
+
+    def _start(self, key, state, fn, args):
+        parent = self.parent()
+        name = key[0] if isinstance(key, tuple) else key
+        action = f"{type(parent).__name__}.{name}" if parent is not None else str(name)
+        task = _Task(key, state['generation'], fn, args, action)
+        task.signals.done.connect(self._on_done)
+        state['task'] = task
+        self.pool.start(task)
+
+    def _on_done(self, key, generation, ok, result):
+        state = self._keys.get(key)
+        if state is None or state['task'] is None or state['task'].generation != generation:
+            return
+        state['task'] = None
+        if generation != state['generation']:
+            # Kết quả cũ: chạy yêu cầu mới nhất (nếu có)
+            if state['pending'] is not None:
+                fn, args = state['pending']
+                state['pending'] = None
+                self._start(key, state, fn, args)
+            else:
+                del self._keys[key]
+            return
+
+        del self._keys[key]
+        if ok:
+            if state['on_result']:
+                state['on_result'](result)
+        elif state['on_error']:
+            state['on_error'](result)
+        else:
+            print(f"[WARNING] Lỗi tác vụ nền '{key}': {result}")
@@ -1,8 +1,8 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QTableWidget, QTableWidgetItem, QMessageBox, QFileDialog
+    QTableWidget, QTableWidgetItem, QMessageBox, QFileDialog, QProgressDialog
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal
 # Import model modules
 try:
     from models.backup_manager import BackupManager
@@ -13,10 +13,42 @@ except ImportError:
         from ..models.backup_manager import BackupManager
 import os
 
+class BackupWorker(QObject):
+    """Chạy sao lưu/khôi phục ở QThread riêng (tác vụ dài, giữ kết nối database suốt quá trình).
+
+    task(*args, **kwargs) được gọi trên luồng nền; với khôi phục, kwargs gồm
+    progress=... và is_cancelled=... của worker.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+
+    def __init__(self, task, *args, **kwargs):
+        super().__init__()
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def run(self):
+        try:
+            result = self.task(*self.args, **self.kwargs)
+        except Exception as e:
+            print(f"Lỗi khi chạy tác vụ sao lưu (QThread): {e}")
+            result = None
+        self.finished.emit(result)
+
 class BackupManagementWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.backup_manager = BackupManager()
+        self.backup_thread = None
+        self.backup_worker = None
         self.backup_dir = 'backups'
         os.makedirs(self.backup_dir, exist_ok=True)
         self.init_ui()
@@ -28,8 +60,12 @@ class BackupManagementWidget(QWidget):
         backup_layout = QHBoxLayout()
         create_backup_btn = QPushButton("Tạo Bản Sao Lưu")
         create_backup_btn.clicked.connect(self.create_backup)
+        # Chỉ sao lưu phần thay đổi so với bản sao lưu mới nhất
+        incremental_backup_btn = QPushButton("Sao Lưu Tăng Dần")
+        incremental_backup_btn.clicked.connect(lambda: self.create_backup(incremental=True))
         
         backup_layout.addWidget(create_backup_btn)
+        backup_layout.addWidget(incremental_backup_btn)
         
         # Bảng danh sách backup
         self.backup_table = QTableWidget()
@@ -66,11 +102,78 @@ class BackupManagementWidget(QWidget):
             row = self.backup_table.rowCount()
             self.backup_table.insertRow(row)
             self.backup_table.setItem(row, 0, QTableWidgetItem(backup["timestamp"].strftime("%Y-%m-%d %H:%M:%S")))
-            self.backup_table.setItem(row, 1, QTableWidgetItem(backup["path"]))
+            if backup["format"] < 2:
+                kind = "JSON"
+            else:
+                kind = "Tăng dần" if backup["type"] == "incremental" else "Đầy đủ"
+            self.backup_table.setItem(row, 1, QTableWidgetItem(kind))
+            for column, table_name in enumerate(["templates", "models", "parameters", "measurements"], 2):
+                count = backup["rows"].get(table_name)
+                self.backup_table.setItem(row, column, QTableWidgetItem("" if count is None else str(count)))
+            self.backup_table.setItem(row, 6, QTableWidgetItem(backup["path"]))
             
-    def create_backup(self):
+    def start_backup_task(self, label, on_finished, task, *args, cancellable=False, **kwargs):
+        """Chạy task ở QThread riêng; hộp thoại tiến độ modal chặn thao tác khác tới khi xong"""
+        self.progress_dialog = QProgressDialog(label, "Huỷ", 0, 0, self)
+        self.progress_dialog.setWindowTitle("Sao lưu")
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        # Chỉ đóng khi tác vụ kết thúc (commit/rollback xong), không đóng khi đủ tiến độ hay khi bấm huỷ
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        if not cancellable:
+            self.progress_dialog.setCancelButton(None)
+
+        # QThread có parent nên không bị huỷ khi bỏ tham chiếu lúc luồng còn đang dừng;
+        # worker được giữ qua thuộc tính của thread cho tới khi thread bị deleteLater
+        self.backup_thread = QThread(self)
+        self.backup_worker = BackupWorker(task, *args, **kwargs)
+        if cancellable:
+            self.backup_worker.kwargs.update(
+                progress=self.backup_worker.progress.emit,
+                is_cancelled=self.backup_worker.is_cancelled
+            )
+            self.progress_dialog.canceled.connect(self.cancel_backup_task)
+        self.backup_thread.worker = self.backup_worker
+        self.backup_worker.moveToThread(self.backup_thread)
+        self.backup_thread.started.connect(self.backup_worker.run)
+        self.backup_worker.progress.connect(self.update_backup_progress)
+        self.backup_worker.finished.connect(
+            lambda result: on_finished(result, self.finish_backup_task())
+        )
+        self.backup_worker.finished.connect(self.backup_thread.quit)
+        self.backup_worker.finished.connect(self.backup_worker.deleteLater)
+        self.backup_thread.finished.connect(self.backup_thread.deleteLater)
+        self.progress_dialog.show()
+        self.backup_thread.start()
+
+    def finish_backup_task(self):
+        """Đóng hộp thoại tiến độ; trả về True nếu tác vụ đã bị huỷ"""
+        cancelled = self.backup_worker is not None and self.backup_worker.is_cancelled()
+        self.backup_thread = None
+        self.backup_worker = None
+        self.progress_dialog.close()
+        return cancelled
+
+    def update_backup_progress(self, done, total):
+        self.progress_dialog.setMaximum(total)
+        self.progress_dialog.setValue(done)
+
+    def cancel_backup_task(self):
+        if self.backup_worker is not None:
+            self.backup_worker.cancel()
+            self.progress_dialog.setLabelText("Đang huỷ, dữ liệu hiện tại được giữ nguyên...")
+
+    def create_backup(self, incremental=False):
         """Tạo bản sao lưu mới"""
-        backup_path = self.backup_manager.create_backup(self.backup_dir)
+        if self.backup_thread is not None:
+            return
+        self.start_backup_task(
+            "Đang tạo bản sao lưu...", self.on_backup_created,
+            self.backup_manager.create_backup, self.backup_dir, incremental=incremental
+        )
+
+    def on_backup_created(self, backup_path, cancelled):
         if backup_path:
             QMessageBox.information(
                 self,
@@ -87,6 +190,8 @@ class BackupManagementWidget(QWidget):
             
     def restore_backup(self):
         """Khôi phục từ bản sao lưu"""
+        if self.backup_thread is not None:
+            return
         selected_items = self.backup_table.selectedItems()
         if not selected_items:
             QMessageBox.warning(self, "Cảnh báo", "Vui lòng chọn bản sao lưu cần khôi phục")
@@ -102,15 +207,24 @@ class BackupManagementWidget(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            if self.backup_manager.restore_backup(backup_path):
-                QMessageBox.information(
-                    self,
-                    "Thành công",
-                    "Đã khôi phục bản sao lưu thành công"
-                )
-            else:
-                QMessageBox.critical(
-                    self,
-                    "Lỗi",
-                    "Không thể khôi phục bản sao lưu"
-                ) 
\ No newline at end of file
+            # Khôi phục chạy trong một transaction: huỷ giữa chừng sẽ rollback
+            self.start_backup_task(
+                "Đang khôi phục dữ liệu...", self.on_backup_restored,
+                self.backup_manager.restore_backup, backup_path, cancellable=True
+            )
+
+    def on_backup_restored(self, result, cancelled):
+        if result:
+            QMessageBox.information(
+                self,
+                "Thành công",
+                "Đã khôi phục bản sao lưu thành công"
+            )
+        elif cancelled:
+            QMessageBox.information(self, "Thông báo", "Đã huỷ khôi phục, dữ liệu hiện tại được giữ nguyên")
+        else:
+            QMessageBox.critical(
+                self,
+                "Lỗi",
+                "Không thể khôi phục bản sao lưu"
+            )
@@ -1,18 +1,15 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-                            QComboBox, QTableWidget, QTableWidgetItem, QGroupBox, 
+                            QComboBox, QTableView, QHeaderView, QGroupBox, 
                             QGridLayout, QSizePolicy, QFrame, QDialog, QLineEdit, QTextEdit, QListWidget)
-from PyQt6.QtGui import QPixmap, QColor, QPalette, QPainter, QPainterPath
+from PyQt6.QtGui import QPixmap, QImage, QColor, QPalette, QPainter, QPainterPath
 from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPoint, QRect, pyqtProperty, pyqtSignal, QTimer
 import matplotlib
 matplotlib.use('Qt5Agg')  # Sử dụng Qt5Agg backend
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import os
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
-import plotly.io as pio
 
 # Import serial với error handling
 try:
@@ -39,52 +36,83 @@ except ImportError:
 
 # Import UI modules
 try:
-    from .plot_widget import PlotWidget
     from .model_selector_dialog import ModelSelectorDialog
-    from .measurement import MeasurementWidget
+    from .measurement import MeasurementWidget, UI_REFRESH_MS
+    from .live_chart import LiveChart
+    from .history_model import HistoryTableModel
+    from .async_tasks import AsyncTaskRunner
 except ImportError:
     try:
-        from src.ui.plot_widget import PlotWidget
         from src.ui.model_selector_dialog import ModelSelectorDialog
-        from src.ui.measurement import MeasurementWidget
+        from src.ui.measurement import MeasurementWidget, UI_REFRESH_MS
+        from src.ui.live_chart import LiveChart
+        from src.ui.history_model import HistoryTableModel
+        from src.ui.async_tasks import AsyncTaskRunner
     except ImportError:
-        from plot_widget import PlotWidget
         from model_selector_dialog import ModelSelectorDialog
-        from measurement import MeasurementWidget
+        from measurement import MeasurementWidget, UI_REFRESH_MS
+        from live_chart import LiveChart
+        from history_model import HistoryTableModel
+        from async_tasks import AsyncTaskRunner
+
+# Chu kỳ (ms) cập nhật trạng thái đồng bộ trên dashboard
+SYNC_STATUS_REFRESH_MS = 2000
+# Chu kỳ (ms) lấy kết quả đo mới cho biểu đồ
+CHART_REFRESH_MS = 2000
 
 # Import hardware modules
 try:
-    from hardware.device import HighGaugeDevice
+    from hardware.device_manager import DeviceManager
+except ImportError:
+    try:
+        from src.hardware.device_manager import DeviceManager
+    except ImportError:
+        from ..hardware.device_manager import DeviceManager
+try:
+    from config.logger import get_logger
 except ImportError:
     try:
-        from src.hardware.device import HighGaugeDevice
+        from src.config.logger import get_logger
     except ImportError:
-        from ..hardware.device import HighGaugeDevice
+        from ..config.logger import get_logger
+
+logger = get_logger('ui.dashboard')
 
 class MeasurementDialog(QDialog):
+    # Báo lỗi ghi measurement từ luồng ghi nền về luồng giao diện
+    save_failed = pyqtSignal(str)
+
     def __init__(self, model_id, parent=None):
-        print(f"Debug: MeasurementDialog.__init__ called with model_id = {model_id}")
+        logger.debug("MeasurementDialog.__init__ called with model_id = %s", model_id)
         super().__init__(parent)
         self.model_id = model_id
-        self.device = None
+        # Mỗi thông số có thể gắn với một thiết bị riêng, đo song song
+        self.devices = DeviceManager()
+        self.available_ports = []
         
         try:
-            print("Debug: Creating measurement manager...")
+            logger.debug("Creating measurement manager...")
             self.measurement_manager = MeasurementManager()
-            print("Debug: Creating model manager...")
+            logger.debug("Creating model manager...")
             self.model_manager = ModelManager()
+            self.tasks = AsyncTaskRunner(self)
             self.current_values = {}
+            self.current_timestamps = {}  # Thời điểm nhận mẫu của giá trị trong current_values
             self.measurement_timer = QTimer()
             self.measurement_timer.timeout.connect(self.read_measurement)
+            self.save_failed.connect(self.show_save_error)
             self.parameters_list = []  # Danh sách các thông số theo thứ tự
+            self.param_labels = {}
+            self.port_combos = {}  # Thông số -> combo chọn cổng (tạo khi thông số đã tải xong)
             self.current_param_index = 0  # Index của thông số hiện tại
+            self.current_product_id = None  # Sản phẩm đang đo (local id trong nhật ký cục bộ)
             
             self.setWindowTitle("Đo lường sản phẩm")
             self.setModal(True)
             self.setMinimumSize(600, 500)
-            print("Debug: Basic setup completed")
+            logger.debug("Basic setup completed")
         except Exception as e:
-            print(f"Debug: Error in MeasurementDialog init: {e}")
+            logger.warning("Error in MeasurementDialog init: %s", e)
             raise
         self.setStyleSheet("""
             QDialog {
@@ -139,15 +167,15 @@ class MeasurementDialog(QDialog):
         """)
         
         try:
-            print("Debug: Calling init_ui...")
+            logger.debug("Calling init_ui...")
             self.init_ui()
-            print("Debug: Calling load_model_info...")
+            logger.debug("Calling load_model_info...")
             self.load_model_info()
-            print("Debug: Calling scan_devices...")
+            logger.debug("Calling scan_devices...")
             self.scan_devices()
-            print("Debug: MeasurementDialog initialization completed")
+            logger.debug("MeasurementDialog initialization completed")
         except Exception as e:
-            print(f"Debug: Error during dialog initialization: {e}")
+            logger.warning("Error during dialog initialization: %s", e)
             import traceback
             traceback.print_exc()
             raise
@@ -215,6 +243,11 @@ class MeasurementDialog(QDialog):
         self.status_label = QLabel("Chưa kết nối thiết bị")
         measure_layout.addWidget(self.status_label)
         
+        # Tốc độ lấy mẫu và độ trễ của từng thiết bị khi đang đo
+        self.device_stats_label = QLabel()
+        self.device_stats_label.setVisible(False)
+        measure_layout.addWidget(self.device_stats_label)
+        
         # Control buttons
         control_layout = QHBoxLayout()
         self.start_btn = QPushButton("Bắt đầu đo")
@@ -237,36 +270,45 @@ class MeasurementDialog(QDialog):
         layout.addWidget(measure_group)
 
     def load_model_info(self):
-        """Load thông tin model"""
-        try:
-            print(f"Debug: Loading model info for model_id = {self.model_id}")
-            model = self.model_manager.get_model_by_id(self.model_id)
-            if model:
-                print(f"Debug: Model found: {model['name']}")
-                self.model_info_label.setText(f"Model: {model['name']}")
-                # Load parameters
-                print("Debug: Loading parameters...")
-                parameters = self.model_manager.get_parameters_by_model(self.model_id)
-                print(f"Debug: Found {len(parameters)} parameters")
-                self.load_parameters(parameters)
-            else:
-                print("Debug: Model not found")
-                self.model_info_label.setText(f"Model ID {self.model_id} không tìm thấy")
-                # Tạo parameters giả để test
-                self.load_parameters([
-                    {'id': 1, 'name': 'Thông số 1', 'unit': 'mm'},
-                    {'id': 2, 'name': 'Thông số 2', 'unit': 'kg'}
-                ])
-        except Exception as e:
-            print(f"Debug: Error loading model info: {e}")
-            import traceback
-            traceback.print_exc()
-            self.model_info_label.setText(f"Lỗi load model: {str(e)}")
+        """Load thông tin model và thông số ở luồng nền"""
+        logger.debug("Loading model info for model_id = %s", self.model_id)
+        self.model_info_label.setText("Đang tải thông tin model...")
+        self.tasks.submit(
+            'model_info', self._fetch_model_info, self.model_id,
+            on_result=self.show_model_info,
+            on_error=self.show_model_info_error
+        )
+
+    def _fetch_model_info(self, model_id):
+        """(Luồng nền) model và danh sách thông số của model"""
+        model = self.model_manager.get_model_by_id(model_id)
+        if not model:
+            return None, []
+        return model, self.model_manager.get_parameters_by_model(model_id)
+
+    def show_model_info(self, result):
+        model, parameters = result
+        if model:
+            logger.debug("Model found: %s, %s parameters", model['name'], len(parameters))
+            self.model_info_label.setText(f"Model: {model['name']}")
+            self.load_parameters(parameters)
+        else:
+            logger.debug("Model not found")
+            self.model_info_label.setText(f"Model ID {self.model_id} không tìm thấy")
             # Tạo parameters giả để test
             self.load_parameters([
-                {'id': 1, 'name': 'Test Param', 'unit': 'unit'}
+                {'id': 1, 'name': 'Thông số 1', 'unit': 'mm'},
+                {'id': 2, 'name': 'Thông số 2', 'unit': 'kg'}
             ])
 
+    def show_model_info_error(self, e):
+        logger.warning("Error loading model info: %s", e)
+        self.model_info_label.setText(f"Lỗi load model: {str(e)}")
+        # Tạo parameters giả để test
+        self.load_parameters([
+            {'id': 1, 'name': 'Test Param', 'unit': 'unit'}
+        ])
+
     def load_parameters(self, parameters):
         """Load các thông số cần đo"""
         # Lưu danh sách parameters
@@ -278,6 +320,7 @@ class MeasurementDialog(QDialog):
             self.param_layout.itemAt(i).widget().setParent(None)
         
         self.param_labels = {}
+        self.port_combos = {}
         self.manual_inputs.clear()
         
         for i, param in enumerate(parameters):
@@ -303,6 +346,12 @@ class MeasurementDialog(QDialog):
             
             param_layout.addStretch()
             
+            # Cổng thiết bị đo thông số này
+            port_combo = QComboBox()
+            port_combo.setMinimumWidth(120)
+            param_layout.addWidget(port_combo)
+            self.port_combos[param['id']] = port_combo
+            
             self.param_labels[param['id']] = value_label
             # Lưu cả indicator để có thể update sau
             setattr(self, f"param_indicator_{param['id']}", indicator)
@@ -317,10 +366,31 @@ class MeasurementDialog(QDialog):
             self.manual_inputs[param['id']] = manual_input
             self.param_layout.addWidget(manual_input)
             
+        self.update_port_combos()
+        
         # Update status để hiển thị thông số hiện tại
         if parameters:
             self.update_current_parameter_display()
 
+    def update_port_combos(self):
+        """Điền danh sách cổng cho từng thông số (mặc định cổng thứ i cho thông số thứ i)"""
+        for i, (param_id, combo) in enumerate(self.port_combos.items()):
+            selected = combo.currentData()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("Không dùng", None)
+            for port in self.available_ports:
+                combo.addItem(port, port)
+            if selected not in self.available_ports:
+                selected = self.available_ports[i] if i < len(self.available_ports) else None
+            combo.setCurrentIndex(max(0, combo.findData(selected)) if selected else 0)
+            combo.blockSignals(False)
+
+    def port_mapping(self):
+        """{parameter_id: cổng} theo lựa chọn trên giao diện"""
+        return {param_id: combo.currentData()
+                for param_id, combo in self.port_combos.items() if combo.currentData()}
+
     def update_current_parameter_display(self):
         """Cập nhật hiển thị thông số hiện tại"""
         if not self.parameters_list:
@@ -357,14 +427,20 @@ class MeasurementDialog(QDialog):
                 try:
                     value = float(value_text)
                     
-                    # Lưu vào database ngay lập tức
-                    measurement_id = self.measurement_manager.add_measurement(
-                        model_id=self.model_id,
-                        parameter_id=param_id,
-                        value=value
-                    )
+                    # Thông số đầu tiên của sản phẩm: tạo bản ghi sản phẩm mới
+                    if self.current_product_id is None:
+                        self.current_product_id = self.measurement_manager.create_product(self.model_id)
                     
-                    if measurement_id:
+                    if self.current_product_id:
+                        # Ghi theo lô ở luồng nền, không chờ database
+                        self.measurement_manager.add_measurement_async(
+                            model_id=self.model_id,
+                            parameter_id=param_id,
+                            value=value,
+                            product_id=self.current_product_id,
+                            callback=self._on_measurement_saved
+                        )
+                        
                         # Cập nhật hiển thị
                         self.param_labels[param_id].setText(f"{value:.3f}")
                         
@@ -410,9 +486,23 @@ class MeasurementDialog(QDialog):
             else:
                 self.status_label.setText(f"⚠️ Vui lòng nhập giá trị cho {current_param['name']}")
     
+    def _on_measurement_saved(self, future):
+        """Gọi trên luồng ghi nền: chuyển lỗi (nếu có) về giao diện qua signal"""
+        error = future.exception()
+        if error is not None:
+            try:
+                self.save_failed.emit(str(error))
+            except RuntimeError:
+                # Dialog đã bị huỷ
+                print(f"Lỗi lưu dữ liệu vào database: {error}")
+
+    def show_save_error(self, message):
+        self.status_label.setText(f"❌ Lỗi lưu dữ liệu vào database: {message}")
+
     def reset_for_new_product(self):
         """Reset để đo sản phẩm mới"""
         self.current_param_index = 0
+        self.current_product_id = None
         
         # Clear tất cả inputs và enable lại
         for param_id, input_widget in self.manual_inputs.items():
@@ -447,6 +537,7 @@ class MeasurementDialog(QDialog):
     def scan_devices(self):
         """Quét thiết bị COM có sẵn"""
         self.device_list.clear()
+        self.available_ports = []
         
         try:
             import serial.tools.list_ports
@@ -462,51 +553,64 @@ class MeasurementDialog(QDialog):
                 for port in ports:
                     item_text = f"{port.device} - {port.description}"
                     self.device_list.addItem(item_text)
+                    self.available_ports.append(port.device)
                 self.connect_btn.setEnabled(True)
                 self.status_label.setText(f"Tìm thấy {len(ports)} thiết bị")
                 
         except ImportError as e:
-            print(f"Debug: Cannot import serial: {e}")
+            logger.warning("Cannot import serial: %s", e)
             self.device_list.addItem("Lỗi: Không thể import serial")
             self.connect_btn.setEnabled(False)
             # Tự động enable manual mode khi có lỗi
             self.toggle_manual_mode()
             self.status_label.setText("Pyserial chưa cài đặt - đã chuyển sang chế độ nhập thủ công")
         except Exception as e:
-            print(f"Debug: Error scanning devices: {e}")
+            logger.warning("Error scanning devices: %s", e)
             self.device_list.addItem("Lỗi quét thiết bị")
             self.connect_btn.setEnabled(False)
             # Tự động enable manual mode khi có lỗi
             self.toggle_manual_mode()
             self.status_label.setText(f"Lỗi quét thiết bị - đã chuyển sang chế độ nhập thủ công")
+        self.update_port_combos()
 
     def connect_device(self):
-        """Kết nối với thiết bị được chọn"""
-        current_item = self.device_list.currentItem()
-        if not current_item or "Không tìm thấy" in current_item.text():
-            return
+        """Kết nối các thiết bị theo cổng đã chọn cho từng thông số"""
+        mapping = self.port_mapping()
+        if not mapping:
+            # Chưa gán cổng: dùng thiết bị đang chọn trong danh sách cho thông số đầu tiên
+            current_item = self.device_list.currentItem()
+            if not current_item or "Không tìm thấy" in current_item.text() or not self.parameters_list:
+                return
+            mapping = {self.parameters_list[0]['id']: current_item.text().split(' - ')[0]}
             
         try:
-            port = current_item.text().split(' - ')[0]
-            self.device = HighGaugeDevice()
-            
-            if self.device.connect(port):
-                self.status_label.setText(f"Đã kết nối: {port}")
+            results = self.devices.connect_all(mapping)
+            failed = [mapping[param_id] for param_id, ok in results.items() if not ok]
+            if len(failed) < len(results):
+                connected = [mapping[param_id] for param_id, ok in results.items() if ok]
+                message = f"Đã kết nối: {', '.join(connected)}"
+                if failed:
+                    message += f" | Không kết nối được: {', '.join(failed)}"
+                self.status_label.setText(message)
+                for combo in self.port_combos.values():
+                    combo.setEnabled(False)
                 self.connect_btn.setText("Ngắt kết nối")
                 self.connect_btn.clicked.disconnect()
                 self.connect_btn.clicked.connect(self.disconnect_device)
                 self.start_btn.setEnabled(True)
                 self.manual_btn.setEnabled(False)
             else:
+                self.devices.disconnect_all()
                 self.status_label.setText("Không thể kết nối thiết bị")
         except Exception as e:
             self.status_label.setText(f"Lỗi kết nối: {str(e)}")
 
     def disconnect_device(self):
-        """Ngắt kết nối thiết bị"""
-        if self.device:
-            self.device.disconnect()
-            self.device = None
+        """Ngắt kết nối mọi thiết bị"""
+        self.devices.disconnect_all()
+        for combo in self.port_combos.values():
+            combo.setEnabled(True)
+        self.device_stats_label.setVisible(False)
             
         self.status_label.setText("Đã ngắt kết nối")
         self.connect_btn.setText("Kết nối thiết bị")
@@ -555,9 +659,9 @@ class MeasurementDialog(QDialog):
             self.status_label.setText("✏️ Chế độ nhập thủ công - nhập giá trị và bấm 'Lưu giá trị'")
         else:
             self.manual_btn.setText("Nhập thủ công")
-            self.start_btn.setEnabled(self.device is not None)
+            self.start_btn.setEnabled(self.devices.is_connected())
             self.start_btn.setText("Bắt đầu đo")
-            if self.device:
+            if self.devices.is_connected():
                 self.status_label.setText("🔧 Đã sẵn sàng đo tự động")
             else:
                 self.status_label.setText("⚠️ Chưa kết nối thiết bị")
@@ -569,8 +673,11 @@ class MeasurementDialog(QDialog):
             self.save_current_parameter()
         else:
             # Device mode
-            if self.device and self.device.is_device_connected():
-                self.measurement_timer.start(1000)  # Read every second
+            if self.devices.is_connected():
+                # Mỗi thiết bị có luồng nền đọc liên tục cổng COM; timer chỉ lấy mẫu từ bộ đệm để hiển thị
+                self.devices.start()
+                self.device_stats_label.setVisible(True)
+                self.measurement_timer.start(UI_REFRESH_MS)
                 self.start_btn.setText("Dừng đo")
                 self.start_btn.clicked.disconnect()
                 self.start_btn.clicked.connect(self.stop_measurement)
@@ -579,26 +686,48 @@ class MeasurementDialog(QDialog):
     def stop_measurement(self):
         """Dừng đo lường"""
         self.measurement_timer.stop()
+        self.devices.stop()
         self.start_btn.setText("Bắt đầu đo")
         self.start_btn.clicked.disconnect()
         self.start_btn.clicked.connect(self.start_measurement)
         self.status_label.setText("Đã dừng đo")
 
     def read_measurement(self):
-        """Đọc giá trị từ thiết bị"""
-        if self.device and self.device.is_device_connected():
+        """Đọc giá trị mới của mọi thiết bị, mỗi thiết bị cập nhật thông số của nó"""
+        if self.devices.is_connected():
             try:
-                value = self.device.read_data()
-                if value is not None:
-                    # Update first parameter (assuming single parameter for now)
-                    if self.param_labels:
-                        first_param_id = list(self.param_labels.keys())[0]
-                        self.param_labels[first_param_id].setText(f"{value:.3f}")
-                        self.current_values[first_param_id] = value
-                        self.save_btn.setEnabled(True)
+                # Các mẫu đã trộn theo thời gian: giữ mẫu mới nhất của từng thông số
+                updated = set()
+                for param_id, sample in self.devices.poll():
+                    self.current_values[param_id] = sample.value
+                    self.current_timestamps[param_id] = sample.timestamp
+                    updated.add(param_id)
+                for param_id in updated:
+                    if param_id in self.param_labels:
+                        self.param_labels[param_id].setText(f"{self.current_values[param_id]:.3f}")
+                if self.current_values:
+                    self.save_btn.setEnabled(True)
+                self.show_device_stats()
             except Exception as e:
                 self.status_label.setText(f"Lỗi đọc dữ liệu: {str(e)}")
 
+    def show_device_stats(self):
+        """Hiển thị tốc độ lấy mẫu và độ trễ của từng thiết bị"""
+        names = {param['id']: param['name'] for param in self.parameters_list}
+        lines = []
+        overflows = parse_errors = 0
+        for param_id, stats in self.devices.stats().items():
+            latency = (f"{stats['latency_avg_ms']:.0f}/{stats['latency_max_ms']:.0f} ms"
+                       if stats['latency_avg_ms'] is not None else "-- ms")
+            lines.append(f"{names.get(param_id, param_id)} ({stats['port']}): "
+                         f"{stats.get('sample_rate', 0.0):.1f} mẫu/s, trễ TB/max {latency}")
+            overflows += stats.get('overflows', 0)
+            parse_errors += stats.get('parse_errors', 0)
+        self.status_label.setText(
+            f"Đang đo {len(lines)} thiết bị... | Tràn bộ đệm: {overflows} | Dòng lỗi: {parse_errors}"
+        )
+        self.device_stats_label.setText("\n".join(lines))
+
     def read_manual_values(self):
         """Đọc giá trị nhập thủ công"""
         try:
@@ -665,19 +794,31 @@ class MeasurementDialog(QDialog):
             return
             
         try:
-            # Save to database
+            # Save to database - tất cả giá trị thuộc cùng một sản phẩm
+            if self.current_product_id is None:
+                self.current_product_id = self.measurement_manager.create_product(self.model_id)
+            if not self.current_product_id:
+                # Không có sản phẩm thì kết quả đo không hiện trong lịch sử: không lưu
+                self.status_label.setText("❌ Lỗi lưu dữ liệu vào database")
+                return
             for param_id, value in self.current_values.items():
-                self.measurement_manager.add_measurement(
+                timestamp = self.current_timestamps.get(param_id)
+                self.measurement_manager.add_measurement_async(
                     model_id=self.model_id,
                     parameter_id=param_id,
-                    value=value
+                    value=value,
+                    product_id=self.current_product_id,
+                    callback=self._on_measurement_saved,
+                    measured_at=datetime.fromtimestamp(timestamp) if timestamp else None
                 )
+            self.current_product_id = None
             
             self.status_label.setText("Đã lưu kết quả thành công")
             self.save_btn.setEnabled(False)
             
             # Clear values for next measurement
             self.current_values.clear()
+            self.current_timestamps.clear()
             for label in self.param_labels.values():
                 label.setText("--")
             for input_widget in self.manual_inputs.values():
@@ -688,9 +829,8 @@ class MeasurementDialog(QDialog):
 
     def closeEvent(self, event):
         """Xử lý khi đóng dialog"""
-        if self.device:
-            self.device.disconnect()
         self.measurement_timer.stop()
+        self.devices.disconnect_all()
         event.accept()
 
 class ModernButton(QPushButton):
@@ -715,7 +855,7 @@ class ModernButton(QPushButton):
         """)
         
     def mousePressEvent(self, event):
-        print(f"Debug: ModernButton clicked: {self.text()}")
+        logger.debug("ModernButton clicked: %s", self.text())
         super().mousePressEvent(event)
 
     def enterEvent(self, event):
@@ -757,6 +897,8 @@ class DashboardWidget(QWidget):
         self.model_manager = ModelManager()
         self.current_model_id = model_id
         self.current_parameter = None
+        # Truy vấn database chạy ở luồng nền, chỉ kết quả mới nhất được hiển thị
+        self.tasks = AsyncTaskRunner(self)
         # StyleSheet mới - bỏ background của labels
         self.setStyleSheet(f"""
             QWidget {{
@@ -842,21 +984,21 @@ class DashboardWidget(QWidget):
                 height: 10px;
                 margin-right: 4px;
             }}
-            QTableWidget {{
+            QTableView {{
                 border: 1px solid #e5e7eb;
                 border-radius: 8px;
                 background: #fff;
                 font-size: 13px;
             }}
-            QTableWidget::item {{
+            QTableView::item {{
                 padding: 6px;
                 border-radius: 6px;
             }}
-            QTableWidget::item:selected {{
+            QTableView::item:selected {{
                 background: #eff6ff;
                 color: #2563eb;
             }}
-            QTableWidget::item:hover {{
+            QTableView::item:hover {{
                 background: #eff6ff;
             }}
             QHeaderView::section {{
@@ -869,22 +1011,36 @@ class DashboardWidget(QWidget):
             }}
         """)
         self.init_ui()
-        print("Debug: Connecting measure button...")
+        logger.debug("Connecting measure button...")
         self.measure_btn.clicked.connect(self.show_measurement_dialog)
-        print("Debug: Button connected successfully")
+        logger.debug("Button connected successfully")
+
+        # Cập nhật trạng thái đồng bộ của nhật ký kết quả đo
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(self.update_sync_status)
+        self.sync_timer.start(SYNC_STATUS_REFRESH_MS)
+        self.update_sync_status()
+
+        # Biểu đồ chỉ lấy thêm các kết quả đo mới
+        self.chart_timer = QTimer(self)
+        self.chart_timer.timeout.connect(self.refresh_chart)
+        self.chart_timer.start(CHART_REFRESH_MS)
         
         # Test nếu có model_id
         if model_id:
             self.set_model(model_id)
         else:
             # Nếu không có model_id, thử lấy model đầu tiên
-            try:
-                models = self.model_manager.get_all_models()
-                if models:
-                    print(f"Debug: Setting first model: {models[0]['id']}")
-                    self.set_model(models[0]['id'])
-            except Exception as e:
-                print(f"Debug: Error getting models: {e}")
+            self.tasks.submit(
+                'first_model', self.model_manager.get_all_models,
+                on_result=self._set_first_model,
+                on_error=lambda e: logger.warning("Error getting models: %s", e)
+            )
+
+    def _set_first_model(self, models):
+        if models and not self.current_model_id:
+            logger.debug("Setting first model: %s", models[0]['id'])
+            self.set_model(models[0]['id'])
 
     def create_divider(self):
         line = QFrame()
@@ -912,6 +1068,9 @@ class DashboardWidget(QWidget):
         self.total_label = QLabel("Tổng sản phẩm: 0")
         self.total_label.setObjectName("subtitle")
         header_left.addWidget(self.total_label)
+        self.sync_label = QLabel("Chờ đồng bộ: 0")
+        self.sync_label.setObjectName("subtitle")
+        header_left.addWidget(self.sync_label)
         header_layout.addLayout(header_left)
         self.measure_btn = ModernButton("Bắt đầu đo")
         self.measure_btn.setObjectName("measure_btn")
@@ -956,6 +1115,9 @@ class DashboardWidget(QWidget):
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setObjectName("chart_canvas")
         right_layout.addWidget(self.canvas)
+        self.chart = LiveChart(self.figure, self.ax, self.canvas, color=self.colors['primary'])
+        self.chart_param_id = None
+        self.chart_last_id = 0
         content_layout.addWidget(right_card)
         main_layout.addLayout(content_layout)
 
@@ -966,15 +1128,44 @@ class DashboardWidget(QWidget):
         history_title = QLabel("Lịch sử đo các sản phẩm")
         history_title.setObjectName("card_title")
         history_layout.addWidget(history_title)
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(0)
-        self.history_table.setRowCount(0)
+        # Model/view: chỉ nạp thêm trang khi cuộn tới cuối, không đo kích thước từng ô
+        self.history_model = HistoryTableModel(self.dashboard_manager, self)
+        self.history_model.modelReset.connect(self.resize_history_columns)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
         self.history_table.setAlternatingRowColors(True)
+        self.history_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.history_table.horizontalHeader().setDefaultSectionSize(120)
+        self.history_table.verticalHeader().setVisible(False)
+        self.history_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         history_layout.addWidget(self.history_table)
         main_layout.addWidget(history_card)
 
+    def update_sync_status(self):
+        """Hiển thị số kết quả đo chờ đồng bộ lên MySQL và độ trễ"""
+        try:
+            status = MeasurementManager.get_sync_status()
+        except Exception as e:
+            print(f"Lỗi khi lấy trạng thái đồng bộ: {e}")
+            return
+        text = f"Chờ đồng bộ: {status['depth']}"
+        if status['depth'] > 0:
+            text += f" | Trễ: {status['lag']:.0f}s"
+        if status['failed'] > 0:
+            text += f" | Bị từ chối: {status['failed']}"
+        if status['last_error'] and status['depth'] > 0:
+            text += " | Mất kết nối database"
+            self.sync_label.setStyleSheet("color: #e53935;")
+        else:
+            self.sync_label.setStyleSheet("")
+        self.sync_label.setText(text)
+
     def show_model_selector(self, event=None):
-        models = self.model_manager.get_all_models()
+        # Bấm nhiều lần trong lúc đang tải danh sách chỉ tạo một truy vấn
+        self.tasks.submit('model_selector', self.model_manager.get_all_models,
+                          on_result=self._open_model_selector)
+
+    def _open_model_selector(self, models):
         dialog = ModelSelectorDialog(models, current_model_id=self.current_model_id, parent=self)
         if dialog.exec():
             selected_id = dialog.get_selected_model_id()
@@ -982,108 +1173,109 @@ class DashboardWidget(QWidget):
                 self.set_model(selected_id)
 
     def set_model(self, model_id):
+        """Chuyển sang model khác; dữ liệu được nạp ở luồng nền.
+
+        Chọn model liên tục thì kết quả của các model chọn trước bị bỏ qua.
+        """
+        if model_id != self.current_model_id:
+            # Biểu đồ/lịch sử của model cũ không còn cần
+            self.tasks.cancel('chart')
+            self.tasks.cancel('chart_refresh')
+            self.chart_param_id = None
         self.current_model_id = model_id
+        self.tasks.submit('model', self._load_model_summary, model_id, self.image_label.size(),
+                          on_result=self._show_model_summary)
+
+    def _load_model_summary(self, model_id, image_size):
+        """(Luồng nền) thông tin model, ảnh đã thu nhỏ, tổng sản phẩm và danh sách thông số"""
         model = self.model_manager.get_model_by_id(model_id)
-        if model:
-            self.model_name_label.setText(model['name'])
-            if model.get('image_path') and os.path.exists(model['image_path']):
-                pixmap = QPixmap(model['image_path'])
-                self.image_label.setPixmap(pixmap.scaled(
-                    self.image_label.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                ))
-            else:
-                self.image_label.setPixmap(QPixmap())
-            total = self.dashboard_manager.get_total_product(model_id)
-            self.total_label.setText(f"Tổng sản phẩm: {total}")
-            params = self.dashboard_manager.get_parameters_by_model(model_id)
-            self.param_combo.clear()
-            for p in params:
-                self.param_combo.addItem(f"{p['name']} ({p['unit']})", p['id'])
-            if params:
-                self.current_parameter = params[0]['id']
-                self.update_chart()
-            self.load_history()
+        if not model:
+            return None
+        image = None
+        if model.get('image_path') and os.path.exists(model['image_path']):
+            image = QImage(model['image_path']).scaled(
+                image_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+        return {
+            'model': model,
+            'image': image,
+            'total': self.dashboard_manager.get_total_product(model_id),
+            'parameters': self.dashboard_manager.get_parameters_by_model(model_id),
+        }
+
+    def _show_model_summary(self, summary):
+        if summary is None:
+            return
+        model = summary['model']
+        self.model_name_label.setText(model['name'])
+        self.image_label.setPixmap(QPixmap.fromImage(summary['image']) if summary['image'] else QPixmap())
+        self.total_label.setText(f"Tổng sản phẩm: {summary['total']}")
+        params = summary['parameters']
+        self.param_combo.clear()
+        for p in params:
+            self.param_combo.addItem(f"{p['name']} ({p['unit']})", p['id'])
+        if params:
+            self.current_parameter = params[0]['id']
+            self.update_chart()
+        self.load_history()
 
     def update_chart(self):
+        """Vẽ lại biểu đồ khi đổi thông số; cùng thông số thì chỉ nạp thêm dữ liệu mới"""
         param_id = self.param_combo.currentData()
         if not param_id:
             return
-        data = self.dashboard_manager.get_measurement_data(param_id)
-        self.ax.clear()
-        if not data.empty:
-            # Tạo trục x theo số sản phẩm (1, 2, 3, ...)
-            product_numbers = list(range(1, len(data) + 1))
-            self.ax.plot(product_numbers, data['value'], marker='o', color='#e53935', linewidth=2.5)
-            self.ax.set_title(f"Biểu đồ thông số {self.param_combo.currentText()}", 
-                            pad=24, fontsize=14, color='#b71c1c', fontweight='600')
-            self.ax.set_xlabel("Số sản phẩm", color='#e53935', fontsize=12)
-            self.ax.set_ylabel("Giá trị", color='#e53935', fontsize=12)
-            self.ax.grid(True, linestyle='--', alpha=0.7)
-            self.ax.spines['top'].set_visible(False)
-            self.ax.spines['right'].set_visible(False)
-            self.ax.tick_params(colors='#e53935')
-            
-            # Đặt x ticks cho số nguyên
-            self.ax.set_xticks(product_numbers)
-        self.canvas.draw()
+        if param_id == self.chart_param_id:
+            self.refresh_chart()
+            return
+        self.tasks.cancel('chart_refresh')
+        title = f"Biểu đồ thông số {self.param_combo.currentText()}"
+        self.tasks.submit(
+            'chart', self.dashboard_manager.get_measurement_series, param_id,
+            on_result=lambda rows: self._show_chart(param_id, title, rows)
+        )
+
+    def _show_chart(self, param_id, title, rows):
+        rows = rows or []
+        self.chart_param_id = param_id
+        self.chart_last_id = rows[-1][0] if rows else 0
+        self.chart.set_series([row[1] for row in rows], title=title)
+
+    def refresh_chart(self):
+        """Nối các kết quả đo mới (id lớn hơn id cuối đã vẽ) vào biểu đồ"""
+        if not self.chart_param_id or not self.isVisible():
+            return
+        # Timer gọi lại khi truy vấn trước chưa xong: cùng tham số nên được gộp
+        param_id, last_id = self.chart_param_id, self.chart_last_id
+        self.tasks.submit(
+            'chart_refresh', self.dashboard_manager.get_measurement_series, param_id, last_id,
+            on_result=lambda rows: self._append_chart(param_id, last_id, rows)
+        )
+
+    def _append_chart(self, param_id, last_id, rows):
+        # Bỏ qua nếu biểu đồ đã đổi thông số hoặc đã được nạp lại trong lúc chờ
+        if rows and param_id == self.chart_param_id and last_id == self.chart_last_id:
+            self.chart_last_id = rows[-1][0]
+            self.chart.append([row[1] for row in rows])
 
     def load_history(self):
-        """Load lịch sử đo của model hiện tại"""
+        """Load lịch sử đo của model hiện tại (trang đầu, các trang sau nạp khi cuộn)"""
         if not self.current_model_id:
             return
-            
-        history = self.dashboard_manager.get_history_by_model(self.current_model_id)
-        
-        if not history:
-            # Xóa table nếu không có dữ liệu
-            self.history_table.setRowCount(0)
-            self.history_table.setColumnCount(0)
-            return
-            
-        # Lấy tất cả keys từ record đầu tiên để làm headers
-        if history:
-            all_keys = list(history[0].keys())
-            
-            # Tạo headers: STT, Thời gian, và các thông số
-            headers = []
-            for key in all_keys:
-                if key == 'STT':
-                    headers.append('STT')
-                elif key == 'measured_at':
-                    headers.append('Thời gian')
-                else:
-                    # Đây là tên thông số (đã có unit)
-                    headers.append(key)
-            
-            # Set up table
-            self.history_table.setRowCount(len(history))
-            self.history_table.setColumnCount(len(headers))
-            self.history_table.setHorizontalHeaderLabels(headers)
-            
-            # Populate data
-            for row_idx, product in enumerate(history):
-                for col_idx, key in enumerate(all_keys):
-                    if key == 'measured_at':
-                        # Format thời gian đẹp hơn
-                        time_str = product[key].strftime('%Y-%m-%d %H:%M:%S')
-                        item = QTableWidgetItem(time_str)
-                    else:
-                        item = QTableWidgetItem(str(product[key]))
-                    
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    self.history_table.setItem(row_idx, col_idx, item)
-            
-            # Auto resize columns
-            self.history_table.resizeColumnsToContents()
-            
-            # Đặt độ rộng tối thiểu cho cột đầu
-            if self.history_table.columnCount() > 0:
-                self.history_table.setColumnWidth(0, 50)  # STT column
+        self.history_model.set_model_id(self.current_model_id)
+
+    def resize_history_columns(self):
+        if self.history_model.columnCount() > 0:
+            self.history_table.setColumnWidth(0, 50)   # STT
+            self.history_table.setColumnWidth(1, 160)  # Thời gian
+
+    def _reload_after_measurement(self):
+        self.update_sync_status()
+        self.set_model(self.current_model_id)
 
     def show_measurement_dialog(self):
-        print(f"Debug: show_measurement_dialog called, current_model_id = {self.current_model_id}")
+        logger.debug("show_measurement_dialog called, current_model_id = %s", self.current_model_id)
         
         if not self.current_model_id:
             # Nếu chưa có model nào được chọn, hiển thị thông báo
@@ -1094,16 +1286,18 @@ class DashboardWidget(QWidget):
             return
         
         try:
-            print(f"Debug: Creating MeasurementDialog for model_id = {self.current_model_id}")
+            logger.debug("Creating MeasurementDialog for model_id = %s", self.current_model_id)
             dialog = MeasurementDialog(self.current_model_id, self)
-            print("Debug: MeasurementDialog created successfully, showing...")
+            logger.debug("MeasurementDialog created successfully, showing...")
             dialog.exec()
-            print("Debug: Dialog closed")
+            logger.debug("Dialog closed")
             
-            # Sau khi đo xong có thể reload lại dashboard nếu cần
-            self.set_model(self.current_model_id)
+            # Sau khi đo xong: đợi ngắn (ở luồng nền) để kết quả đo được đồng bộ rồi reload
+            # dashboard (nếu mất kết nối, dữ liệu vẫn nằm trong nhật ký cục bộ và được ghi sau)
+            self.tasks.submit('flush', MeasurementManager().flush, 2,
+                              on_result=lambda _: self._reload_after_measurement())
         except Exception as e:
-            print(f"Debug: Error creating/showing dialog: {e}")
+            logger.warning("Error creating/showing dialog: %s", e)
             import traceback
             traceback.print_exc()
             from PyQt6.QtWidgets import QMessageBox
@@ -1126,7 +1320,8 @@ class Dashboard(QWidget):
             'border': '#e5e7eb'        # Màu viền
         }
         
-        # Xóa cache của Plotly
+        # Xóa cache của Plotly (plotly chỉ nạp khi mở màn hình này)
+        import plotly.io as pio
         pio.templates.default = "plotly_white"
         
         self.setStyleSheet(f"""
@@ -1205,7 +1400,8 @@ class Dashboard(QWidget):
         self.model_name.clicked.connect(self.show_model_selector)
         
         self.model_selector = QComboBox()
-        self.model_selector.addItems([m['name'] for m in self.model_manager.get_all_models()])
+        for m in self.model_manager.get_all_models():
+            self.model_selector.addItem(m['name'], m['id'])
         self.model_selector.currentIndexChanged.connect(self.on_model_selected)
         self.model_selector.hide()
         
@@ -1245,6 +1441,15 @@ class Dashboard(QWidget):
         chart_layout.setContentsMargins(16, 12, 16, 12)
         chart_layout.setSpacing(16)
         
+        # PlotWidget cần QtWebEngine: chỉ nạp khi dùng tới
+        try:
+            from .plot_widget import PlotWidget
+        except ImportError:
+            try:
+                from src.ui.plot_widget import PlotWidget
+            except ImportError:
+                from plot_widget import PlotWidget
+
         # Biểu đồ thông số
         self.params_chart = PlotWidget()
         self.update_params_chart()
@@ -1269,11 +1474,13 @@ class Dashboard(QWidget):
         self.model_selector.showPopup()
         
     def on_model_selected(self, index):
-        model_name = self.model_selector.currentText()
-        model_id = self.model_manager.get_all_models()[index]['id']
-        self.update_dashboard(model_id)
+        model_id = self.model_selector.itemData(index)
+        if model_id:
+            self.update_dashboard(model_id)
         
     def update_params_chart(self):
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         x = np.linspace(0, 10, 100)
         y1 = np.sin(x)
         y2 = np.cos(x)
@@ -1296,6 +1503,7 @@ class Dashboard(QWidget):
         self.params_chart.update_plot(fig)
         
     def update_error_chart(self):
+        import plotly.graph_objects as go
         dates = [datetime.now() - timedelta(days=i) for i in range(7)]
         errors = [10, 15, 8, 12, 9, 11, 13]
         
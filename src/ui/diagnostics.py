@@ -0,0 +1,345 @@
+"""Chẩn đoán "ứng dụng bị treo": watchdog event loop và profiler lấy mẫu.
+
+StallWatchdog: QTimer trên luồng giao diện cập nhật nhịp tim mỗi HEARTBEAT_MS;
+một luồng nền kiểm tra nhịp tim, khi event loop không chạy quá UI_STALL_MS thì
+chụp stack Python của luồng giao diện (sys._current_frames) và tiếp tục lấy
+mẫu cho tới khi event loop chạy lại. Mỗi lần treo được ghi vào
+DIAGNOSTICS_DIR/stalls_<ngày>.log: thời gian treo thực tế, stack lúc phát
+hiện, các điểm dừng hay gặp nhất và nhóm nghi vấn (serial, database, vẽ biểu
+đồ, pandas/numpy, Excel, Qt/Python) theo file của các frame trên stack.
+
+SamplingProfiler: luồng nền lấy mẫu stack của mọi luồng mỗi PROFILE_INTERVAL_MS
+trong một khoảng thời gian, ghi thời gian ước lượng (tự thân và cộng dồn) theo
+hàm, tách theo luồng, vào DIAGNOSTICS_DIR/profile_<thời điểm>.txt.
+
+Cả hai đều tắt mặc định: bật watchdog bằng UI_WATCHDOG=1 hoặc Ctrl+Shift+W,
+bật/tắt profiler bằng Ctrl+Shift+P (tự dừng sau PROFILE_SECONDS giây).
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QKeySequence, QShortcut
+
+DIAGNOSTICS_DIR = os.getenv('DIAGNOSTICS_DIR') or 'diagnostics'
+UI_WATCHDOG = (os.getenv('UI_WATCHDOG') or '0') == '1'
+# Event loop không chạy lâu hơn ngưỡng này (ms) được coi là treo
+UI_STALL_MS = float(os.getenv('UI_STALL_MS') or '250')
+HEARTBEAT_MS = 50
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS') or '5')
+PROFILE_SECONDS = float(os.getenv('PROFILE_SECONDS') or '30')
+# Số frame tối đa ghi cho một stack
+STACK_LIMIT = 40
+# Số mẫu stack tối đa giữ trong một lần treo
+STALL_SAMPLES = 200
+
+# (đoạn đường dẫn, nhóm), kiểm tra từ frame trong cùng ra ngoài
+_CATEGORIES = [
+    ('serial', 'serial I/O'),
+    ('hardware', 'serial I/O'),
+    ('mysql', 'database'),
+    ('sqlite3', 'database'),
+    (os.path.join('config', 'database.py'), 'database'),
+    (os.path.join('config', 'query_stats.py'), 'database'),
+    ('matplotlib', 'vẽ biểu đồ'),
+    ('plotly', 'vẽ biểu đồ'),
+    ('openpyxl', 'Excel'),
+    ('pandas', 'pandas/numpy'),
+    ('numpy', 'pandas/numpy'),
+]
+
+
+def classify_stack(stack):
+    """Nhóm nghi vấn của một stack (danh sách FrameSummary, frame ngoài cùng trước)"""
+    for frame in reversed(stack or []):
+        for fragment, category in _CATEGORIES:
+            if fragment in frame.filename:
+                return category
+    return 'Qt/Python'
+
+
+def _frame_label(frame):
+    return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+
+def _open_report(file_name):
+    os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+    return open(os.path.join(DIAGNOSTICS_DIR, file_name), 'a', encoding='utf-8')
+
+
+class StallWatchdog(QObject):
+    """Đo thời gian event loop bị chặn và chụp stack luồng giao diện khi treo quá ngưỡng.
+
+    Phải tạo trên luồng giao diện.
+    """
+
+    def __init__(self, threshold_ms=UI_STALL_MS, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000.0
+        self.gui_thread_id = threading.get_ident()
+        self.timer = QTimer(self)
+        self.timer.setInterval(HEARTBEAT_MS)
+        self.timer.timeout.connect(self._beat)
+        self.stats = {'stalls': 0, 'max_stall_ms': 0.0, 'total_stall_ms': 0.0}
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._stall = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            self._last_beat = time.monotonic()
+            self._stall = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._monitor, name="StallWatchdog", daemon=True)
+        self._thread.start()
+        self.timer.start()
+        print(f"[INFO] Đã bật watchdog event loop (ngưỡng {self.threshold * 1000:.0f} ms, "
+              f"ghi vào {os.path.abspath(DIAGNOSTICS_DIR)})")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.timer.stop()
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        print(f"[INFO] Đã tắt watchdog event loop: {self.stats['stalls']} lần treo, "
+              f"lâu nhất {self.stats['max_stall_ms']:.0f} ms")
+
+    def _beat(self):
+        # Luồng giao diện: event loop vừa chạy lại
+        now = time.monotonic()
+        with self._lock:
+            gap = now - self._last_beat
+            self._last_beat = now
+            stall, self._stall = self._stall, None
+        stall_ms = max(0.0, gap * 1000 - HEARTBEAT_MS)
+        if stall is None and gap < self.threshold:
+            return
+        self.stats['stalls'] += 1
+        self.stats['total_stall_ms'] += stall_ms
+        self.stats['max_stall_ms'] = max(self.stats['max_stall_ms'], stall_ms)
+        self._write_report(stall_ms, stall)
+
+    def _monitor(self):
+        poll = max(self.threshold / 4, 0.01)
+        while not self._stop_event.wait(poll):
+            with self._lock:
+                last_beat = self._last_beat
+                blocked = time.monotonic() - last_beat
+            if blocked < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.gui_thread_id)
+            stack = traceback.extract_stack(frame, limit=STACK_LIMIT) if frame is not None else None
+            del frame
+            with self._lock:
+                if self._last_beat != last_beat:
+                    # Event loop đã chạy lại trong lúc chụp
+                    continue
+                if self._stall is None:
+                    self._stall = {'detected_ms': blocked * 1000, 'stack': stack, 'samples': []}
+                elif stack and len(self._stall['samples']) < STALL_SAMPLES:
+                    self._stall['samples'].append(stack)
+
+    def _write_report(self, stall_ms, stall):
+        stack = stall['stack'] if stall else None
+        samples = ([stack] if stack else []) + (stall['samples'] if stall else [])
+        category = Counter(classify_stack(s) for s in samples).most_common(1)[0][0] if samples else 'không rõ'
+        lines = [
+            f"=== {datetime.now().isoformat(sep=' ', timespec='milliseconds')} "
+            f"Event loop bị treo {stall_ms:.0f} ms (ngưỡng {self.threshold * 1000:.0f} ms), nghi do: {category} ==="
+        ]
+        if stack:
+            lines.append(f"Stack luồng giao diện khi phát hiện (sau {stall['detected_ms']:.0f} ms):")
+            lines.extend(line.rstrip('\n') for line in traceback.format_list(stack))
+        else:
+            # Luồng giao diện giữ GIL trong mã C: không chụp được stack
+            lines.append("Không chụp được stack (luồng giao diện không nhả GIL trong lúc treo)")
+        if len(samples) > 1:
+            lines.append(f"Điểm dừng trong {len(samples)} mẫu:")
+            for label, count in Counter(_frame_label(s[-1]) for s in samples).most_common(10):
+                lines.append(f"  {count:5d}  {label}")
+        lines.append('')
+        try:
+            with _open_report(f"stalls_{datetime.now():%Y%m%d}.log") as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            print(f"[WARNING] Không ghi được báo cáo treo giao diện: {e}")
+        print(f"[WARNING] Event loop bị treo {stall_ms:.0f} ms, nghi do: {category}")
+
+
+class SamplingProfiler:
+    """Profiler lấy mẫu stack mọi luồng; ghi thời gian theo hàm ra file khi dừng"""
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.on_finished = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.samples = 0
+        self.started_at = None
+        self.report_path = None
+        self.elapsed = 0.0
+        # (tên luồng, hàm) -> số mẫu
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+        self.thread_samples = Counter()
+
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self, seconds=PROFILE_SECONDS):
+        """Bắt đầu lấy mẫu; tự dừng và ghi file sau seconds giây (None = tới khi gọi stop())"""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._reset()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, args=(seconds,),
+                                            name="SamplingProfiler", daemon=True)
+            self._thread.start()
+        print(f"[INFO] Bắt đầu profile (mẫu mỗi {self.interval * 1000:g} ms, tối đa {seconds} s)")
+        return True
+
+    def stop(self):
+        """Dừng lấy mẫu; trả về đường dẫn file kết quả"""
+        thread = self._thread
+        if thread is None:
+            return None
+        self._stop_event.set()
+        thread.join(timeout=5.0)
+        return self.report_path
+
+    def _run(self, seconds):
+        names = {}
+        own_id = threading.get_ident()
+        self.started_at = datetime.now()
+        start = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id)
+                if name is None:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                    name = names.get(thread_id, str(thread_id))
+                self._sample(name, frame)
+            self.samples += 1
+            if seconds is not None and time.perf_counter() - start >= seconds:
+                break
+        self.elapsed = time.perf_counter() - start
+        self.report_path = self._write_report()
+        with self._lock:
+            self._thread = None
+        if self.on_finished:
+            self.on_finished(self.report_path)
+
+    def _sample(self, thread_name, frame):
+        self.thread_samples[thread_name] += 1
+        seen = set()
+        top = True
+        while frame is not None:
+            code = frame.f_code
+            key = (thread_name, code.co_filename, code.co_firstlineno, getattr(code, 'co_qualname', code.co_name))
+            if top:
+                self.self_counts[key] += 1
+                top = False
+            # Hàm đệ quy chỉ tính một lần cho thời gian cộng dồn
+            if key not in seen:
+                seen.add(key)
+                self.total_counts[key] += 1
+            frame = frame.f_back
+
+    def _write_report(self):
+        ms_per_sample = self.elapsed * 1000 / self.samples if self.samples else 0.0
+        lines = [
+            f"=== Profile bắt đầu {self.started_at:%Y-%m-%d %H:%M:%S}, {self.elapsed:.1f} s, "
+            f"{self.samples} lần lấy mẫu (~{ms_per_sample:.1f} ms/mẫu) ===",
+            "Thời gian ước lượng = số mẫu x thời gian mỗi mẫu; 'tự thân' là lúc hàm nằm trên đỉnh stack.",
+            "Thời gian tự thân của main/app.exec() trên MainThread là lúc event loop rảnh (đang chờ sự kiện).",
+        ]
+        # Luồng giao diện trước, các luồng còn lại theo số mẫu
+        threads = sorted(self.thread_samples, key=lambda n: (n != 'MainThread', -self.thread_samples[n]))
+        for thread_name in threads:
+            total = self.thread_samples[thread_name]
+            lines.append('')
+            lines.append(f"--- Luồng {thread_name} ({total} mẫu) ---")
+            lines.append(f"{'cộng dồn ms':>12} {'%':>6} {'tự thân ms':>11} {'%':>6}  hàm")
+            keys = [key for key in self.total_counts if key[0] == thread_name]
+            keys.sort(key=lambda k: (self.total_counts[k], self.self_counts[k]), reverse=True)
+            for key in keys[:60]:
+                _, filename, lineno, name = key
+                cumulative, own = self.total_counts[key], self.self_counts[key]
+                lines.append(f"{cumulative * ms_per_sample:12.1f} {cumulative / total:6.1%} "
+                             f"{own * ms_per_sample:11.1f} {own / total:6.1%}  "
+                             f"{name} ({filename}:{lineno})")
+        path = os.path.join(DIAGNOSTICS_DIR, f"profile_{self.started_at:%Y%m%d_%H%M%S}.txt")
+        try:
+            with _open_report(os.path.basename(path)) as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            print(f"[WARNING] Không ghi được kết quả profile: {e}")
+            return None
+        print(f"[INFO] Đã ghi kết quả profile vào {os.path.abspath(path)}")
+        return path
+
+
+class UiDiagnostics(QObject):
+    """Gắn watchdog và profiler vào cửa sổ chính (phím tắt Ctrl+Shift+W / Ctrl+Shift+P)"""
+
+    # Profiler tự dừng (từ luồng profiler) -> hiển thị trên luồng giao diện
+    profile_finished = pyqtSignal(object)
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.watchdog = StallWatchdog(parent=self)
+        self.profiler = SamplingProfiler()
+        self.profiler.on_finished = self.profile_finished.emit
+        self.profile_finished.connect(self._profile_finished)
+        QShortcut(QKeySequence("Ctrl+Shift+W"), window, activated=self.toggle_watchdog)
+        QShortcut(QKeySequence("Ctrl+Shift+P"), window, activated=self.toggle_profiler)
+        if UI_WATCHDOG:
+            self.watchdog.start()
+
+    def toggle_watchdog(self):
+        if self.watchdog.is_running():
+            self.watchdog.stop()
+            self._show_message("Đã tắt watchdog event loop")
+        else:
+            self.watchdog.start()
+            self._show_message(f"Đã bật watchdog event loop, báo cáo ghi vào {DIAGNOSTICS_DIR}/")
+
+    def toggle_profiler(self):
+        if self.profiler.is_running():
+            self.profiler.stop()
+        elif self.profiler.start():
+            self._show_message(f"Đang profile (tối đa {PROFILE_SECONDS:g} s, Ctrl+Shift+P để dừng)")
+
+    def _profile_finished(self, path):
+        if path:
+            self._show_message(f"Đã ghi kết quả profile: {path}")
+
+    def _show_message(self, text):
+        self.window.statusBar().showMessage(text, 8000)
+
+    def shutdown(self):
+        """Dừng watchdog; profiler đang chạy được dừng và ghi kết quả"""
+        self.watchdog.stop()
+        self.profiler.stop()
@@ -0,0 +1,171 @@
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+try:
+    from .async_tasks import AsyncTaskRunner
+except ImportError:
+    try:
+        from src.ui.async_tasks import AsyncTaskRunner
+    except ImportError:
+        from async_tasks import AsyncTaskRunner
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Model cho bảng lịch sử đo: mỗi hàng là một sản phẩm, mới nhất trước.
+
+    Dữ liệu được nạp theo trang (keyset theo products.id) khi view cuộn tới
+    cuối (canFetchMore/fetchMore). Chỉ giữ tối đa MAX_CACHED_PAGES trang trong
+    bộ nhớ; với các trang đã bị bỏ khỏi cache chỉ còn lưu id sản phẩm đầu
+    trang để nạp lại khi cần, nên bộ nhớ gần như không tăng theo số hàng.
+
+    Mọi truy vấn chạy ở luồng nền (AsyncTaskRunner): view nhận modelReset,
+    rowsInserted hoặc dataChanged khi dữ liệu về; ô của trang đang nạp lại
+    tạm thời để trống.
+    """
+
+    PAGE_SIZE = 200
+    MAX_CACHED_PAGES = 10
+
+    def __init__(self, dashboard_manager, parent=None):
+        super().__init__(parent)
+        self.dashboard_manager = dashboard_manager
+        self.model_id = None
+        self.parameters = []
+        self.headers = []
+        self._row_count = 0
+        self._page_first_ids = []  # id sản phẩm đầu mỗi trang (để nạp lại trang)
+        self._last_id = None       # id sản phẩm cuối cùng đã nạp (keyset cho trang sau)
+        self._exhausted = True
+        self._pages = OrderedDict()  # page_index -> danh sách (product_id, measured_at, values)
+        self.tasks = AsyncTaskRunner(self)
+
+    def set_model_id(self, model_id):
+        """Nạp lại từ đầu cho model khác (hoặc làm mới sau khi đo)"""
+        # Bỏ các trang đang nạp của model cũ
+        self.tasks.cancel()
+        self.tasks.submit('reset', self._load_first_page, model_id, on_result=self._apply_first_page)
+
+    def _load_first_page(self, model_id):
+        """(Luồng nền) thông số và trang đầu tiên của model"""
+        parameters = self.dashboard_manager.get_history_parameters(model_id) if model_id else []
+        rows = self.dashboard_manager.get_history_page(
+            model_id, parameters, limit=self.PAGE_SIZE
+        ) if parameters else []
+        return model_id, parameters, rows
+
+    def _apply_first_page(self, result):
+        model_id, parameters, rows = result
+        self.beginResetModel()
+        self.model_id = model_id
+        self.parameters = parameters
+        self.headers = ['STT', 'Thời gian'] + [f"{p['name']} ({p['unit']})" for p in self.parameters]
+        self._row_count = 0
+        self._page_first_ids = []
+        self._last_id = None
+        self._pages.clear()
+        self._exhausted = not self.parameters
+        self.endResetModel()
+        if rows is not None:
+            self._append_page(rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() != 1:
+            return Qt.AlignmentFlag.AlignCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = self._row(index.row())
+        if row is None:
+            return None
+        column = index.column()
+        if column == 0:
+            return str(index.row() + 1)
+        if column == 1:
+            return row[1].strftime('%Y-%m-%d %H:%M:%S') if row[1] else ""
+        value = row[2][column - 2]
+        return f"{value:.3f}" if value is not None else "--"
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        # View gọi lại fetchMore khi cuộn trong lúc trang đang nạp: cùng tham số nên được gộp
+        model_id, before_id = self.model_id, self._last_id
+        self.tasks.submit(
+            'page', self.dashboard_manager.get_history_page,
+            model_id, self.parameters, before_id, self.PAGE_SIZE,
+            on_result=lambda rows: self._on_page(model_id, before_id, rows)
+        )
+
+    def _on_page(self, model_id, before_id, rows):
+        if model_id != self.model_id or before_id != self._last_id:
+            return
+        if rows is None:
+            # Lỗi kết nối: thử lại ở lần cuộn sau
+            return
+        self._append_page(rows)
+
+    def _append_page(self, rows):
+        if len(rows) < self.PAGE_SIZE:
+            self._exhausted = True
+        if not rows:
+            return
+        page_index = len(self._page_first_ids)
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+        self._page_first_ids.append(rows[0][0])
+        self._last_id = rows[-1][0]
+        self._cache_page(page_index, rows)
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    def _row(self, row_index):
+        page_index, offset = divmod(row_index, self.PAGE_SIZE)
+        page = self._pages.get(page_index)
+        if page is None:
+            self._reload_page(page_index)
+            return None
+        self._pages.move_to_end(page_index)
+        return page[offset] if offset < len(page) else None
+
+    def _reload_page(self, page_index):
+        """Nạp lại một trang đã bị bỏ khỏi cache (các sản phẩm từ id đầu trang trở xuống)"""
+        if page_index >= len(self._page_first_ids):
+            return
+        # data() được gọi cho từng ô của trang: các yêu cầu trùng được gộp thành một truy vấn
+        model_id = self.model_id
+        self.tasks.submit(
+            ('reload', page_index), self.dashboard_manager.get_history_page,
+            model_id, self.parameters, self._page_first_ids[page_index] + 1, self.PAGE_SIZE,
+            on_result=lambda rows: self._on_page_reloaded(model_id, page_index, rows)
+        )
+
+    def _on_page_reloaded(self, model_id, page_index, rows):
+        if rows is None or model_id != self.model_id or page_index >= len(self._page_first_ids):
+            return
+        self._cache_page(page_index, rows)
+        first = page_index * self.PAGE_SIZE
+        last = min(first + self.PAGE_SIZE, self._row_count) - 1
+        self.dataChanged.emit(self.index(first, 0), self.index(last, self.columnCount() - 1))
+
+    def _cache_page(self, page_index, rows):
+        self._pages[page_index] = rows
+        self._pages.move_to_end(page_index)
+        while len(self._pages) > self.MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
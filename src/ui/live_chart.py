@@ -0,0 +1,132 @@
+import numpy as np
+from matplotlib.ticker import MaxNLocator
+
+
+def downsample_minmax(x, y, buckets):
+    """Giảm số điểm của chuỗi về tối đa 2*buckets điểm, giữ min và max của mỗi nhóm.
+
+    Mỗi nhóm tương ứng khoảng một pixel chiều ngang nên hình dạng đường
+    (kể cả các điểm vọt lên/xuống bất thường) được giữ nguyên khi vẽ.
+    """
+    n = len(y)
+    if buckets <= 0 or n <= 2 * buckets:
+        return x, y
+    size = n // buckets
+    usable = size * buckets
+    groups = y[:usable].reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    idx_min = offsets + groups.argmin(axis=1)
+    idx_max = offsets + groups.argmax(axis=1)
+    # Giữ thứ tự theo trục x trong mỗi nhóm
+    idx = np.sort(np.stack([idx_min, idx_max], axis=1), axis=1).ravel()
+    if usable < n:
+        # Phần dư cuối chuỗi (ít hơn một nhóm) giữ nguyên
+        idx = np.concatenate([idx, np.arange(usable, n)])
+    return x[idx], y[idx]
+
+
+class LiveChart:
+    """Biểu đồ đường cập nhật tăng dần trên một FigureCanvas của matplotlib.
+
+    Dữ liệu mới được nối vào chuỗi và chỉ vẽ lại đường (blitting) lên nền đã
+    lưu; chỉ vẽ lại toàn bộ khi phải nới giới hạn trục. Khi chuỗi dài hơn
+    chiều rộng trục (pixel), đường được vẽ từ dữ liệu đã giảm điểm min-max.
+    """
+
+    # Vẽ marker khi số điểm hiển thị không vượt quá ngưỡng này
+    MARKER_MAX_POINTS = 200
+    # Nới trục x thêm tỷ lệ này mỗi khi dữ liệu vượt giới hạn để hạn chế vẽ lại toàn bộ
+    X_HEADROOM = 0.25
+    Y_MARGIN = 0.1
+
+    def __init__(self, figure, ax, canvas, color='#e53935'):
+        self.figure = figure
+        self.ax = ax
+        self.canvas = canvas
+        self.color = color
+        self._y = np.empty(0)
+        self._background = None
+        self.line = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('resize_event', lambda event: self._refresh_line())
+
+    def __len__(self):
+        return len(self._y)
+
+    def set_series(self, values, title=""):
+        """Vẽ lại từ đầu với toàn bộ chuỗi giá trị (x là số thứ tự sản phẩm 1..N)"""
+        self._y = np.asarray(values, dtype=float)
+        self.ax.clear()
+        self.line, = self.ax.plot([], [], color=self.color, linewidth=2.5, animated=True)
+        self.ax.set_title(title, pad=24, fontsize=14, color='#b71c1c', fontweight='600')
+        self.ax.set_xlabel("Số sản phẩm", color='#e53935', fontsize=12)
+        self.ax.set_ylabel("Giá trị", color='#e53935', fontsize=12)
+        self.ax.grid(True, linestyle='--', alpha=0.7)
+        self.ax.spines['top'].set_visible(False)
+        self.ax.spines['right'].set_visible(False)
+        self.ax.tick_params(colors='#e53935')
+        # Số nhãn trục x cố định, không phải một nhãn cho mỗi sản phẩm
+        self.ax.xaxis.set_major_locator(MaxNLocator(nbins=10, integer=True))
+        self._background = None
+        self._fit_limits(force=True)
+        self._refresh_line()
+        self.canvas.draw_idle()
+
+    def append(self, values):
+        """Nối thêm giá trị mới vào cuối chuỗi và cập nhật biểu đồ"""
+        if self.line is None or len(values) == 0:
+            return
+        self._y = np.concatenate([self._y, np.asarray(values, dtype=float)])
+        self._refresh_line()
+        if self._fit_limits():
+            self.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _refresh_line(self):
+        """Cập nhật dữ liệu của Line2D (giảm điểm theo chiều rộng trục)"""
+        if self.line is None:
+            return
+        x = np.arange(1, len(self._y) + 1)
+        width = int(self.ax.bbox.width) if self.ax.bbox.width > 0 else 0
+        x, y = downsample_minmax(x, self._y, width)
+        self.line.set_data(x, y)
+        if len(y) <= self.MARKER_MAX_POINTS:
+            self.line.set_marker('o')
+        else:
+            self.line.set_marker('')
+
+    def _fit_limits(self, force=False):
+        """Nới giới hạn trục nếu dữ liệu vượt ra ngoài; trả về True nếu trục thay đổi"""
+        n = len(self._y)
+        if n == 0:
+            if force:
+                self.ax.set_xlim(0, 10)
+            return force
+        changed = False
+        x_min, x_max = self.ax.get_xlim()
+        if force or n + 1 > x_max:
+            self.ax.set_xlim(0, max(10, n * (1 + self.X_HEADROOM)))
+            changed = True
+
+        y_low, y_high = float(self._y.min()), float(self._y.max())
+        cur_low, cur_high = self.ax.get_ylim()
+        if force or y_low < cur_low or y_high > cur_high:
+            span = (y_high - y_low) or abs(y_high) or 1.0
+            self.ax.set_ylim(y_low - span * self.Y_MARGIN, y_high + span * self.Y_MARGIN)
+            changed = True
+        return changed
+
+    def _on_draw(self, event):
+        # Lưu nền (trục, lưới, nhãn) sau mỗi lần vẽ toàn bộ rồi vẽ đường lên trên
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        if self.line is not None:
+            self.ax.draw_artist(self.line)
+
+    def _blit(self):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.figure.bbox)
@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QComboBox, QMessageBox, QProgressBar, QDialog, QTextEdit
 )
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, QTimer
 
 # Import hardware modules
 try:
@@ -37,6 +37,26 @@ except ImportError:
     except ImportError:
         from ..config.database import DatabaseConfig
 
+try:
+    from .async_tasks import AsyncTaskRunner
+except ImportError:
+    try:
+        from src.ui.async_tasks import AsyncTaskRunner
+    except ImportError:
+        from async_tasks import AsyncTaskRunner
+try:
+    from config.logger import get_logger
+except ImportError:
+    try:
+        from src.config.logger import get_logger
+    except ImportError:
+        from ..config.logger import get_logger
+
+logger = get_logger('ui.measurement')
+
+# Chu kỳ (ms) cập nhật giao diện từ bộ đệm mẫu của thiết bị
+UI_REFRESH_MS = 200
+
 class DeviceConnectionDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -142,25 +162,16 @@ class DeviceConnectionDialog(QDialog):
             if 'temp_device' in locals():
                 temp_device.disconnect()
 
-class ModelLoaderWorker(QObject):
-    finished = pyqtSignal(list)
-    def run(self):
-        try:
-            models = ModelManager().get_all_models()
-            self.finished.emit(models)
-        except Exception as e:
-            print(f"Lỗi khi load_models (QThread): {e}")
-            self.finished.emit([])
-
 class MeasurementWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        print("Đã vào MeasurementWidget.__init__()")
+        logger.debug("Đã vào MeasurementWidget.__init__()")
         self.device = HighGaugeDevice()
         self.model_manager = ModelManager()
         self.parameter_manager = ParameterManager()
         self.measurement_manager = MeasurementManager()
         self.db_config = DatabaseConfig()
+        self.tasks = AsyncTaskRunner(self)
         self.current_model_id = None
         self.current_parameter_id = None
         self.current_value = None
@@ -209,11 +220,10 @@ class MeasurementWidget(QWidget):
                 border-radius: 8px;
             }
         """)
-        print("Trước khi init_ui trong MeasurementWidget")
+        logger.debug("Trước khi init_ui trong MeasurementWidget")
         self.init_ui()
-        print("Trước khi load_models bằng QThread trong MeasurementWidget")
-        self.load_models_qthread()
-        print("Sau khi load_models_qthread trong MeasurementWidget")
+        logger.debug("Trước khi load_models ở luồng nền trong MeasurementWidget")
+        self.load_models()
         
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -270,42 +280,35 @@ class MeasurementWidget(QWidget):
         control_layout.addWidget(self.save_btn)
         layout.addLayout(control_layout)
 
-    def load_models_qthread(self):
-        try:
-            print("Bắt đầu tạo QThread...")
-            self.thread = QThread()
-            self.worker = ModelLoaderWorker()
-            self.worker.moveToThread(self.thread)
-            self.thread.started.connect(self.worker.run)
-            self.worker.finished.connect(self.update_models_ui)
-            self.worker.finished.connect(self.thread.quit)
-            self.worker.finished.connect(self.worker.deleteLater)
-            self.thread.finished.connect(self.thread.deleteLater)
-            print("Bắt đầu QThread...")
-            self.thread.start()
-        except Exception as e:
-            print(f"Lỗi khi tạo QThread: {e}")
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách model: {str(e)}")
+    def load_models(self):
+        self.tasks.submit(
+            'models', self.model_manager.get_all_models,
+            on_result=self.update_models_ui,
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách model: {str(e)}")
+        )
 
     def update_models_ui(self, models):
         try:
-            print(f"Cập nhật UI với {len(models)} models")
+            logger.debug("Cập nhật UI với %s models", len(models))
             self.model_combo.clear()
             for model in models:
                 self.model_combo.addItem(model['name'], model['id'])
-            print("Đã cập nhật UI thành công")
+            logger.debug("Đã cập nhật UI thành công")
         except Exception as e:
             print(f"Lỗi khi cập nhật UI: {e}")
             QMessageBox.critical(self, "Lỗi", f"Không thể cập nhật giao diện: {str(e)}")
 
     def load_parameters(self, model_id):
-        try:
-            parameters = self.parameter_manager.get_parameters_by_model(model_id)
-            self.parameter_combo.clear()
-            for param in parameters:
-                self.parameter_combo.addItem(param['name'], param['id'])
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách thông số: {str(e)}")
+        self.tasks.submit(
+            'parameters', self.parameter_manager.get_parameters_by_model, model_id,
+            on_result=self.update_parameters_ui,
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách thông số: {str(e)}")
+        )
+
+    def update_parameters_ui(self, parameters):
+        self.parameter_combo.clear()
+        for param in parameters:
+            self.parameter_combo.addItem(param['name'], param['id'])
 
     def connect_device(self):
         try:
@@ -323,7 +326,10 @@ class MeasurementWidget(QWidget):
 
     def start_measurement(self):
         try:
-            self.measurement_timer.start(1000)  # Đọc dữ liệu mỗi giây
+            # Luồng nền đọc liên tục cổng COM; timer chỉ lấy mẫu từ bộ đệm để hiển thị
+            self.device.start_measurement()
+            self.device.start_acquisition()
+            self.measurement_timer.start(UI_REFRESH_MS)
             self.start_btn.setText("Dừng đo")
             self.start_btn.clicked.disconnect()
             self.start_btn.clicked.connect(self.stop_measurement)
@@ -333,6 +339,8 @@ class MeasurementWidget(QWidget):
     def stop_measurement(self):
         try:
             self.measurement_timer.stop()
+            self.device.stop_acquisition()
+            self.device.stop_measurement()
             self.start_btn.setText("Bắt đầu đo")
             self.start_btn.clicked.disconnect()
             self.start_btn.clicked.connect(self.start_measurement)
@@ -342,7 +350,7 @@ class MeasurementWidget(QWidget):
 
     def read_device_data(self):
         try:
-            value = self.device.read()
+            value = self.device.read_data()
             if value is not None:
                 self.current_value = value
                 self.value_label.setText(f"Giá trị: {value:.3f}")
@@ -362,9 +370,15 @@ class MeasurementWidget(QWidget):
                 QMessageBox.warning(self, "Cảnh báo", "Vui lòng chọn model và thông số!")
                 return
                 
+            product_id = self.measurement_manager.create_product(self.current_model_id)
+            if not product_id:
+                QMessageBox.critical(self, "Lỗi", "❌ Lỗi lưu dữ liệu vào database")
+                return
             self.measurement_manager.add_measurement(
-                self.current_parameter_id,
-                self.current_value
+                model_id=self.current_model_id,
+                parameter_id=self.current_parameter_id,
+                value=self.current_value,
+                product_id=product_id
             )
             QMessageBox.information(self, "Thành công", "Đã lưu kết quả đo!")
             self.save_btn.setEnabled(False)
@@ -12,6 +12,13 @@ except ImportError:
         from src.models.model_manager import ModelManager
     except ImportError:
         from ..models.model_manager import ModelManager
+try:
+    from .async_tasks import AsyncTaskRunner
+except ImportError:
+    try:
+        from src.ui.async_tasks import AsyncTaskRunner
+    except ImportError:
+        from async_tasks import AsyncTaskRunner
 import os
 import shutil
 import threading
@@ -219,6 +226,8 @@ class AddParameterDialog(QDialog):
 class ModelManagementWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.model_manager = ModelManager()
+        self.tasks = AsyncTaskRunner(self)
         self.init_ui()
 
     def init_ui(self):
@@ -249,40 +258,44 @@ class ModelManagementWidget(QWidget):
         self.load_models()
 
     def load_models(self):
-        try:
-            model_manager = ModelManager()
-            models = model_manager.get_all_models()
+        """Tải danh sách model ở luồng nền"""
+        self.tasks.submit(
+            'models', self.model_manager.get_all_models,
+            on_result=self.show_models,
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách model: {str(e)}")
+        )
+
+    def show_models(self, models):
+        self.model_table.setRowCount(len(models))
+        for i, model in enumerate(models):
+            self.model_table.setItem(i, 0, QTableWidgetItem(str(model['id'])))
+            self.model_table.setItem(i, 1, QTableWidgetItem(model['name']))
+            self.model_table.setItem(i, 2, QTableWidgetItem(model['description']))
             
-            self.model_table.setRowCount(len(models))
-            for i, model in enumerate(models):
-                self.model_table.setItem(i, 0, QTableWidgetItem(str(model['id'])))
-                self.model_table.setItem(i, 1, QTableWidgetItem(model['name']))
-                self.model_table.setItem(i, 2, QTableWidgetItem(model['description']))
-                
-                # Nút xóa
-                delete_btn = QPushButton("Xóa")
-                delete_btn.clicked.connect(lambda checked, m=model: self.delete_model(m['id']))
-                self.model_table.setCellWidget(i, 3, delete_btn)
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách model: {str(e)}")
+            # Nút xóa
+            delete_btn = QPushButton("Xóa")
+            delete_btn.clicked.connect(lambda checked, m=model: self.delete_model(m['id']))
+            self.model_table.setCellWidget(i, 3, delete_btn)
 
     def load_parameters(self, model_id):
-        try:
-            model_manager = ModelManager()
-            parameters = model_manager.get_parameters(model_id)
+        """Tải thông số của model ở luồng nền; chọn model liên tục thì chỉ hiện model chọn cuối"""
+        self.tasks.submit(
+            'parameters', self.model_manager.get_parameters, model_id,
+            on_result=self.show_parameters,
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách thông số: {str(e)}")
+        )
+
+    def show_parameters(self, parameters):
+        self.param_table.setRowCount(len(parameters))
+        for i, param in enumerate(parameters):
+            self.param_table.setItem(i, 0, QTableWidgetItem(str(param['id'])))
+            self.param_table.setItem(i, 1, QTableWidgetItem(param['name']))
+            self.param_table.setItem(i, 2, QTableWidgetItem(param['unit']))
             
-            self.param_table.setRowCount(len(parameters))
-            for i, param in enumerate(parameters):
-                self.param_table.setItem(i, 0, QTableWidgetItem(str(param['id'])))
-                self.param_table.setItem(i, 1, QTableWidgetItem(param['name']))
-                self.param_table.setItem(i, 2, QTableWidgetItem(param['unit']))
-                
-                # Nút xóa
-                delete_btn = QPushButton("Xóa")
-                delete_btn.clicked.connect(lambda checked, p=param: self.delete_parameter(p['id']))
-                self.param_table.setCellWidget(i, 3, delete_btn)
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách thông số: {str(e)}")
+            # Nút xóa
+            delete_btn = QPushButton("Xóa")
+            delete_btn.clicked.connect(lambda checked, p=param: self.delete_parameter(p['id']))
+            self.param_table.setCellWidget(i, 3, delete_btn)
 
     def on_model_selected(self):
         selected = self.model_table.selectedItems()
@@ -293,13 +306,20 @@ class ModelManagementWidget(QWidget):
     def add_model(self):
         dialog = AddModelDialog(self)
         if dialog.exec():
-            try:
-                model_info = dialog.get_model_info()
-                model_manager = ModelManager()
-                model_manager.add_model(model_info)
-                self.load_models()
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Không thể thêm model: {str(e)}")
+            model_info = dialog.get_model_info()
+            self.tasks.submit_write(
+                'add_model', self.model_manager.add_model,
+                model_info['name'], model_info['description'],
+                model_info['image_path'], model_info['template_path'],
+                on_result=self._on_model_added,
+                on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể thêm model: {str(e)}")
+            )
+
+    def _on_model_added(self, model_id):
+        if model_id is None:
+            QMessageBox.critical(self, "Lỗi", "Không thể thêm model")
+            return
+        self.load_models()
 
     def add_parameter(self):
         selected = self.model_table.selectedItems()
@@ -310,18 +330,13 @@ class ModelManagementWidget(QWidget):
         model_id = int(self.model_table.item(selected[0].row(), 0).text())
         dialog = AddParameterDialog(self)
         if dialog.exec():
-            try:
-                param_info = dialog.get_parameter_info()
-                model_manager = ModelManager()
-                model_manager.add_parameter(
-                    model_id, 
-                    param_info['name'], 
-                    param_info['unit'], 
-                    param_info['description']
-                )
-                self.load_parameters(model_id)
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Không thể thêm thông số: {str(e)}")
+            param_info = dialog.get_parameter_info()
+            self.tasks.submit_write(
+                'add_parameter', self.model_manager.add_parameter,
+                model_id, param_info['name'], param_info['unit'], param_info['description'],
+                on_result=lambda parameter_id: self._on_parameter_changed(parameter_id, "Không thể thêm thông số"),
+                on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể thêm thông số: {str(e)}")
+            )
 
     def delete_model(self, model_id):
         reply = QMessageBox.question(self, "Xác nhận", 
@@ -329,13 +344,19 @@ class ModelManagementWidget(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                model_manager = ModelManager()
-                model_manager.delete_model(model_id)
-                self.load_models()
-                self.param_table.setRowCount(0)
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Không thể xóa model: {str(e)}")
+            self.tasks.submit_write(
+                'delete_model', self.model_manager.delete_model, model_id,
+                on_result=self._on_model_deleted,
+                on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể xóa model: {str(e)}")
+            )
+
+    def _on_model_deleted(self, ok):
+        if not ok:
+            QMessageBox.critical(self, "Lỗi", "Không thể xóa model")
+            return
+        self.load_models()
+        self.tasks.cancel('parameters')
+        self.param_table.setRowCount(0)
 
     def delete_parameter(self, param_id):
         reply = QMessageBox.question(self, "Xác nhận", 
@@ -343,12 +364,18 @@ class ModelManagementWidget(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                model_manager = ModelManager()
-                model_manager.delete_parameter(param_id)
-                selected = self.model_table.selectedItems()
-                if selected:
-                    model_id = int(self.model_table.item(selected[0].row(), 0).text())
-                    self.load_parameters(model_id)
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Không thể xóa thông số: {str(e)}") 
\ No newline at end of file
+            self.tasks.submit_write(
+                'delete_parameter', self.model_manager.delete_parameter, param_id,
+                on_result=lambda ok: self._on_parameter_changed(ok, "Không thể xóa thông số"),
+                on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể xóa thông số: {str(e)}")
+            )
+
+    def _on_parameter_changed(self, result, error_message):
+        """Sau khi thêm/xoá thông số: nạp lại thông số của model đang chọn"""
+        if not result:
+            QMessageBox.critical(self, "Lỗi", error_message)
+            return
+        selected = self.model_table.selectedItems()
+        if selected:
+            model_id = int(self.model_table.item(selected[0].row(), 0).text())
+            self.load_parameters(model_id) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton, QDialog, QMessageBox
-from PyQt6.QtCore import pyqtSignal, Qt, QThread, QObject, QTimer
+from PyQt6.QtCore import pyqtSignal, Qt, QTimer
 
 # Import model modules
 try:
@@ -18,21 +18,22 @@ except ImportError:
         from src.ui.model_management import AddModelDialog
     except ImportError:
         from .model_management import AddModelDialog
+try:
+    from .async_tasks import AsyncTaskRunner
+except ImportError:
+    try:
+        from src.ui.async_tasks import AsyncTaskRunner
+    except ImportError:
+        from async_tasks import AsyncTaskRunner
+try:
+    from config.logger import get_logger
+except ImportError:
+    try:
+        from src.config.logger import get_logger
+    except ImportError:
+        from ..config.logger import get_logger
 
-class ModelLoaderWorker(QObject):
-    finished = pyqtSignal(list)
-    error = pyqtSignal(str)
-    
-    def run(self):
-        try:
-            model_manager = ModelManager()
-            models = model_manager.get_all_models()
-            print(f"Số lượng model lấy được (QThread): {len(models)}")
-            self.finished.emit(models)
-        except Exception as e:
-            print(f"Lỗi khi load_models (QThread): {e}")
-            self.error.emit(str(e))
-            self.finished.emit([])
+logger = get_logger('ui.model_selector')
 
 class ModelSelectorWidget(QWidget):
     model_selected = pyqtSignal(int)
@@ -40,7 +41,9 @@ class ModelSelectorWidget(QWidget):
     def __init__(self, parent=None):
         try:
             super().__init__(parent)
-            print("Đã vào ModelSelectorWidget.__init__()")
+            logger.debug("Đã vào ModelSelectorWidget.__init__()")
+            self.model_manager = ModelManager()
+            self.tasks = AsyncTaskRunner(self)
             self.setStyleSheet('''
                 QWidget { 
                     background: #f8fafc; 
@@ -70,13 +73,13 @@ class ModelSelectorWidget(QWidget):
                     background: #b71c1c; 
                 }
             ''')
-            print("Đã set stylesheet")
+            logger.debug("Đã set stylesheet")
             
             layout = QVBoxLayout()
             self.setLayout(layout)
             layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
             
-            print("Đang tạo các widget con...")
+            logger.debug("Đang tạo các widget con...")
             self.label = QLabel("Chọn Model để bắt đầu")
             self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             self.combo = QComboBox()
@@ -85,53 +88,40 @@ class ModelSelectorWidget(QWidget):
             self.btn_start = QPushButton("Bắt đầu đo")
             self.btn_start.clicked.connect(self.emit_selected)
             
-            print("Đang thêm widget vào layout...")
+            logger.debug("Đang thêm widget vào layout...")
             layout.addWidget(self.label)
             layout.addWidget(self.combo)
             layout.addWidget(self.btn_start)
             layout.addWidget(self.btn_add)
             
-            print("Trước khi load_models bằng QThread trong ModelSelectorWidget")
-            self.load_models_qthread()
-            print("Đã khởi tạo ModelSelectorWidget thành công")
+            logger.debug("Trước khi load_models ở luồng nền trong ModelSelectorWidget")
+            self.load_models()
+            logger.debug("Đã khởi tạo ModelSelectorWidget thành công")
         except Exception as e:
             print(f"Lỗi khởi tạo ModelSelectorWidget: {e}")
             QMessageBox.critical(self, "Lỗi", f"Không thể khởi tạo giao diện: {str(e)}")
 
-    def load_models_qthread(self):
-        try:
-            print("Bắt đầu tạo QThread...")
-            self.thread = QThread()
-            self.worker = ModelLoaderWorker()
-            self.worker.moveToThread(self.thread)
-            self.thread.started.connect(self.worker.run)
-            self.worker.finished.connect(self.update_models_ui)
-            self.worker.error.connect(self.handle_error)
-            self.worker.finished.connect(self.thread.quit)
-            self.worker.finished.connect(self.worker.deleteLater)
-            self.thread.finished.connect(self.thread.deleteLater)
-            print("Bắt đầu QThread...")
-            self.thread.start()
-        except Exception as e:
-            print(f"Lỗi khi tạo QThread: {e}")
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách model: {str(e)}")
+    def load_models(self):
+        self.tasks.submit('models', self.model_manager.get_all_models,
+                          on_result=self.update_models_ui, on_error=self.handle_error)
 
-    def handle_error(self, error_msg):
-        print(f"Lỗi từ worker: {error_msg}")
+    def handle_error(self, error):
+        print(f"Lỗi khi load_models (luồng nền): {error}")
         QMessageBox.warning(self, "Cảnh báo", 
-            f"Không thể tải danh sách model: {error_msg}\n"
+            f"Không thể tải danh sách model: {error}\n"
             "Một số tính năng có thể không hoạt động.")
+        self.update_models_ui([])
 
     def update_models_ui(self, models):
         try:
-            print(f"Cập nhật UI với {len(models)} models")
+            logger.debug("Cập nhật UI với %s models", len(models))
             self.combo.clear()
             if not models or len(models) == 0:
                 self.label.setText("Chưa có model nào. Vui lòng thêm model mới!")
                 self.combo.setEnabled(False)
                 self.btn_start.setEnabled(False)
                 self.btn_add.setVisible(True)
-                print("Không có model nào, chỉ hiển thị nút thêm model mới.")
+                logger.debug("Không có model nào, chỉ hiển thị nút thêm model mới.")
                 return
             self.label.setText("Chọn Model để bắt đầu")
             for m in models:
@@ -139,7 +129,7 @@ class ModelSelectorWidget(QWidget):
             self.combo.setEnabled(True)
             self.btn_start.setEnabled(True)
             self.btn_add.setVisible(True)
-            print("Đã cập nhật UI thành công")
+            logger.debug("Đã cập nhật UI thành công")
         except Exception as e:
             print(f"Lỗi khi cập nhật UI: {e}")
             QMessageBox.critical(self, "Lỗi", f"Không thể cập nhật giao diện: {str(e)}")
@@ -148,7 +138,7 @@ class ModelSelectorWidget(QWidget):
         try:
             dlg = AddModelDialog(self)
             if dlg.exec():
-                QTimer.singleShot(0, self.load_models_qthread)
+                QTimer.singleShot(0, self.load_models)
         except Exception as e:
             print(f"Lỗi khi mở dialog thêm model: {e}")
             QMessageBox.critical(self, "Lỗi", f"Không thể mở form thêm model: {str(e)}")
@@ -0,0 +1,132 @@
+from datetime import datetime
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTabWidget,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QTimer
+
+try:
+    from config.query_stats import QueryStats
+except ImportError:
+    try:
+        from src.config.query_stats import QueryStats
+    except ImportError:
+        from ..config.query_stats import QueryStats
+
+# Chu kỳ làm mới bảng khi cửa sổ đang mở (ms)
+REFRESH_MS = 2000
+
+SUMMARY_COLUMNS = [
+    ("Thao tác", 'action', None),
+    ("Số lần", 'count', '{:d}'),
+    ("Tổng (ms)", 'total_ms', '{:.1f}'),
+    ("TB (ms)", 'avg_ms', '{:.1f}'),
+    ("Max (ms)", 'max_ms', '{:.1f}'),
+    ("Kết nối TB", 'avg_connect_ms', '{:.1f}'),
+    ("Execute TB", 'avg_execute_ms', '{:.1f}'),
+    ("Fetch TB", 'avg_fetch_ms', '{:.1f}'),
+    ("Dòng TB", 'avg_rows', '{:.0f}'),
+    ("Tham số TB", 'avg_params', '{:.0f}'),
+    ("Lỗi", 'errors', '{:d}'),
+    ("Truy vấn", 'fingerprint', None),
+]
+
+SLOW_COLUMNS = [
+    ("Thời điểm", 'at', None),
+    ("Thao tác", 'action', None),
+    ("Tổng (ms)", 'total_ms', '{:.1f}'),
+    ("Kết nối", 'connect_ms', '{:.1f}'),
+    ("Execute", 'execute_ms', '{:.1f}'),
+    ("Fetch", 'fetch_ms', '{:.1f}'),
+    ("Dòng", 'rows', '{:d}'),
+    ("Tham số", 'params', '{:d}'),
+    ("Truy vấn", 'fingerprint', None),
+]
+
+
+class QueryStatsDialog(QDialog):
+    """Thống kê truy vấn database gần nhất (QueryStats), tự làm mới khi đang mở"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Thống kê truy vấn database")
+        self.resize(1100, 520)
+
+        layout = QVBoxLayout(self)
+        self.totals_label = QLabel()
+        layout.addWidget(self.totals_label)
+
+        self.tabs = QTabWidget()
+        self.summary_table = self._create_table(SUMMARY_COLUMNS)
+        self.slow_table = self._create_table(SLOW_COLUMNS)
+        self.tabs.addTab(self.summary_table, "Theo thao tác / truy vấn")
+        self.tabs.addTab(self.slow_table, "Truy vấn chậm")
+        layout.addWidget(self.tabs)
+
+        button_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Làm mới")
+        refresh_btn.clicked.connect(self.refresh)
+        reset_btn = QPushButton("Xoá thống kê")
+        reset_btn.clicked.connect(self.reset_stats)
+        close_btn = QPushButton("Đóng")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(refresh_btn)
+        button_layout.addWidget(reset_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    @staticmethod
+    def _create_table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels([title for title, _, _ in columns])
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(len(columns) - 1, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @staticmethod
+    def _fill_table(table, columns, rows):
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, (_, key, fmt) in enumerate(columns):
+                value = row[key]
+                if key == 'at':
+                    text = datetime.fromtimestamp(value).strftime('%H:%M:%S')
+                else:
+                    text = fmt.format(value) if fmt else str(value)
+                item = QTableWidgetItem(text)
+                if fmt:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                if key == 'fingerprint':
+                    item.setToolTip(text)
+                table.setItem(r, c, item)
+
+    def refresh(self):
+        totals = QueryStats.totals()
+        self.totals_label.setText(
+            f"Tổng số truy vấn: {totals['queries']} | Chậm (≥ {QueryStats.SLOW_QUERY_MS:g} ms): {totals['slow']} | "
+            f"Lỗi: {totals['errors']} | Bảng tính trên {totals['window']} truy vấn gần nhất"
+        )
+        self._fill_table(self.summary_table, SUMMARY_COLUMNS, QueryStats.snapshot())
+        self._fill_table(self.slow_table, SLOW_COLUMNS, QueryStats.slow_queries())
+
+    def reset_stats(self):
+        QueryStats.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(REFRESH_MS)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
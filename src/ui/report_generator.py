@@ -1,8 +1,8 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QComboBox, QDateEdit, QFileDialog, QMessageBox, QGroupBox
+    QComboBox, QDateEdit, QFileDialog, QMessageBox, QGroupBox, QProgressBar
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QObject, QThread, pyqtSignal
 
 # Import model modules
 try:
@@ -15,6 +15,47 @@ except ImportError:
     except ImportError:
         from ..models.report_manager import ReportManager
         from ..models.model_manager import ModelManager
+try:
+    from .async_tasks import AsyncTaskRunner
+except ImportError:
+    try:
+        from src.ui.async_tasks import AsyncTaskRunner
+    except ImportError:
+        from async_tasks import AsyncTaskRunner
+
+class ReportWorker(QObject):
+    """Chạy một tác vụ báo cáo (tạo báo cáo, xuất CSV) ở luồng nền; có thể huỷ, báo tiến độ.
+
+    Tác vụ dài nên chạy ở QThread riêng, không chiếm luồng của AsyncTaskRunner.
+
+    task được gọi với task(*args, progress=..., is_cancelled=...) và trả về bool.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, task, *args):
+        super().__init__()
+        self.task = task
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def run(self):
+        try:
+            result = self.task(
+                *self.args,
+                progress=self.progress.emit,
+                is_cancelled=self.is_cancelled
+            )
+        except Exception as e:
+            print(f"Lỗi khi chạy tác vụ báo cáo (QThread): {e}")
+            result = False
+        self.finished.emit(result)
 
 class ReportGeneratorWidget(QWidget):
     def __init__(self):
@@ -22,6 +63,10 @@ class ReportGeneratorWidget(QWidget):
         self.report_manager = ReportManager()
         self.model_manager = ModelManager()
         self.current_excel_path = None
+        self.report_thread = None
+        self.report_worker = None
+        self.progress_text = ""
+        self.tasks = AsyncTaskRunner(self)
         self.init_ui()
         
     def init_ui(self):
@@ -66,6 +111,17 @@ class ReportGeneratorWidget(QWidget):
         # Nút tạo báo cáo
         generate_btn = QPushButton("Tạo Báo Cáo")
         generate_btn.clicked.connect(self.generate_report)
+        self.generate_btn = generate_btn
+        
+        # Tiến độ vẽ biểu đồ và nút huỷ
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.cancel_btn = QPushButton("Huỷ")
+        self.cancel_btn.clicked.connect(self.cancel_report)
+        self.cancel_btn.setVisible(False)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.cancel_btn)
         
         # Phần xuất file
         export_group = QGroupBox("Xuất Báo Cáo")
@@ -78,9 +134,10 @@ class ReportGeneratorWidget(QWidget):
         self.pdf_btn = pdf_btn
         
         # Nút xuất CSV
+        # CSV đọc thẳng từ database theo template/model/khoảng ngày đang chọn,
+        # không cần tạo báo cáo Excel trước
         csv_btn = QPushButton("Xuất CSV")
         csv_btn.clicked.connect(self.export_to_csv)
-        csv_btn.setEnabled(False)
         self.csv_btn = csv_btn
         
         export_layout.addWidget(pdf_btn)
@@ -92,21 +149,28 @@ class ReportGeneratorWidget(QWidget):
         layout.addLayout(model_layout)
         layout.addLayout(date_layout)
         layout.addWidget(generate_btn)
+        layout.addLayout(progress_layout)
         layout.addWidget(export_group)
         
         self.setLayout(layout)
         
     def load_templates(self):
-        """Tải danh sách template"""
-        templates = self.report_manager.get_report_templates()
+        """Tải danh sách template (ở luồng nền)"""
+        self.tasks.submit('templates', self.report_manager.get_report_templates,
+                          on_result=self.show_templates)
+
+    def show_templates(self, templates):
         self.template_combo.clear()
         
         for template in templates:
             self.template_combo.addItem(template['name'], template['id'])
             
     def load_models(self):
-        """Tải danh sách model"""
-        models = self.model_manager.get_all_models()
+        """Tải danh sách model (ở luồng nền)"""
+        self.tasks.submit('models', self.model_manager.get_all_models,
+                          on_result=self.show_models)
+
+    def show_models(self, models):
         self.model_combo.clear()
         
         for model in models:
@@ -132,27 +196,78 @@ class ReportGeneratorWidget(QWidget):
         )
         
         if file_path:
-            if self.report_manager.generate_report(
-                template_id,
-                model_id,
-                start_date,
-                end_date,
-                file_path
-            ):
-                self.current_excel_path = file_path
-                self.pdf_btn.setEnabled(True)
-                self.csv_btn.setEnabled(True)
-                QMessageBox.information(
-                    self,
-                    "Thành công",
-                    "Đã tạo báo cáo thành công"
-                )
-            else:
-                QMessageBox.critical(
-                    self,
-                    "Lỗi",
-                    "Không thể tạo báo cáo"
-                )
+            # Tạo báo cáo ở luồng nền để giao diện không bị treo
+            self.start_report_task(
+                "Đang vẽ biểu đồ",
+                lambda result, cancelled, path=file_path: self.on_report_finished(result, cancelled, path),
+                self.report_manager.generate_report,
+                template_id, model_id, start_date, end_date, file_path
+            )
+
+    def start_report_task(self, progress_text, on_finished, task, *args):
+        """Chạy task ở QThread riêng, hiện thanh tiến độ và nút huỷ cho tới khi xong"""
+        # QThread có parent nên không bị huỷ khi bỏ tham chiếu lúc luồng còn đang dừng;
+        # worker được giữ qua thuộc tính của thread cho tới khi thread bị deleteLater
+        self.report_thread = QThread(self)
+        self.report_worker = ReportWorker(task, *args)
+        self.report_thread.worker = self.report_worker
+        self.report_worker.moveToThread(self.report_thread)
+        self.report_thread.started.connect(self.report_worker.run)
+        self.report_worker.progress.connect(self.update_report_progress)
+        self.report_worker.finished.connect(
+            lambda result: on_finished(result, self.finish_report_task())
+        )
+        self.report_worker.finished.connect(self.report_thread.quit)
+        self.report_worker.finished.connect(self.report_worker.deleteLater)
+        self.report_thread.finished.connect(self.report_thread.deleteLater)
+
+        self.progress_text = progress_text
+        self.generate_btn.setEnabled(False)
+        self.csv_btn.setEnabled(False)
+        self.progress_bar.setRange(0, 0)  # Chưa biết tổng
+        self.progress_bar.setVisible(True)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setVisible(True)
+        self.report_thread.start()
+
+    def finish_report_task(self):
+        """Khôi phục giao diện sau khi tác vụ kết thúc; trả về True nếu tác vụ đã bị huỷ"""
+        cancelled = self.report_worker is not None and self.report_worker.is_cancelled()
+        self.report_thread = None
+        self.report_worker = None
+        self.generate_btn.setEnabled(True)
+        self.csv_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        self.cancel_btn.setVisible(False)
+        return cancelled
+
+    def update_report_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"{self.progress_text} {done}/{total}")
+
+    def cancel_report(self):
+        if self.report_worker is not None:
+            self.report_worker.cancel()
+            self.cancel_btn.setEnabled(False)
+
+    def on_report_finished(self, result, cancelled, file_path):
+        if result:
+            self.current_excel_path = file_path
+            self.pdf_btn.setEnabled(True)
+            QMessageBox.information(
+                self,
+                "Thành công",
+                "Đã tạo báo cáo thành công"
+            )
+        elif cancelled:
+            QMessageBox.information(self, "Thông báo", "Đã huỷ tạo báo cáo")
+        else:
+            QMessageBox.critical(
+                self,
+                "Lỗi",
+                "Không thể tạo báo cáo"
+            )
                 
     def export_to_pdf(self):
         """Xuất báo cáo ra PDF"""
@@ -167,25 +282,38 @@ class ReportGeneratorWidget(QWidget):
         )
         
         if file_path:
-            if self.report_manager.export_to_pdf(
-                self.current_excel_path,
-                file_path
-            ):
-                QMessageBox.information(
-                    self,
-                    "Thành công",
-                    "Đã xuất báo cáo ra PDF thành công"
-                )
-            else:
-                QMessageBox.critical(
-                    self,
-                    "Lỗi",
-                    "Không thể xuất báo cáo ra PDF"
-                )
+            # Ghi PDF ở luồng nền, khoá nút cho tới khi xong
+            self.pdf_btn.setEnabled(False)
+            self.tasks.submit(
+                'pdf', self.report_manager.export_to_pdf, self.current_excel_path, file_path,
+                on_result=self.on_pdf_finished,
+                on_error=lambda e: self.on_pdf_finished(False)
+            )
+
+    def on_pdf_finished(self, result):
+        self.pdf_btn.setEnabled(True)
+        if result:
+            QMessageBox.information(
+                self,
+                "Thành công",
+                "Đã xuất báo cáo ra PDF thành công"
+            )
+        else:
+            QMessageBox.critical(
+                self,
+                "Lỗi",
+                "Không thể xuất báo cáo ra PDF"
+            )
                 
     def export_to_csv(self):
-        """Xuất báo cáo ra CSV"""
-        if not self.current_excel_path:
+        """Xuất dữ liệu ra CSV trực tiếp từ database (không qua file Excel)"""
+        template_id = self.template_combo.currentData()
+        model_id = self.model_combo.currentData()
+        start_date = self.start_date.date().toPyDate()
+        end_date = self.end_date.date().toPyDate()
+        
+        if not template_id or not model_id:
+            QMessageBox.warning(self, "Cảnh báo", "Vui lòng chọn template và model")
             return
             
         file_path, _ = QFileDialog.getSaveFileName(
@@ -196,18 +324,25 @@ class ReportGeneratorWidget(QWidget):
         )
         
         if file_path:
-            if self.report_manager.export_to_csv(
-                self.current_excel_path,
-                file_path
-            ):
-                QMessageBox.information(
-                    self,
-                    "Thành công",
-                    "Đã xuất báo cáo ra CSV thành công"
-                )
-            else:
-                QMessageBox.critical(
-                    self,
-                    "Lỗi",
-                    "Không thể xuất báo cáo ra CSV"
-                ) 
\ No newline at end of file
+            self.start_report_task(
+                "Đang ghi CSV",
+                self.on_csv_finished,
+                self.report_manager.export_to_csv,
+                template_id, model_id, start_date, end_date, file_path
+            )
+
+    def on_csv_finished(self, result, cancelled):
+        if result:
+            QMessageBox.information(
+                self,
+                "Thành công",
+                "Đã xuất báo cáo ra CSV thành công"
+            )
+        elif cancelled:
+            QMessageBox.information(self, "Thông báo", "Đã huỷ xuất CSV")
+        else:
+            QMessageBox.critical(
+                self,
+                "Lỗi",
+                "Không thể xuất báo cáo ra CSV"
+            )
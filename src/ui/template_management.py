@@ -13,6 +13,13 @@ except ImportError:
         from src.models.template_manager import TemplateManager
     except ImportError:
         from ..models.template_manager import TemplateManager
+try:
+    from .async_tasks import AsyncTaskRunner
+except ImportError:
+    try:
+        from src.ui.async_tasks import AsyncTaskRunner
+    except ImportError:
+        from async_tasks import AsyncTaskRunner
 import os
 import shutil
 
@@ -104,6 +111,7 @@ class TemplateManagementWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.template_manager = TemplateManager()
+        self.tasks = AsyncTaskRunner(self)
         self.setStyleSheet("""
             QWidget {
                 background: #f8fafc;
@@ -181,8 +189,11 @@ class TemplateManagementWidget(QWidget):
         self.load_templates()
         
     def load_templates(self):
-        """Tải danh sách template"""
-        templates = self.template_manager.get_all_templates()
+        """Tải danh sách template (ở luồng nền)"""
+        self.tasks.submit('templates', self.template_manager.get_all_templates,
+                          on_result=self.show_templates)
+
+    def show_templates(self, templates):
         self.template_table.setRowCount(len(templates))
         
         for i, template in enumerate(templates):
@@ -199,18 +210,26 @@ class TemplateManagementWidget(QWidget):
                 QMessageBox.warning(self, "Thiếu thông tin", "Vui lòng nhập đầy đủ thông tin!")
                 return
                 
-            # Copy file template vào thư mục riêng
-            tpl_dir = "static/templates"
-            os.makedirs(tpl_dir, exist_ok=True)
-            tpl_save = os.path.join(tpl_dir, os.path.basename(info['file_path']))
-            shutil.copy2(info['file_path'], tpl_save)
-            
-            # Lưu vào database
-            if self.template_manager.add_template(info['name'], tpl_save):
-                self.load_templates()
-                QMessageBox.information(self, "Thành công", "Đã thêm template mới!")
-            else:
-                QMessageBox.critical(self, "Lỗi", "Không thể thêm template!")
+            self.tasks.submit_write(
+                'add_template', self._save_template, info['name'], info['file_path'],
+                on_result=self._on_template_added,
+                on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể thêm template: {str(e)}")
+            )
+
+    def _save_template(self, name, file_path):
+        """Copy file template vào thư mục riêng rồi lưu vào database (chạy ở luồng nền)"""
+        tpl_dir = "static/templates"
+        os.makedirs(tpl_dir, exist_ok=True)
+        tpl_save = os.path.join(tpl_dir, os.path.basename(file_path))
+        shutil.copy2(file_path, tpl_save)
+        return self.template_manager.add_template(name, tpl_save)
+
+    def _on_template_added(self, template_id):
+        if template_id:
+            self.load_templates()
+            QMessageBox.information(self, "Thành công", "Đã thêm template mới!")
+        else:
+            QMessageBox.critical(self, "Lỗi", "Không thể thêm template!")
                 
     def delete_template(self):
         """Xóa template"""
@@ -229,7 +248,14 @@ class TemplateManagementWidget(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            if self.template_manager.delete_template(template_id):
-                self.load_templates()
-            else:
-                QMessageBox.critical(self, "Lỗi", "Không thể xóa template") 
\ No newline at end of file
+            self.tasks.submit_write(
+                'delete_template', self.template_manager.delete_template, template_id,
+                on_result=self._on_template_deleted,
+                on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể xóa template: {str(e)}")
+            )
+
+    def _on_template_deleted(self, ok):
+        if ok:
+            self.load_templates()
+        else:
+            QMessageBox.critical(self, "Lỗi", "Không thể xóa template") 
\ No newline at end of file